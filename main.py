@@ -1,14 +1,30 @@
 import logging
+import signal
+import sys
+from types import FrameType
 
 from waitress import serve
 
-from wsgi import app_with_static
+from services import win_probability
+from wsgi import app_with_static, match_controller
 
 logger = logging.getLogger(__name__)
 
+
+def _exit_on_sigterm(signum: int, frame: FrameType | None) -> None:
+    # Unwinds serve() like Ctrl+C does, so the unsaved points are written before the process exits
+    sys.exit(0)
+
+
 if __name__ == '__main__':
     host = '127.0.0.1'
     port = 8080
+    win_probability.precompute()
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    match_controller.ongoing_matches.start()
     logger.info(f"The server is running http://{host}:{port}/")
-    serve(app_with_static, host=host, port=port)
-    logger.info("The server has stopped")
+    try:
+        serve(app_with_static, host=host, port=port)
+    finally:
+        match_controller.ongoing_matches.stop()
+        logger.info("The server has stopped")
@@ -0,0 +1,334 @@
+"""
+Scoring microbenchmarks with regression thresholds.
+
+Measures the throughput, the latency percentiles and the peak memory allocated
+per operation of the scoring hot paths: the scoring engine, every game state
+strategy, `MatchService.add_point` and the full `POST /match-score` request.
+The database is an in-memory SQLite database, so the numbers show the cost of
+the application code and not of a database server.
+
+Results can be saved as a baseline. A run compared with a baseline fails if any
+benchmark is slower or allocates more than the threshold allows.
+
+Usage:
+    python -m benchmark --save-baseline
+    python -m benchmark --threshold 0.2
+"""
+import argparse
+import io
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.base import Base
+from models.match import Match
+from models.match_point import MatchPoint, MatchSnapshot  # noqa: F401
+from models.player import Player
+from services.match_service import MatchService
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import SCORING_ENGINE, STATE_STRATEGY
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent.parent / 'benchmarks' / 'baseline.json'
+# Allowed relative regression before a run fails
+DEFAULT_THRESHOLD = 0.25
+# Operations sampled one by one for the latency percentiles and the allocations
+SAMPLES = 2_000
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Measurements of one benchmark.
+    """
+    name: str
+    ops_per_sec: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    peak_alloc_bytes: float
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def measure(name: str, operation: Callable[[], object], operations: int) -> BenchmarkResult:
+    """
+    Measures one operation.
+
+    The throughput is timed over `operations` calls in a tight loop. The latency
+    percentiles and the peak allocations are sampled call by call, the latter with
+    `tracemalloc`, which slows the calls down, so the passes are kept separate.
+
+    :param name: The name of the benchmark.
+    :param operation: The operation to measure.
+    :param operations: The number of calls timed for the throughput.
+    :return: The measurements.
+    """
+    samples = min(SAMPLES, operations)
+    for _ in range(min(100, operations)):
+        operation()
+
+    started = time.perf_counter()
+    for _ in range(operations):
+        operation()
+    elapsed = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(samples):
+        call_started = time.perf_counter_ns()
+        operation()
+        latencies.append((time.perf_counter_ns() - call_started) / 1000)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        allocated = 0
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            operation()
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=name,
+        ops_per_sec=operations / elapsed,
+        p50_us=_percentile(latencies, 0.50),
+        p95_us=_percentile(latencies, 0.95),
+        p99_us=_percentile(latencies, 0.99),
+        peak_alloc_bytes=allocated / samples
+    )
+
+
+def _random_points(seed: int) -> Iterator[int]:
+    rng = random.Random(seed)
+    while True:
+        yield 1 if rng.random() < 0.5 else 2
+
+
+def bench_scoring_engine(operations: int) -> BenchmarkResult:
+    """
+    Benchmarks `ScoringEngine.play` over random matches.
+    """
+    points = _random_points(1)
+    state = ScoreState()
+
+    def operation() -> None:
+        nonlocal state
+        state, _ = SCORING_ENGINE.play(state, next(points))
+        if state.game_state is GameState.FINISHED:
+            state = ScoreState()
+
+    return measure('scoring_engine.play', operation, operations)
+
+
+def bench_strategies(operations: int) -> list[BenchmarkResult]:
+    """
+    Benchmarks every game state strategy over all of its reachable states.
+    """
+    results = []
+    for game_state, strategy in STATE_STRATEGY.items():
+        states = [state for state in SCORING_ENGINE.states if state.game_state is game_state]
+        points = _random_points(2)
+        position = 0
+
+        def operation() -> None:
+            nonlocal position
+            position = (position + 1) % len(states)
+            strategy.add_point(states[position], next(points))
+
+        results.append(measure(f'strategy.{game_state.value}', operation, operations))
+    return results
+
+
+def bench_add_point(operations: int) -> BenchmarkResult:
+    """
+    Benchmarks `MatchService.add_point`, including the point log and the commit, against in-memory SQLite.
+    """
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(autoflush=False, bind=engine)()
+    player1, player2 = Player(name='Roger'), Player(name='Rafael')
+    db.add_all([player1, player2])
+    db.commit()
+
+    points = _random_points(3)
+    match = MatchService.create_match(db, player1.id, player2.id)
+    state = ScoreState()
+
+    def operation() -> None:
+        nonlocal match, state
+        state = MatchService.add_point(db, match, state, next(points))
+        if state.game_state is GameState.FINISHED:
+            match = MatchService.create_match(db, player1.id, player2.id)
+            state = ScoreState()
+
+    try:
+        return measure('match_service.add_point', operation, operations)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def bench_match_score_post(operations: int) -> BenchmarkResult:
+    """
+    Benchmarks the full WSGI `POST /match-score` request against in-memory SQLite.
+    """
+    # The application binds its session factory at import time; it is bound back when the benchmark ends
+    from database import session
+    from wsgi import application, match_controller
+
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    original_bind = session.SessionLocal.kw.get('bind')
+    session.SessionLocal.configure(bind=engine)
+    log_level = logging.getLogger().level
+    logging.getLogger().setLevel(logging.WARNING)
+
+    try:
+        with session.get_db() as db:
+            player1, player2 = Player(name='Roger'), Player(name='Rafael')
+            db.add_all([player1, player2])
+            db.commit()
+            player_ids = (player1.id, player2.id)
+
+        def new_match() -> str:
+            with session.get_db() as db:
+                match_uuid = str(uuid.uuid4())
+                db.add(Match(uuid=match_uuid, player1_id=player_ids[0], player2_id=player_ids[1]))
+                db.commit()
+            return match_uuid
+
+        def start_response(status: str, headers: list[tuple[str, str]]) -> None:
+            response['status'] = status
+
+        points = _random_points(4)
+        response: dict[str, str] = {}
+        match_uuid = new_match()
+
+        def operation() -> None:
+            nonlocal match_uuid
+            body = f'player{next(points)}_point=1'.encode()
+            environ = {
+                'REQUEST_METHOD': 'POST',
+                'PATH_INFO': '/match-score',
+                'QUERY_STRING': f'uuid={match_uuid}',
+                'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+                'CONTENT_LENGTH': str(len(body)),
+                'wsgi.input': io.BytesIO(body),
+            }
+            body = b''.join(application(environ, start_response))
+            if response['status'] != '200 OK':
+                raise RuntimeError(f"POST /match-score failed: {response['status']}")
+            if b'The match is over' in body:
+                match_uuid = new_match()
+
+        return measure('match_controller.match_score.POST', operation, operations)
+    finally:
+        # The unsaved points are written to the benchmark database, not to the one bound back
+        match_controller.ongoing_matches.flush()
+        session.SessionLocal.configure(bind=original_bind)
+        logging.getLogger().setLevel(log_level)
+        engine.dispose()
+
+
+def run(operations: int) -> list[BenchmarkResult]:
+    """
+    Runs all benchmarks.
+
+    :param operations: The number of calls timed for the throughput of the in-memory benchmarks;
+                       the benchmarks that use the database run a tenth of them.
+    :return: The measurements.
+    """
+    database_operations = max(1, operations // 10)
+    return [
+        bench_scoring_engine(operations),
+        *bench_strategies(operations),
+        bench_add_point(database_operations),
+        bench_match_score_post(database_operations),
+    ]
+
+
+def compare(
+        results: list[BenchmarkResult],
+        baseline: dict[str, dict[str, float]],
+        threshold: float
+) -> list[str]:
+    """
+    Compares results with a baseline.
+
+    :param results: The measurements of this run.
+    :param baseline: The saved measurements, by benchmark name.
+    :param threshold: The allowed relative regression (0.25 allows 25% worse).
+    :return: A description of every regression; empty if there are none.
+    """
+    regressions = []
+    for result in results:
+        saved = baseline.get(result.name)
+        if saved is None:
+            continue
+        if result.ops_per_sec < saved['ops_per_sec'] * (1 - threshold):
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:,.0f} ops/s, baseline {saved['ops_per_sec']:,.0f} ops/s"
+            )
+        if result.p95_us > saved['p95_us'] * (1 + threshold):
+            regressions.append(f"{result.name}: p95 {result.p95_us:.1f} us, baseline {saved['p95_us']:.1f} us")
+        if result.peak_alloc_bytes > saved['peak_alloc_bytes'] * (1 + threshold):
+            regressions.append(
+                f"{result.name}: {result.peak_alloc_bytes:,.0f} bytes/op, "
+                f"baseline {saved['peak_alloc_bytes']:,.0f} bytes/op"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scoring hot paths.")
+    parser.add_argument("--operations", type=int, default=50_000, help="calls timed per in-memory benchmark")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="save the results as the new baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative regression (0.25 = 25%%)"
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.operations)
+
+    print(f"{'benchmark':<36} {'ops/s':>12} {'p50 us':>9} {'p95 us':>9} {'p99 us':>9} {'bytes/op':>10}")
+    for result in results:
+        print(
+            f"{result.name:<36} {result.ops_per_sec:>12,.0f} {result.p50_us:>9.1f} "
+            f"{result.p95_us:>9.1f} {result.p99_us:>9.1f} {result.peak_alloc_bytes:>10,.0f}"
+        )
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({result.name: asdict(result) for result in results}, indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,18 +22,78 @@ DB_USER: str | None = os.getenv("DB_USER")
 DB_PASSWORD: str | None = os.getenv("DB_PASSWORD")
 DB_HOST: str | None = os.getenv("DB_HOST")
 DB_NAME: str | None = os.getenv("DB_NAME")
-DB_PORT: str | None = os.getenv("DB_PORT")
+DB_PORT: str = os.getenv("DB_PORT", "3306")
 
 #  Form a URI to connect to the database
 DATABASE_URI: str = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?charset=utf8mb4"
 
+# Read replicas (optional): comma-separated "host" or "host:port" list, with the credentials of the primary.
+# The listing pages and score pages are read from them
+DB_REPLICA_HOSTS: list[str] = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+DATABASE_REPLICA_URIS: list[str] = [
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{host if ':' in host else f'{host}:{DB_PORT}'}/{DB_NAME}?charset=utf8mb4"
+    for host in DB_REPLICA_HOSTS
+]
+# Seconds an unreachable replica is left out before it is tried again
+REPLICA_RETRY_SECONDS = 30
+# Seconds a change may take to reach the replicas: the listing is read from the primary
+# that long after a match is finished or reopened
+REPLICA_LAG_SECONDS = 5
+
 # Number of matches per page
 PER_PAGE = 5
+# Rendered pages of the completed matches listing: number of pages kept and seconds a page is served from memory
+LISTING_CACHE_SIZE = 128
+LISTING_CACHE_TTL_SECONDS = 60
+# Pages up to this number are linked by number and selected with OFFSET, deeper pages by cursor
+MAX_OFFSET_PAGE = 10
+# Cached completed match counts: number of player filters kept and seconds before a count is recomputed
+MATCH_COUNT_CACHE_SIZE = 256
+MATCH_COUNT_TTL_SECONDS = 10 * 60
+# A player filter matching more completed matches than this is counted approximately
+MATCH_COUNT_EXACT_LIMIT = 1000
 
 SCORE_DIFF = 2
 MIN_GAMES = 6
 MIN_SETS: int = 2
 MIN_TIE_BREAK_POINTS = 7
+# Probability that player 1 wins a point, used for the live chance to win
+POINT_WIN_PROBABILITY = 0.5
+
+# Number of points between two score snapshots of the point log
+SNAPSHOT_INTERVAL = 50
+# Maximum number of points accepted in one batched score update
+MAX_POINTS_PER_REQUEST = 500
+# Statements a request may execute before it is logged as over budget (an N+1 query pattern)
+QUERY_BUDGET_PER_REQUEST = 10
+# Retries of a score update that lost a compare-and-swap on Match.version to a concurrent update
+MAX_UPDATE_RETRIES = 3
+
+# In-memory registry of ongoing matches: maximum number of matches kept
+ONGOING_MATCHES_MAX_SIZE = 1000
+# Seconds without a request after which an ongoing match is evicted
+ONGOING_MATCH_IDLE_SECONDS = 30 * 60
+# An ongoing match is saved after this many unsaved points or seconds since the last save; a background
+# thread saves the matches that get no more points, so a crash loses at most about CHECKPOINT_SECONDS of points
+CHECKPOINT_POINTS = 24
+CHECKPOINT_SECONDS = 60
+# Number of locks serializing the score updates of a match within the process
+MATCH_LOCK_STRIPES = 64
+# Write-behind (opt-in): a background thread writes the unsaved points of all ongoing matches every
+# WRITE_BEHIND_FLUSH_SECONDS, in transactions of up to WRITE_BEHIND_BATCH_SIZE matches
+WRITE_BEHIND: bool = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_FLUSH_SECONDS = 1.0
+WRITE_BEHIND_BATCH_SIZE = 100
+
+# Templates: auto-reload checks the template files for changes on every render (development only);
+# compiled templates are cached across restarts in TEMPLATE_CACHE_DIR (unset: Jinja's private per-user
+# temporary directory, empty: no cache), and TEMPLATE_MODULES_DIR holds the templates precompiled at
+# build time with `python -m views.precompile`
+TEMPLATE_AUTO_RELOAD: bool = os.getenv("TEMPLATE_AUTO_RELOAD", "false").lower() in ("1", "true", "yes")
+TEMPLATE_CACHE_DIR: str | None = os.getenv("TEMPLATE_CACHE_DIR")
+TEMPLATE_MODULES_DIR: str | None = os.getenv("TEMPLATE_MODULES_DIR")
+# Characters of a streamed page collected before a chunk is sent
+TEMPLATE_STREAM_CHUNK_SIZE = 8 * 1024
 
 MAX_LENGTH = 64
 NAME_PATTERN = re.compile(r'^[^\W\d_]+(?:-[^\W\d_]+)*$', re.UNICODE)
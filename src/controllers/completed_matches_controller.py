@@ -1,15 +1,20 @@
 
 import logging
 from math import ceil
-from typing import Callable, Any
-from urllib.parse import parse_qs
+from typing import Callable, Any, Iterable
+from urllib.parse import parse_qs, urlencode
 
-from config.config import PER_PAGE
+from sqlalchemy.orm import Session
+
+from config.config import PER_PAGE, MAX_OFFSET_PAGE
 from controllers.base_controller import BaseController
-from database.session import get_db
+from database.session import get_db, get_read_db
 from exceptions import DatabaseError
 from models.match import Match
+from services.match_count_service import MATCH_COUNTS, filter_key
 from services.match_service import MatchService
+from services.page_cache_service import LISTING_PAGES
+from utils.pagination import PageCursor
 from views.completed_matches_view import CompletedMatchesView
 
 logger = logging.getLogger(__name__)
@@ -24,37 +29,43 @@ class CompletedMatchesController(BaseController):
             self,
             environ: dict[str, Any],
             start_response: Callable[[str, list[tuple[str, str]]], None]
-    ) -> list[bytes]:
+    ) -> Iterable[bytes]:
         """
         Get a list of completed matches with pagination and filtering.
 
+        Rendered pages are served from LISTING_PAGES until a match of the listing is finished or reopened.
+        The filter is normalized first, so all spellings of a filter share their pages. Pages are read from
+        a replica, except right after a change, which the replicas may not show yet.
+
         :param environ: Dictionary with request environment variables (WSGI)
         :param start_response: Function to set HTTP status and headers
-        :return: Response as a list of bytes
+        :return: Response body, streamed in chunks while the page is rendered
         """
         query = parse_qs(environ.get("QUERY_STRING", ''))
         page = int(query.get('page', ['1'])[0])
-        player_name = query.get('filter_by_player_name', [None])[0]
+        player_name = filter_key(query.get('filter_by_player_name', [None])[0]) or None
+        token = query.get('cursor', [None])[0]
+        key = (player_name or '', page, token)
+        headers = [("Content-Type", "text/html; charset=utf-8")]
+
+        cached = LISTING_PAGES.get(key)
+        if cached is not None:
+            start_response("200 OK", headers)
+            return [cached]
+
         try:
-            with get_db() as db:
-                matches, total, correct_page = MatchService.get_completed_matches(
-                    db,
-                    page=page,
-                    per_page=PER_PAGE,
-                    player_name=player_name
-                )
-                logger.info(f"Loaded {len(matches)} matches for page {correct_page}")
-
-                context = {
-                    "matches": self._prepare_matches_data(matches),
-                    "current_page": correct_page,
-                    "total_pages": ceil(total / PER_PAGE),
-                    "player_name": player_name
-                }
-                response_body = self.view.render_completed_matches(context)
-                headers = [("Content-Type", "text/html; charset=utf-8")]
-                start_response("200 OK", headers)
-                return [response_body.encode("utf-8")]
+            generation = LISTING_PAGES.generation
+            session_factory = get_db if LISTING_PAGES.recently_invalidated() else get_read_db
+            with session_factory() as db:
+                if token:
+                    context = self._cursor_page_context(db, token, player_name)
+                else:
+                    context = self._numbered_page_context(db, page, player_name)
+                logger.info(f"Loaded {len(context['matches'])} matches for page {context['current_page'] or token}")
+
+            # The context holds plain data, so the page is rendered while it is sent, after the session is closed
+            start_response("200 OK", headers)
+            return LISTING_PAGES.caching(key, generation, self.view.stream_completed_matches(context))
 
         except DatabaseError as e:
             return self._handle_error(start_response, e)
@@ -63,6 +74,93 @@ class CompletedMatchesController(BaseController):
             logger.critical("Unexpected error while loading completed matches", exc_info=True)
             return self._handle_error(start_response, e)
 
+    def _numbered_page_context(self, db: Session, page: int, player_name: str | None) -> dict[str, Any]:
+        """
+        Loads a page selected by number.
+
+        The link to the page after the last numbered one uses a cursor, so deep pages are never read with OFFSET.
+        When the count is only a lower bound, the page after the counted ones is also linked by cursor.
+
+        :param db: Database session
+        :param page: Page number
+        :param player_name: Player name filter
+        :return: Template context
+        """
+        matches, total, correct_page = MatchService.get_completed_matches(
+            db,
+            page=page,
+            per_page=PER_PAGE,
+            player_name=player_name
+        )
+        total_pages = ceil(total.value / PER_PAGE)
+
+        next_url = prev_url = None
+        if matches and (correct_page < total_pages or not total.exact):
+            if correct_page < min(total_pages, MAX_OFFSET_PAGE):
+                next_url = self._page_url(player_name, page=correct_page + 1)
+            else:
+                next_url = self._page_url(player_name, cursor=PageCursor(matches[-1].id))
+        if correct_page > 1:
+            if correct_page - 1 <= MAX_OFFSET_PAGE or not matches:
+                prev_url = self._page_url(player_name, page=correct_page - 1)
+            else:
+                prev_url = self._page_url(player_name, cursor=PageCursor(matches[0].id, forward=False))
+
+        return {
+            "matches": self._prepare_matches_data(matches),
+            "current_page": correct_page,
+            "total_pages": total_pages,
+            "total": total,
+            "page_urls": self._page_urls(player_name, min(total_pages, MAX_OFFSET_PAGE)),
+            "next_url": next_url,
+            "prev_url": prev_url,
+            "player_name": player_name
+        }
+
+    def _cursor_page_context(self, db: Session, token: str, player_name: str | None) -> dict[str, Any]:
+        """
+        Loads a page selected by an opaque cursor. An invalid cursor selects the first page.
+
+        :param db: Database session
+        :param token: Cursor token from the query string
+        :param player_name: Player name filter
+        :return: Template context
+        """
+        try:
+            cursor: PageCursor | None = PageCursor.decode(token)
+        except ValueError:
+            logger.warning(f"Invalid page cursor: {token}")
+            cursor = None
+
+        matches, next_cursor, prev_cursor = MatchService.get_completed_matches_page(
+            db,
+            cursor,
+            per_page=PER_PAGE,
+            player_name=player_name
+        )
+        return {
+            "matches": self._prepare_matches_data(matches),
+            "current_page": None,
+            "total_pages": None,
+            "total": MATCH_COUNTS.count(db, player_name),
+            "page_urls": self._page_urls(player_name, MAX_OFFSET_PAGE),
+            "next_url": self._page_url(player_name, cursor=next_cursor) if next_cursor else None,
+            "prev_url": self._page_url(player_name, cursor=prev_cursor) if prev_cursor else None,
+            "player_name": player_name
+        }
+
+    def _page_urls(self, player_name: str | None, pages: int) -> list[tuple[int, str]]:
+        return [(page, self._page_url(player_name, page=page)) for page in range(1, pages + 1)] if pages > 1 else []
+
+    def _page_url(self, player_name: str | None, page: int | None = None, cursor: PageCursor | None = None) -> str:
+        params: dict[str, str | int] = {}
+        if cursor is not None:
+            params['cursor'] = cursor.encode()
+        elif page is not None:
+            params['page'] = page
+        params['filter_by_player_name'] = player_name or ''
+        return f"/matches?{urlencode(params)}"
+
     def _prepare_matches_data(self, matches: list[Match]) -> list[dict[str, str]]:
         """
         Convert raw match data into a format that is easy to display.
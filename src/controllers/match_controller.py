@@ -1,29 +1,30 @@
 """
 Controller module for managing matches: creating, displaying and updating results.
 """
-import json
 import logging
 from typing import Callable, Any
 from urllib.parse import parse_qs
 
-from sqlalchemy.orm import Session
-
 from controllers.base_controller import BaseController
-from database.session import get_db
+from database.session import get_db, get_read_db
 from exceptions import (
     NotFoundMatchError,
+    ConcurrentUpdateError,
+    DuplicatePlayerError,
     InvalidGameStateError,
     PlayerNumberError,
     InvalidScoreError,
-    DatabaseError,
-    PlayerNotFound
+    DatabaseError
 )
-from models.match import Match
-from services import score_utils
+from services import win_probability
+from services.match_rules import DEFAULT_FORMAT
 from services.match_service import MatchService
+from services.ongoing_match_service import OngoingMatchService, OngoingMatch, score_etag
 from services.player_service import PlayerService
+from services.score_state import ScoreState, GameState
 from services.validation import Validation
-from utils.request_utils import parse_form_data
+from utils.lock_stripes import LockStripes
+from utils.request_utils import parse_form_data, parse_request_data, etag_matches
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,9 @@ logger = logging.getLogger(__name__)
 class MatchController(BaseController):
     def __init__(self) -> None:
         super().__init__()
+        self.ongoing_matches = OngoingMatchService(get_db, get_read_db)
+        # Score updates of one match are serialized; matches on other stripes are scored in parallel
+        self.match_locks = LockStripes()
 
     def new_match_form(
             self,
@@ -65,33 +69,39 @@ class MatchController(BaseController):
 
             player1_name = params.get('player1', '').strip()
             player2_name = params.get('player2', '').strip()
+            match_format = params.get('match_format', DEFAULT_FORMAT)
             validation_errors = Validation.player_names(player1_name, player2_name)
+            validation_errors.update(Validation.match_format(match_format))
 
             if validation_errors:
                 response_body = self.view.render_new_match_form(
                     player1_name=player1_name,
                     player2_name=player2_name,
-                    errors=validation_errors
+                    errors=validation_errors,
+                    match_format=match_format
                 )
                 start_response('200 OK', [('Content-Type', 'text/html')])
                 return [response_body.encode('utf-8')]
 
             with get_db() as db:
-                player1_id = PlayerService.get_or_create_player_id(db, player1_name)
-                player2_id = PlayerService.get_or_create_player_id(db, player2_name)
-                new_match = MatchService.create_match(db, player1_id, player2_id)
-
-                db.add(new_match)
+                (player1_id, player1_name), (player2_id, player2_name) = PlayerService.get_or_create_players(
+                    db, (player1_name, player2_name)
+                )
+                new_match = MatchService.create_match(db, player1_id, player2_id, match_format)
+                # Read before the commit expires the match
+                ongoing_match = OngoingMatch.from_match(new_match, player1_name, player2_name)
                 db.commit()
-                db.refresh(new_match)
+            self.ongoing_matches.register(ongoing_match)
 
-                headers = [
-                    ('Location', f'/match-score?uuid={new_match.uuid}'),
-                    ('Content-Type', 'text/plain')
-                ]
-                start_response('302 Found', headers)
-                return [b'Redirecting...']
+            headers = [
+                ('Location', f'/match-score?uuid={ongoing_match.uuid}'),
+                ('Content-Type', 'text/plain')
+            ]
+            start_response('302 Found', headers)
+            return [b'Redirecting...']
 
+        except DuplicatePlayerError as e:
+            return self._handle_error(start_response, e, status='400 Bad Request')
         except DatabaseError as e:
             return self._handle_error(start_response, e)
         except Exception as e:
@@ -106,6 +116,13 @@ class MatchController(BaseController):
         """
         Displays the current score of the match or handles updates.
 
+        The updates of a match are serialized by the lock stripe of its UUID, from
+        loading the match to saving the points. The score page of a match that is not
+        in memory is read from a replica.
+
+        The score page carries an ETag; a conditional GET for an unchanged score is answered
+        with 304 Not Modified after reading only the score, without loading or rendering the match.
+
         :param environ: Dictionary with WSGI request data
         :param start_response: Function to set HTTP status and headers
         :return: Response as a list of bytes
@@ -114,22 +131,34 @@ class MatchController(BaseController):
         match_uuid = query.get('uuid', [''])[0]
 
         try:
-            with get_db() as db:
-                match = MatchService.get_match_by_uuid(db, match_uuid)
-
+            if environ['REQUEST_METHOD'] == 'POST':
+                # The request body is read before the lock is taken, so a slow client does not hold it
                 try:
-                    score = json.loads(match.score)
-                except json.JSONDecodeError:
-                    raise InvalidScoreError("Score data is corrupted")
-                if environ['REQUEST_METHOD'] == 'POST':
-                    return self._handle_score_update(environ, start_response, match, score, db)
-
-                return self._render_score_page(start_response, match, score, db)
+                    params = parse_request_data(environ)
+                except ValueError as e:
+                    logger.warning(f"Invalid request body for match {match_uuid}")
+                    return self._handle_error(start_response, e, match_uuid, status='400 Bad Request')
+
+                with self.match_locks.lock_for(match_uuid):
+                    match = self.ongoing_matches.get(match_uuid)
+                    return self._handle_score_update(params, start_response, match)
+
+            if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+            if if_none_match:
+                etag = self.ongoing_matches.current_etag(match_uuid)
+                if etag is not None and etag_matches(if_none_match, etag):
+                    start_response('304 Not Modified', [('ETag', etag), ('Cache-Control', 'no-cache')])
+                    return []
+
+            match = self.ongoing_matches.get(match_uuid, read_only=True)
+            # The tag is computed from the same score as the page, even if a point is scored meanwhile
+            state = match.state
+            return self._render_score_page(start_response, match, state, etag=score_etag(match.match_id, state))
 
         except NotFoundMatchError as e:
             logger.warning('Match not found')
             return self._handle_error(start_response, e, status='404 Not Found')
-        except InvalidScoreError as e:
+        except (InvalidScoreError, InvalidGameStateError) as e:
             return self._handle_error(start_response, e, status='400 Bad Request')
         except Exception as e:
             logger.critical("Unexpected error during match scoring", exc_info=True)
@@ -137,36 +166,37 @@ class MatchController(BaseController):
 
     def _handle_score_update(
             self,
-            environ: dict[str, Any],
+            params: dict[str, Any],
             start_response: Callable[[str, list[tuple[str, str]]], None],
-            match: Match,
-            score: dict[str, dict[str, int]],
-            db: Session
+            match: OngoingMatch
     ) -> list[bytes]:
         """
-        Handles updating the match score.
+        Handles updating the match score with a single point, a batch of points or an undo of the last point.
 
-        :param environ: Dictionary with WSGI request data
+        :param params: The parsed request body
         :param start_response: Function to set HTTP status and headers
-        :param match: Match object from the database
-        :param score: Current score as a dictionary
-        :param db: Database session
+        :param match: The ongoing match
         :return: Response as a list of bytes
         """
         try:
-            params = parse_form_data(environ)
+            if 'undo' in params:
+                state = self.ongoing_matches.undo_last_point(match)
+                return self._render_score_page(start_response, match, state)
 
-            player_num = MatchService.determine_player_number(params)
-            MatchService.add_point(db, match, score, player_num)
+            player_nums = MatchService.determine_player_numbers(params)
+            state = self.ongoing_matches.add_points(match, player_nums)
 
-            if score_utils.is_match_finished(score):
-                return self._render_final_score(start_response, match, db)
+            if state.game_state is GameState.FINISHED:
+                return self._render_final_score(start_response, match, state)
 
-            return self._render_score_page(start_response, match, score, db)
+            return self._render_score_page(start_response, match, state)
 
-        except (InvalidGameStateError, PlayerNumberError) as e:
+        except (InvalidGameStateError, PlayerNumberError, ValueError) as e:
             logger.warning(f"Invalid operation for match {match.uuid}")
             return self._handle_error(start_response, e, match.uuid, status='400 Bad Request')
+        except ConcurrentUpdateError as e:
+            logger.warning(f"Concurrent update of match {match.uuid}")
+            return self._handle_error(start_response, e, match.uuid, status='409 Conflict')
         except Exception as e:
             logger.critical('Unexpected error while updating match score', exc_info=True)
             return self._handle_error(start_response, e, match.uuid)
@@ -174,39 +204,38 @@ class MatchController(BaseController):
     def _render_score_page(
             self,
             start_response: Callable[[str, list[tuple[str, str]]], None],
-            match: Match,
-            score: dict[str, dict[str, int]],
-            db: Session
+            match: OngoingMatch,
+            state: ScoreState,
+            etag: str | None = None
     ) -> list[bytes]:
         """
         Generates a page with the current match score.
 
         :param start_response: Function for setting HTTP status and headers
-        :param match: Match object from the DB
-        :param score: Current score as a dictionary
+        :param match: The ongoing match
+        :param state: Current score of the match
+        :param etag: The entity tag of the page, for conditional requests (optional)
         :return: Response as a list of bytes
         """
         try:
             context = {
                 "uuid": match.uuid,
-                "player1": PlayerService.get_name(db, match.player1_id),
-                "player2": PlayerService.get_name(db, match.player2_id),
-                "player1_points": score["player1"]["points"],
-                "player1_games": score["player1"]["games"],
-                "player1_sets": score["player1"]["sets"],
-                "player2_points": score["player2"]["points"],
-                "player2_games": score["player2"]["games"],
-                "player2_sets": score["player2"]["sets"],
-                "finished": False,
-                "current_game_state": match.current_game_state
+                "player1": match.player1_name,
+                "player2": match.player2_name,
+                "score": state,
+                "player1_win_chance": win_probability.match_win_probability(
+                    state, match_format=match.match_format
+                ),
+                "finished": False
             }
 
             response_body = self.view.render_match_score(context)
             headers = [('Content-Type', 'text/html; charset=utf-8')]
+            if etag is not None:
+                # The browser revalidates the page on every refresh
+                headers += [('ETag', etag), ('Cache-Control', 'no-cache')]
             start_response('200 OK', headers)
             return [response_body.encode('utf-8')]  # Обязательное кодирование
-        except PlayerNotFound as e:
-            return self._handle_error(start_response, e, status='404 Not Found')
         except Exception as e:
             logger.critical('Unexpected error while rendering match score', exc_info=True)
             return self._handle_error(start_response, e)
@@ -214,31 +243,31 @@ class MatchController(BaseController):
     def _render_final_score(
             self,
             start_response: Callable[[str, list[tuple[str, str]]], None],
-            match: Match,
-            db: Session
+            match: OngoingMatch,
+            state: ScoreState
     ) -> list[bytes]:
         """
         Generates a page with the final result of the match.
 
         :param start_response: Function for setting the HTTP status and headers
-        :param match: Match object from the DB
+        :param match: The finished match
+        :param state: Final score of the match
         :return: Response as a list of bytes
         """
         try:
             context = {
-                "player1": PlayerService.get_name(db, match.player1_id),
-                "player2": PlayerService.get_name(db, match.player2_id),
-                "winner": PlayerService.get_name(db, match.winner_id),
-                "player1_sets": json.loads(match.score)["player1"]["sets"],
-                "player2_sets": json.loads(match.score)["player2"]["sets"],
+                "uuid": match.uuid,
+                "player1": match.player1_name,
+                "player2": match.player2_name,
+                "winner": match.player1_name if state.player1_sets > state.player2_sets else match.player2_name,
+                "player1_sets": state.player1_sets,
+                "player2_sets": state.player2_sets,
             }
             response_body = self.view.render_final_score(context)
             headers = [('Content-Type', 'text/html; charset=utf-8')]
             start_response('200 OK', headers)
             return [response_body.encode('utf-8')]
 
-        except PlayerNotFound as e:
-            return self._handle_error(start_response, e, status='404 Not Found')
         except Exception as e:
             logger.critical('Unexpected error while rendering final match score', exc_info=True)
             return self._handle_error(start_response, e)
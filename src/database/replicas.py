@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import Callable, Sequence
+
+from sqlalchemy import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from config.config import REPLICA_RETRY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaRouter:
+    """
+    Opens read-only sessions on read replicas.
+
+    The replicas are used in round-robin order. A replica that cannot be reached is
+    ejected for `retry_after` seconds and the next one is tried; when no replica is
+    healthy (or none is configured), the session is opened on the primary.
+
+    Replicas lag behind the primary, so a read that must see a write just made
+    (read-after-write) uses the primary session factory directly.
+
+    :param session_factory: The session factory of the primary, also used to create replica sessions.
+    :param replicas: The engines of the replicas.
+    :param retry_after: The number of seconds an unreachable replica is ejected for.
+    :param clock: The monotonic clock, in seconds.
+    """
+
+    def __init__(
+            self,
+            session_factory: sessionmaker[Session],
+            replicas: Sequence[Engine] = (),
+            retry_after: float = REPLICA_RETRY_SECONDS,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._session_factory = session_factory
+        self.replicas = tuple(replicas)
+        self.retry_after = retry_after
+        self._clock = clock
+        self._next = 0
+        self._ejected_until: dict[Engine, float] = {}
+        self._lock = threading.Lock()
+
+    def healthy(self) -> list[Engine]:
+        """
+        Returns the replicas not ejected, starting with the next one in round-robin order.
+        """
+        with self._lock:
+            now = self._clock()
+            start = self._next
+            self._next = (self._next + 1) % len(self.replicas) if self.replicas else 0
+            ordered = self.replicas[start:] + self.replicas[:start]
+            return [replica for replica in ordered if self._ejected_until.get(replica, 0) <= now]
+
+    def eject(self, replica: Engine) -> None:
+        """
+        Stops using a replica for `retry_after` seconds. Engines that are not replicas are ignored.
+
+        :param replica: The engine of the replica.
+        """
+        if replica not in self.replicas:
+            return
+        with self._lock:
+            self._ejected_until[replica] = self._clock() + self.retry_after
+        logger.warning(f"Replica {replica.url.host} ejected for {self.retry_after} seconds")
+
+    def connect(self) -> Session:
+        """
+        Opens a session on the next healthy replica, or on the primary if there is none.
+
+        :return: A session with its connection already checked out.
+        """
+        for replica in self.healthy():
+            db = self._session_factory(bind=replica)
+            try:
+                db.connection()
+                return db
+            except OperationalError:
+                db.close()
+                self.eject(replica)
+        return self._session_factory()
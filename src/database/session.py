@@ -2,11 +2,13 @@ import logging
 from contextlib import contextmanager
 from typing import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, Session
 
-from config.config import DATABASE_URI
+from config.config import DATABASE_URI, DATABASE_REPLICA_URIS
 from config.log_config import setup_logger
+from database.replicas import ReplicaRouter
 
 setup_logger()
 logger = logging.getLogger(__name__)
@@ -19,6 +21,12 @@ engine = create_engine(DATABASE_URI, echo=False)
 # Creating a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas; a connection is checked before use, so a replica that went down is detected
+replica_engines = [create_engine(uri, echo=False, pool_pre_ping=True) for uri in DATABASE_REPLICA_URIS]
+replicas = ReplicaRouter(SessionLocal, replica_engines)
+if replica_engines:
+    logger.info(f"Reading from {len(replica_engines)} database replicas")
+
 
 @contextmanager
 # Функция для получения сессии
@@ -39,3 +47,31 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
         logger.debug("Database session closed")
+
+
+@contextmanager
+def get_read_db() -> Generator[Session, None, None]:
+    """
+    Provides a read-only database session on a replica within a context manager.
+
+    Falls back to the primary when no replica is healthy. The data may lag behind
+    the primary, so the session must not be used to read a write just made.
+
+    :return: A SQLAlchemy Session object.
+    :raises Exception: If any error occurs during session handling.
+    """
+    db = replicas.connect()
+    logger.debug("Read-only database session created")
+    try:
+        yield db
+    except OperationalError as e:
+        logger.error("Read-only database session error: %s", str(e), exc_info=True)
+        if isinstance(db.bind, Engine):
+            replicas.eject(db.bind)
+        raise
+    except Exception as e:
+        logger.error("Read-only database session error: %s", str(e), exc_info=True)
+        raise
+    finally:
+        db.close()
+        logger.debug("Read-only database session closed")
@@ -11,6 +11,10 @@ class PlayerNumberError(Exception):
     """Raised when the request does not specify which player to add a point to."""
 
 
+class DuplicatePlayerError(Exception):
+    """Raised when both players of a match resolve to the same player."""
+
+
 class PlayerNotFound(Exception):
     """Raised when the player is not found in the database."""
 
@@ -24,3 +28,11 @@ class InvalidScoreError(Exception):
 
 class DatabaseError(Exception):
     """Raised when database operation failed"""
+
+
+class MatchFormatError(Exception):
+    """Raised when the match format is unknown."""
+
+
+class ConcurrentUpdateError(Exception):
+    """Raised when a match keeps being changed by another request while it is saved."""
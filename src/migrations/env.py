@@ -7,6 +7,7 @@ from sqlalchemy import pool
 from config.config import DATABASE_URI
 from models.base import Base
 from models.match import Match  # noqa
+from models.match_point import MatchPoint, MatchSnapshot  # noqa
 from models.player import Player  # noqa
 
 
@@ -0,0 +1,134 @@
+"""add match point log
+
+Revision ID: 3b9f1c2d4e5a
+Revises: 007951ed382f
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+import json
+import logging
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b9f1c2d4e5a"
+down_revision: Union[str, None] = "007951ed382f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Matches read per statement of the backfill
+BATCH_SIZE = 1000
+
+# Frozen copy of the packed form of services.score_state.ScoreState
+GAME_STATES = ("regular", "deuce", "advantage_1", "advantage_2", "tie_break", "finished")
+GAME_STATE_BITS = 3
+COUNTERS = (
+    ("player1", "points", 10), ("player2", "points", 10),
+    ("player1", "games", 5), ("player2", "games", 5),
+    ("player1", "sets", 3), ("player2", "sets", 3),
+)
+
+matches = sa.table(
+    "matches",
+    sa.column("id", sa.Integer),
+    sa.column("score", sa.JSON),
+    sa.column("current_game_state", sa.String),
+)
+
+
+def _pack_score(match_id: int, score: Any, game_state: str) -> int | None:
+    """
+    Packs the stored score of a match, or returns None if it is corrupted. The score was
+    written with json.dumps into a JSON column, so it is usually a JSON string inside the JSON value.
+    """
+    try:
+        while isinstance(score, str):
+            score = json.loads(score)
+        packed = 0
+        for player, counter, width in reversed(COUNTERS):
+            value = int(score[player][counter])
+            if not 0 <= value < 1 << width:
+                raise ValueError(f"{player} {counter} {value} does not fit into {width} bits")
+            packed = (packed << width) | value
+        return (packed << GAME_STATE_BITS) | GAME_STATES.index(game_state)
+    except (ValueError, TypeError, KeyError):
+        logger.warning(f"Match {match_id} has a corrupted score, its points logged before the upgrade cannot be undone")
+        return None
+
+
+def _snapshot_scores(snapshots: sa.Table) -> None:
+    """
+    Stores the score of every existing match as its snapshot at seq 0, so the points
+    logged after the upgrade are replayed from that score and not from 0-0.
+    """
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(matches.c.id, matches.c.score, matches.c.current_game_state)
+            .where(matches.c.id > last_id)
+            .order_by(matches.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        batch = []
+        for match_id, score, game_state in rows:
+            packed = _pack_score(match_id, score, game_state)
+            # A match at 0-0 is replayed from the initial score without a snapshot
+            if packed:
+                batch.append({"match_id": match_id, "seq": 0, "state": packed})
+        if batch:
+            connection.execute(snapshots.insert(), batch)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table(
+        "match_points",
+        sa.Column("match_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("winner", sa.SmallInteger(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["match_id"],
+            ["matches.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("match_id", "seq"),
+    )
+    snapshots = op.create_table(
+        "match_snapshots",
+        sa.Column("match_id", sa.Integer(), nullable=False),
+        sa.Column("seq", sa.Integer(), nullable=False),
+        sa.Column("state", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["match_id"],
+            ["matches.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("match_id", "seq"),
+    )
+    op.add_column(
+        "matches",
+        sa.Column("points_played", sa.Integer(), server_default="0", nullable=False),
+    )
+    # ### end Alembic commands ###
+    _snapshot_scores(snapshots)
+
+
+def downgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_column("matches", "points_played")
+    op.drop_table("match_snapshots")
+    op.drop_table("match_points")
+    # ### end Alembic commands ###
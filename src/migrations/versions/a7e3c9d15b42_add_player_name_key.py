@@ -0,0 +1,87 @@
+"""add player name key
+
+Revision ID: a7e3c9d15b42
+Revises: 5d2e8b6f1c37
+Create Date: 2026-10-18 14:02:51.774310
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7e3c9d15b42"
+down_revision: Union[str, None] = "5d2e8b6f1c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Players updated per statement of the backfill
+BATCH_SIZE = 1000
+
+players = sa.table(
+    "players",
+    sa.column("id", sa.Integer),
+    sa.column("name", sa.String),
+    sa.column("name_key", sa.String),
+)
+
+
+def _normalize_name(name: str) -> str:
+    # Frozen copy of models.player.normalize_name
+    return " ".join(name.split()).casefold()
+
+
+def _backfill_name_keys() -> None:
+    """
+    Fills name_key in batches ordered by id, so no statement touches the whole table.
+
+    Names that differ only in case or whitespace were allowed before; all but the
+    first of them get a key suffixed with their id, so the unique index can be built.
+    """
+    connection = op.get_bind()
+    update = (
+        players.update()
+        .where(players.c.id == sa.bindparam("player_id"))
+        .values(name_key=sa.bindparam("key"))
+    )
+    seen: set[str] = set()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(players.c.id, players.c.name)
+            .where(players.c.id > last_id)
+            .order_by(players.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        batch = []
+        for player_id, name in rows:
+            key = _normalize_name(name)
+            if key in seen:
+                logger.warning(f"Player {player_id} duplicates the name key {key!r}")
+                key = f"{key}#{player_id}"
+            seen.add(key)
+            batch.append({"player_id": player_id, "key": key})
+        connection.execute(update, batch)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column("players", sa.Column("name_key", sa.String(length=255), nullable=True))
+    _backfill_name_keys()
+    with op.batch_alter_table("players") as batch_op:
+        batch_op.alter_column("name_key", existing_type=sa.String(length=255), nullable=False)
+    op.create_index(op.f("ix_players_name_key"), "players", ["name_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_players_name_key"), table_name="players")
+    op.drop_column("players", "name_key")
@@ -0,0 +1,157 @@
+"""store the score in integer columns
+
+Revision ID: e1b7d4c93a26
+Revises: c4f8a2e61d09
+Create Date: 2026-10-18 16:05:42.903118
+
+"""
+
+import json
+import logging
+from typing import Any, Callable, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1b7d4c93a26"
+down_revision: Union[str, None] = "c4f8a2e61d09"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# Matches converted per statement
+BATCH_SIZE = 1000
+
+# Frozen copy of the values of services.score_state.GameState
+GAME_STATES = ("regular", "deuce", "advantage_1", "advantage_2", "tie_break", "finished")
+SCORE_COLUMNS = (
+    "player1_points", "player2_points", "player1_games", "player2_games", "player1_sets", "player2_sets"
+)
+
+game_state_enum = sa.Enum(*GAME_STATES, name="game_state")
+
+matches = sa.table(
+    "matches",
+    sa.column("id", sa.Integer),
+    sa.column("score", sa.JSON),
+    sa.column("current_game_state", sa.String),
+    *(sa.column(name, sa.SmallInteger) for name in SCORE_COLUMNS),
+)
+
+
+def _parse_score(match_id: int, score: Any) -> dict[str, int]:
+    """
+    Reads the counters of a stored score. The score was written with json.dumps into
+    a JSON column, so it is usually a JSON string inside the JSON value.
+    """
+    try:
+        while isinstance(score, str):
+            score = json.loads(score)
+        return {
+            f"{player}_{counter}": int(score[player][counter])
+            for player in ("player1", "player2")
+            for counter in ("points", "games", "sets")
+        }
+    except (ValueError, TypeError, KeyError):
+        logger.warning(f"Match {match_id} has a corrupted score, it is reset to 0")
+        return {name: 0 for name in SCORE_COLUMNS}
+
+
+def _batches(*columns: sa.ColumnElement[Any]) -> Any:
+    """
+    Yields the matches in batches ordered by id, so no statement touches the whole table.
+    """
+    connection = op.get_bind()
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(matches.c.id, *columns)
+            .where(matches.c.id > last_id)
+            .order_by(matches.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        yield rows
+        last_id = rows[-1].id
+
+
+def _run_type_ddl(ddl: Callable[..., None]) -> None:
+    """
+    Runs `create` or `drop` of the game state enum type, which SQLAlchemy leaves untyped.
+    Databases without named enum types skip it.
+    """
+    ddl(op.get_bind(), checkfirst=True)
+
+
+def _convert_scores() -> None:
+    update = (
+        matches.update()
+        .where(matches.c.id == sa.bindparam("match_id"))
+        .values({name: sa.bindparam(f"new_{name}") for name in (*SCORE_COLUMNS, "current_game_state")})
+    )
+    for rows in _batches(matches.c.score, matches.c.current_game_state):
+        batch = []
+        for match_id, score, game_state in rows:
+            values = _parse_score(match_id, score)
+            if game_state not in GAME_STATES:
+                logger.warning(f"Match {match_id} has an unknown game state {game_state!r}, it is reset to regular")
+                game_state = "regular"
+            batch.append(
+                {"match_id": match_id, "new_current_game_state": game_state}
+                | {f"new_{name}": value for name, value in values.items()}
+            )
+        op.get_bind().execute(update, batch)
+
+
+def _restore_json_scores() -> None:
+    update = matches.update().where(matches.c.id == sa.bindparam("match_id")).values(score=sa.bindparam("new_score"))
+    for rows in _batches(*(matches.c[name] for name in SCORE_COLUMNS)):
+        batch = []
+        for match_id, *values in rows:
+            counters = dict(zip(SCORE_COLUMNS, values))
+            score = {
+                player: {counter: counters[f"{player}_{counter}"] for counter in ("sets", "games", "points")}
+                for player in ("player1", "player2")
+            }
+            batch.append({"match_id": match_id, "new_score": json.dumps(score)})
+        op.get_bind().execute(update, batch)
+
+
+def upgrade() -> None:
+    for name in SCORE_COLUMNS:
+        op.add_column("matches", sa.Column(name, sa.SmallInteger(), server_default="0", nullable=False))
+    _convert_scores()
+
+    _run_type_ddl(game_state_enum.create)
+    with op.batch_alter_table("matches") as batch_op:
+        batch_op.alter_column(
+            "current_game_state",
+            existing_type=sa.String(length=26),
+            type_=game_state_enum,
+            nullable=False,
+            server_default="regular",
+            postgresql_using="current_game_state::game_state",
+        )
+        batch_op.drop_column("score")
+
+
+def downgrade() -> None:
+    op.add_column("matches", sa.Column("score", sa.JSON(), nullable=True))
+    _restore_json_scores()
+
+    with op.batch_alter_table("matches") as batch_op:
+        batch_op.alter_column("score", existing_type=sa.JSON(), nullable=False)
+        batch_op.alter_column(
+            "current_game_state",
+            existing_type=game_state_enum,
+            type_=sa.String(length=26),
+            nullable=True,
+            server_default=None,
+        )
+        for name in SCORE_COLUMNS:
+            batch_op.drop_column(name)
+    _run_type_ddl(game_state_enum.drop)
@@ -1,10 +1,13 @@
-import json
-
-from sqlalchemy import String, ForeignKey, event, JSON, Connection
+from sqlalchemy import String, ForeignKey, event, Connection, LargeBinary, SmallInteger, Enum
 from sqlalchemy.orm import relationship, Mapped, mapped_column, Mapper
 
 from models.base import Base
 from models.player import Player
+from services.score_state import ScoreState, GameState
+
+
+def _score_column() -> Mapped[int]:
+    return mapped_column(SmallInteger, nullable=False, default=0, server_default='0')
 
 
 class Match(Base):
@@ -13,36 +16,72 @@ class Match(Base):
 
     This class defines the structure of the 'matches' table in the database.
     It stores information about the match, including the players involved,
-    the winner, the score, and the current game state.
+    the winner, the score, the current game state, the match format and the length of its point log.
+    The score is kept in one small integer column per counter, read and written as a
+    `ScoreState` through the `score` property.
+
+    `version` is checked by every UPDATE of a match (compare-and-swap), so a concurrent
+    update raises `StaleDataError` instead of being overwritten. It is incremented by
+    `MatchService`, not by SQLAlchemy, so the new version is known without reloading the row.
     """
     __tablename__ = 'matches'
     uuid: Mapped[str] = mapped_column(String(36), nullable=False, unique=True)
-    player1_id: Mapped[int] = mapped_column(ForeignKey('players.id'), nullable=False)
-    player2_id: Mapped[int] = mapped_column(ForeignKey('players.id'), nullable=False)
-    winner_id: Mapped[int] = mapped_column(ForeignKey('players.id'), nullable=True)
-    score: Mapped[str] = mapped_column(JSON, nullable=False)
-    current_game_state: Mapped[str] = mapped_column(String(26), default='regular')
+    player1_id: Mapped[int] = mapped_column(ForeignKey('players.id'), nullable=False, index=True)
+    player2_id: Mapped[int] = mapped_column(ForeignKey('players.id'), nullable=False, index=True)
+    winner_id: Mapped[int | None] = mapped_column(ForeignKey('players.id'), nullable=True)
+    player1_points: Mapped[int] = _score_column()
+    player2_points: Mapped[int] = _score_column()
+    player1_games: Mapped[int] = _score_column()
+    player2_games: Mapped[int] = _score_column()
+    player1_sets: Mapped[int] = _score_column()
+    player2_sets: Mapped[int] = _score_column()
+    current_game_state: Mapped[GameState] = mapped_column(
+        Enum(GameState, name='game_state', values_callable=lambda states: [state.value for state in states]),
+        nullable=False,
+        default=GameState.REGULAR,
+        server_default=GameState.REGULAR.value
+    )
+    # Name of the scoring rules, see services.match_rules
+    match_format: Mapped[str] = mapped_column(String(20), default='standard', server_default='standard')
+    points_played: Mapped[int] = mapped_column(default=0, server_default='0')
+    version: Mapped[int] = mapped_column(nullable=False, default=0, server_default='0')
+    # Bit-packed point sequence of a finished match, see services.point_history_codec
+    point_history: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
 
     player1: Mapped[Player] = relationship(foreign_keys=[player1_id], back_populates="matches_as_player1")
     player2: Mapped[Player] = relationship(foreign_keys=[player2_id], back_populates="matches_as_player2")
     winner: Mapped[Player] = relationship(foreign_keys=[winner_id], back_populates="matches_as_winner")
 
+    __mapper_args__ = {'version_id_col': version, 'version_id_generator': False}
 
-# Event handler
-@event.listens_for(Match, 'before_insert')
-def set_default_score(mapper: Mapper[Match], connection: Connection, target: Match) -> None:
-    """
-    Sets a default score for a match if no score is provided during insertion.
+    @property
+    def score(self) -> ScoreState:
+        """
+        The current score of the match.
 
-    :param mapper: The mapper object.
-    :param connection: The database connection.
-    :param target: The instance of the Match class being inserted.
-    """
-    if not target.score:
-        target.score = json.dumps({"player1": {"sets": 0, "games": 0, "points": 0},
-                                   "player2": {"sets": 0, "games": 0, "points": 0}}, ensure_ascii=False)
+        A match that was not flushed yet has the initial score.
+        """
+        return ScoreState(
+            self.player1_points or 0,
+            self.player2_points or 0,
+            self.player1_games or 0,
+            self.player2_games or 0,
+            self.player1_sets or 0,
+            self.player2_sets or 0,
+            GameState(self.current_game_state or GameState.REGULAR)
+        )
+
+    @score.setter
+    def score(self, state: ScoreState) -> None:
+        (
+            self.player1_points, self.player2_points,
+            self.player1_games, self.player2_games,
+            self.player1_sets, self.player2_sets,
+            self.current_game_state
+        ) = state
 
 
+# Event handler
 @event.listens_for(Match, 'before_insert')
 def validate_uuid(mapper: Mapper[Match], connection: Connection, target: Match) -> None:
     """
@@ -0,0 +1,34 @@
+from sqlalchemy import ForeignKey, SmallInteger, UniqueConstraint, BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from models.base import Base
+
+
+class MatchPoint(Base):
+    """
+    Represents one point of a match in the append-only point log.
+
+    This class defines the structure of the 'match_points' table in the database.
+    Each row stores the sequence number of the point within its match and which
+    player won it.
+    """
+    __tablename__ = 'match_points'
+    __table_args__ = (UniqueConstraint('match_id', 'seq'),)
+    match_id: Mapped[int] = mapped_column(ForeignKey('matches.id'), nullable=False)
+    seq: Mapped[int] = mapped_column(nullable=False)
+    winner: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+
+
+class MatchSnapshot(Base):
+    """
+    Represents the score of a match after a given number of points.
+
+    This class defines the structure of the 'match_snapshots' table in the database.
+    Snapshots are written periodically, so the score at any point index can be
+    rebuilt by replaying the log from the nearest snapshot.
+    """
+    __tablename__ = 'match_snapshots'
+    __table_args__ = (UniqueConstraint('match_id', 'seq'),)
+    match_id: Mapped[int] = mapped_column(ForeignKey('matches.id'), nullable=False)
+    seq: Mapped[int] = mapped_column(nullable=False)
+    state: Mapped[int] = mapped_column(BigInteger, nullable=False)
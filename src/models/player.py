@@ -1,7 +1,7 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String
-from sqlalchemy.orm import relationship, Mapped, mapped_column
+from sqlalchemy import String, event, Connection, ForeignKey, UniqueConstraint, insert
+from sqlalchemy.orm import relationship, Mapped, mapped_column, Mapper
 
 from models.base import Base
 
@@ -14,12 +14,80 @@ class Player(Base):
     Represents a player in the game.
 
     This class defines the structure of the 'players' table in the database.
-    It stores information about each player, including their name.
+    It stores information about each player, including their name and the
+    normalized name used for case-insensitive lookups.
     """
     __tablename__ = 'players'
     name: Mapped[str] = mapped_column(String(255), nullable=False, index=True, unique=True)
+    name_key: Mapped[str] = mapped_column(String(255), nullable=False, index=True, unique=True)
 
     # Relationships with the Matches table
     matches_as_player1: Mapped['Match'] = relationship(foreign_keys="Match.player1_id", back_populates="player1")
     matches_as_player2: Mapped['Match'] = relationship(foreign_keys="Match.player2_id", back_populates="player2")
     matches_as_winner: Mapped['Match'] = relationship(foreign_keys="Match.winner_id", back_populates="winner")
+
+
+class PlayerNameTrigram(Base):
+    """
+    Represents one trigram of the normalized name of a player.
+
+    This class defines the structure of the 'player_name_trigrams' table in the
+    database. It is the search index of the player name filter: a name contains a
+    string only if it has every trigram of it (see `name_trigrams`).
+    """
+    __tablename__ = 'player_name_trigrams'
+    __table_args__ = (UniqueConstraint('trigram', 'player_id'),)
+    trigram: Mapped[str] = mapped_column(String(3), nullable=False)
+    player_id: Mapped[int] = mapped_column(ForeignKey('players.id', ondelete='CASCADE'), nullable=False, index=True)
+
+
+def normalize_name(name: str) -> str:
+    """
+    Returns the lookup key of a player name: case-folded, with runs of whitespace collapsed to one space.
+
+    :param name: The name of the player.
+    :return: The normalized name.
+    """
+    return ' '.join(name.split()).casefold()
+
+
+def name_trigrams(name_key: str) -> set[str]:
+    """
+    Returns the trigrams indexed for a normalized name.
+
+    The name is padded with two spaces, so every character starts a trigram and a
+    string of one or two characters is found by the trigrams it prefixes.
+
+    :param name_key: The normalized name of the player.
+    :return: The trigrams.
+    """
+    padded = name_key + '  '
+    return {padded[i:i + 3] for i in range(len(name_key))}
+
+
+# Event handler
+@event.listens_for(Player, 'before_insert')
+def set_name_key(mapper: Mapper[Player], connection: Connection, target: Player) -> None:
+    """
+    Sets the lookup key of a player from its name if it is not set.
+
+    :param mapper: The mapper object.
+    :param connection: The database connection.
+    :param target: The instance of the Player class being inserted.
+    """
+    if not target.name_key:
+        target.name_key = normalize_name(target.name)
+
+
+@event.listens_for(Player, 'after_insert')
+def index_name(mapper: Mapper[Player], connection: Connection, target: Player) -> None:
+    """
+    Adds the trigrams of the name of a new player to the search index.
+
+    :param mapper: The mapper object.
+    :param connection: The database connection.
+    :param target: The instance of the Player class that was inserted.
+    """
+    rows = [{"trigram": trigram, "player_id": target.id} for trigram in name_trigrams(target.name_key)]
+    if rows:
+        connection.execute(insert(PlayerNameTrigram), rows)
@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+from sqlalchemy import ColumnElement, func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config.config import (
+    MATCH_COUNT_CACHE_SIZE,
+    MATCH_COUNT_TTL_SECONDS,
+    MATCH_COUNT_EXACT_LIMIT,
+    REPLICA_LAG_SECONDS
+)
+from exceptions import DatabaseError
+from models.match import Match
+from models.player import normalize_name
+from services.player_service import PlayerService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MatchCount:
+    """
+    Number of completed matches matching a filter.
+
+    :param value: The number of matches.
+    :param exact: False if there are more matches than the number ("more than N results").
+    """
+    value: int
+    exact: bool = True
+
+
+def filter_key(player_name: str | None) -> str:
+    """
+    Returns the key of a player filter in the caches: the normalized filter (see `normalize_name`), '' for none.
+
+    :param player_name: The part of a player name to filter by (optional).
+    :return: The key.
+    """
+    return normalize_name(player_name) if player_name else ''
+
+
+def filter_selects(key: str, name_keys: Sequence[str]) -> bool:
+    """
+    Returns whether a filter selects the matches of the given players.
+
+    :param key: The key of the filter (see `filter_key`).
+    :param name_keys: The normalized names of the players of a match.
+    :return: True for the unfiltered listing and the filters contained in one of the names.
+    """
+    return not key or any(key in name_key for name_key in name_keys)
+
+
+def completed_matches_criteria(player_name: str | None) -> list[ColumnElement[bool]]:
+    """
+    Returns the conditions selecting the completed matches, optionally of a player.
+
+    The filter matches the normalized names of the players (see `normalize_name`),
+    so it is case-insensitive and the counts can be updated without a query. The
+    players are looked up in the name search index and the matches by the indexed player columns.
+
+    :param player_name: The part of a player name to filter by (optional).
+    :return: The conditions.
+    """
+    criteria: list[ColumnElement[bool]] = [Match.winner_id.isnot(None)]
+    key = filter_key(player_name)
+    if key:
+        player_ids = PlayerService.matching_ids(key)
+        criteria.append(or_(Match.player1_id.in_(player_ids), Match.player2_id.in_(player_ids)))
+    return criteria
+
+
+class MatchCountService:
+    """
+    Counts completed matches, overall and by player filter, and caches the counts.
+
+    The counts are updated in place when a match is finished or reopened (see
+    `match_finished`), so the listing does not run COUNT(*) on every request.
+    Filtered counts are kept for the `max_filters` most recently used filters, and
+    every count is recomputed after `ttl` seconds, which corrects the changes made
+    by other processes. A filter matching more than `exact_limit` matches is not
+    counted further: its count is "more than `exact_limit`".
+
+    A count read from a replica in the `replica_lag` seconds after an update may miss
+    it, so the counts computed then are not cached; the listing reads from the primary
+    during that time (see `PageCacheService.recently_invalidated`).
+
+    :param max_filters: The maximum number of filtered counts kept.
+    :param ttl: The number of seconds after which a count is recomputed.
+    :param exact_limit: The number of matches above which a filtered count is not exact.
+    :param replica_lag: The number of seconds a change may take to reach the replicas.
+    :param clock: The monotonic clock, in seconds.
+    """
+
+    def __init__(
+            self,
+            max_filters: int = MATCH_COUNT_CACHE_SIZE,
+            ttl: float = MATCH_COUNT_TTL_SECONDS,
+            exact_limit: int = MATCH_COUNT_EXACT_LIMIT,
+            replica_lag: float = REPLICA_LAG_SECONDS,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_filters = max_filters
+        self.ttl = ttl
+        self.exact_limit = exact_limit
+        self.replica_lag = replica_lag
+        self._clock = clock
+        # Normalized filter -> (count, time it was computed); '' is the overall count
+        self._counts: OrderedDict[str, tuple[MatchCount, float]] = OrderedDict()
+        # Incremented by every update, so a count computed concurrently with an update is not cached
+        self._generation = 0
+        self._adjusted_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def count(self, db: Session, player_name: str | None = None) -> MatchCount:
+        """
+        Returns the number of completed matches, optionally of a player.
+
+        :param db: The SQLAlchemy session.
+        :param player_name: The part of a player name to filter by (optional).
+        :return: The count.
+        :raises DatabaseError: If a database error occurs during counting.
+        """
+        key = filter_key(player_name)
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is not None and self._clock() - cached[1] < self.ttl:
+                self._counts.move_to_end(key)
+                return cached[0]
+            generation = self._generation
+
+        try:
+            result = self._count_overall(db) if not key else self._count_filtered(db, key)
+        except SQLAlchemyError as e:
+            logger.error("Database error during counting completed matches", exc_info=True)
+            raise DatabaseError("Failed to count completed matches") from e
+
+        with self._lock:
+            now = self._clock()
+            if generation == self._generation and now - self._adjusted_at >= self.replica_lag:
+                self._counts[key] = (result, now)
+                self._counts.move_to_end(key)
+                # The overall count is the oldest entry only when no filter was used since
+                while len(self._counts) > self.max_filters + 1:
+                    oldest = next(name for name in self._counts if name)
+                    del self._counts[oldest]
+        return result
+
+    def match_finished(self, name_keys: Sequence[str]) -> None:
+        """
+        Counts a match that was just finished in the cached counts.
+
+        :param name_keys: The normalized names of the players of the match.
+        """
+        self._adjust(name_keys, 1)
+
+    def match_reopened(self, name_keys: Sequence[str]) -> None:
+        """
+        Removes a finished match that was just reopened from the cached counts.
+
+        :param name_keys: The normalized names of the players of the match.
+        """
+        self._adjust(name_keys, -1)
+
+    def clear(self) -> None:
+        """
+        Drops all cached counts.
+        """
+        with self._lock:
+            self._counts.clear()
+            self._generation += 1
+            self._adjusted_at = float('-inf')
+
+    def _adjust(self, name_keys: Sequence[str], delta: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._adjusted_at = self._clock()
+            for key, (count, computed_at) in self._counts.items():
+                if filter_selects(key, name_keys):
+                    self._counts[key] = (MatchCount(max(0, count.value + delta), count.exact), computed_at)
+
+    def _count_overall(self, db: Session) -> MatchCount:
+        total = db.scalar(select(func.count(Match.id)).where(*completed_matches_criteria(None)))
+        return MatchCount(total or 0)
+
+    def _count_filtered(self, db: Session, key: str) -> MatchCount:
+        """
+        Counts the matches of a filter, reading no more than `exact_limit` + 1 of them.
+        """
+        matching = (
+            select(Match.id)
+            .where(*completed_matches_criteria(key))
+            .limit(self.exact_limit + 1)
+            .subquery()
+        )
+        total = db.scalar(select(func.count()).select_from(matching)) or 0
+        if total > self.exact_limit:
+            return MatchCount(self.exact_limit, exact=False)
+        return MatchCount(total)
+
+
+MATCH_COUNTS = MatchCountService()
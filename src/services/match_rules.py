@@ -0,0 +1,104 @@
+"""
+Match formats.
+
+A format is a named set of scoring rules. The reference strategies read the
+rules of a match, and the scoring engine compiles one transition table per
+format, so the per-point code never looks at them.
+"""
+from dataclasses import dataclass
+
+from config.config import MIN_SETS, MIN_GAMES, MIN_TIE_BREAK_POINTS
+from exceptions import MatchFormatError
+
+DEFAULT_FORMAT = 'standard'
+MATCH_TIE_BREAK_POINTS = 10
+
+
+@dataclass(frozen=True)
+class MatchRules:
+    """
+    Scoring rules of a match format.
+
+    :param name: The name of the format stored in `Match.match_format`.
+    :param title: The human-readable name of the format.
+    :param sets_to_win: The number of sets needed to win the match.
+    :param games_per_set: The number of games needed to win a set; the tie-break is played at this score.
+    :param tie_break_points: The number of points needed to win a tie-break.
+    :param no_ad: Whether the point played at deuce decides the game.
+    :param match_tie_break_points: The number of points of the tie-break played instead of the deciding set,
+                                   or None to play the deciding set.
+    """
+    name: str
+    title: str
+    sets_to_win: int = MIN_SETS
+    games_per_set: int = MIN_GAMES
+    tie_break_points: int = MIN_TIE_BREAK_POINTS
+    no_ad: bool = False
+    match_tie_break_points: int | None = None
+
+    def is_match_tie_break(self, player1_sets: int, player2_sets: int) -> bool:
+        """
+        Checks if the deciding set at this set score is replaced by a match tie-break.
+
+        :param player1_sets: The sets of player 1.
+        :param player2_sets: The sets of player 2.
+        :return: True if a match tie-break is played, False otherwise.
+        """
+        return (
+                self.match_tie_break_points is not None and
+                player1_sets == player2_sets == self.sets_to_win - 1
+        )
+
+    def tie_break_target(self, player1_sets: int, player2_sets: int) -> int:
+        """
+        Returns the number of points needed to win the tie-break played at this set score.
+
+        :param player1_sets: The sets of player 1.
+        :param player2_sets: The sets of player 2.
+        :return: The number of points.
+        """
+        if self.match_tie_break_points is not None and self.is_match_tie_break(player1_sets, player2_sets):
+            return self.match_tie_break_points
+        return self.tie_break_points
+
+    def __hash__(self) -> int:
+        # The rules are memoization keys of the win probability DP; the name identifies them
+        return hash(self.name)
+
+
+STANDARD_RULES = MatchRules(DEFAULT_FORMAT, 'Best of 3 sets')
+
+MATCH_FORMATS: dict[str, MatchRules] = {
+    rules.name: rules
+    for rules in (
+        STANDARD_RULES,
+        MatchRules('best_of_5', 'Best of 5 sets', sets_to_win=3),
+        MatchRules('no_ad', 'Best of 3 sets, no-ad', no_ad=True),
+        MatchRules(
+            'match_tie_break',
+            'Best of 3 sets, match tie-break instead of the third set',
+            match_tie_break_points=MATCH_TIE_BREAK_POINTS
+        ),
+        MatchRules('short_sets', 'Best of 3 short sets to 4 games', games_per_set=4),
+        MatchRules(
+            'doubles',
+            'Doubles: no-ad, match tie-break instead of the third set',
+            no_ad=True,
+            match_tie_break_points=MATCH_TIE_BREAK_POINTS
+        ),
+    )
+}
+
+
+def get_rules(match_format: str) -> MatchRules:
+    """
+    Returns the rules of a match format.
+
+    :param match_format: The name of the format.
+    :return: The rules of the format.
+    :raises MatchFormatError: If the format is unknown.
+    """
+    try:
+        return MATCH_FORMATS[match_format]
+    except KeyError:
+        raise MatchFormatError(f"Unknown match format: {match_format}") from None
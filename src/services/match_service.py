@@ -1,31 +1,26 @@
-import json
 import logging
 import uuid
-from typing import Any
+from typing import Any, Sequence
 
-from sqlalchemy import or_
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, Query
+from sqlalchemy.orm.exc import StaleDataError
 
-from config.config import PER_PAGE
-from exceptions import InvalidGameStateError, NotFoundMatchError, PlayerNumberError, DatabaseError
+from config.config import PER_PAGE, MAX_POINTS_PER_REQUEST, MAX_UPDATE_RETRIES
+from exceptions import NotFoundMatchError, PlayerNumberError, DatabaseError, ConcurrentUpdateError
 from models.match import Match
 from models.player import Player
-from services import score_utils
-from services.score_utils import ScoreDict
-from services.strategies.advantage_state_strategy import AdvantageStateStrategy
-from services.strategies.deuce_state_strategy import DeuceStateStrategy
-from services.strategies.regular_state_strategy import RegularStateStrategy
-from services.strategies.tie_break_state_strategy import TieBreakStateStrategy
+from services.match_count_service import MATCH_COUNTS, MatchCount, completed_matches_criteria
+from services.page_cache_service import LISTING_PAGES
+from services.point_log_service import PointLogService
+from services.score_state import ScoreState, GameState
+from services.match_rules import DEFAULT_FORMAT, get_rules
+from services.scoring_engine import get_engine
 from services.validation import Validation, MIN_PAGE
+from utils.pagination import PageCursor
 
 logger = logging.getLogger(__name__)
-STATE_STRATEGY = {
-    'regular': RegularStateStrategy(),
-    'deuce': DeuceStateStrategy(),
-    'tie_break': TieBreakStateStrategy(),
-    'advantage': AdvantageStateStrategy(),
-}
 
 
 class MatchService:
@@ -36,25 +31,37 @@ class MatchService:
     """
 
     @staticmethod
-    def create_match(db: Session, player1_id: int, player2_id: int) -> Match:
+    def create_match(
+            db: Session,
+            player1_id: int,
+            player2_id: int,
+            match_format: str = DEFAULT_FORMAT
+    ) -> Match:
         """
-        Creates a new match in the database.
+        Creates a new match in the database. The caller commits.
+
+        The match is flushed, so its ID and default score are set without reloading it.
 
         :param db: The SQLAlchemy session.
         :param player1_id: The ID of the first player.
         :param player2_id: The ID of the second player.
+        :param match_format: The name of the format of the match.
         :return: The newly created Match object.
+        :raises MatchFormatError: If the format is unknown.
         :raises DatabaseError: If a database error occurs during match creation.
         """
+        get_rules(match_format)
         try:
             new_match = Match(
                 uuid=str(uuid.uuid4()),
                 player1_id=player1_id,
-                player2_id=player2_id
+                player2_id=player2_id,
+                match_format=match_format,
+                current_game_state=GameState.REGULAR,
+                points_played=0
             )
             db.add(new_match)
-            db.commit()
-            db.refresh(new_match)
+            db.flush()
             logger.info(f"Match created successfully with UUID: {new_match.uuid}")
             return new_match
         except SQLAlchemyError as e:
@@ -62,47 +69,218 @@ class MatchService:
             raise DatabaseError("Failed to create match") from e
 
     @staticmethod
-    def add_point(db: Session, match: Match, score: ScoreDict, player_num: int) -> None:
+    def add_point(db: Session, match: Match, state: ScoreState, player_num: int) -> ScoreState:
         """
         Adds a point to the specified player's score and updates the game state.
 
         :param db: The SQLAlchemy session.
         :param match: The Match object representing the current match.
-        :param score: A dictionary representing the current score of the match.
+        :param state: The current score of the match.
         :param player_num: The player number (1 or 2).
+        :return: The new score of the match.
         :raises InvalidGameStateError: If the game state is unknown.
+        :raises ConcurrentUpdateError: If the match keeps being changed concurrently.
         """
-        player_key = f"player{player_num}"
-        opponent_key = "player2" if player_num == 1 else "player1"
+        return MatchService.apply_points(db, match, state, (player_num,))[0]
 
-        if match.current_game_state.startswith('advantage'):
-            strategy = STATE_STRATEGY['advantage']
-        else:
-            strategy = STATE_STRATEGY.get(match.current_game_state)
-
-        if strategy:
-            strategy.add_point(
-                match,
-                score,
-                player_key,
-                opponent_key,
-                player_num
-            )
-        else:
-            raise InvalidGameStateError(f"Unknown game state: {match.current_game_state}")
+    @staticmethod
+    def add_points(db: Session, match: Match, state: ScoreState, player_nums: Sequence[int]) -> ScoreState:
+        """
+        Adds a sequence of points in memory and persists the resulting score once.
+
+        Nothing is written if any of the points is invalid, for example a point
+        played after the match is already finished.
 
-        if score_utils.is_set_finished(score, player_key, opponent_key):
-            score_utils.reset_set(match, score, player_key)
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :param state: The current score of the match.
+        :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+        :return: The new score of the match.
+        :raises InvalidGameStateError: If a point is added to a finished match.
+        :raises PlayerNumberError: If a player number is not 1 or 2.
+        :raises ConcurrentUpdateError: If the match keeps being changed concurrently.
+        """
+        return MatchService.apply_points(db, match, state, player_nums)[0]
+
+    @staticmethod
+    def apply_points(
+            db: Session,
+            match: Match,
+            state: ScoreState,
+            player_nums: Sequence[int]
+    ) -> tuple[ScoreState, int]:
+        """
+        Scores points and saves them with a compare-and-swap on the version of the match.
+
+        If another request changed the match since it was loaded, the match is
+        reloaded and the points are scored again on its new score, up to
+        MAX_UPDATE_RETRIES times. The common path takes no lock.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :param state: The score of the match at its loaded version.
+        :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+        :return: The new score and the new version of the match.
+        :raises InvalidGameStateError: If a point is added to a finished match.
+        :raises PlayerNumberError: If a player number is not 1 or 2.
+        :raises ConcurrentUpdateError: If the match is still changed concurrently after the retries.
+        """
+        engine = get_engine(match.match_format)
+        # Read before the commit, which expires the match: reading it after would reload the row
+        match_uuid = match.uuid
+        for attempt in range(MAX_UPDATE_RETRIES + 1):
+            states = []
+            for player_num in player_nums:
+                state, _ = engine.play(state, player_num)
+                states.append(state)
+            try:
+                version = MatchService.save_points(db, match, player_nums, states)
+                logger.debug(f"Added {len(player_nums)} points to match {match_uuid}")
+                return state, version
+            except StaleDataError:
+                db.rollback()
+                logger.info(f"Match {match_uuid} was changed concurrently, retrying (attempt {attempt + 1})")
+                db.refresh(match)
+                state = match.score
+        raise ConcurrentUpdateError(f"Match {match_uuid} keeps being changed by other requests")
+
+    @staticmethod
+    def save_points(db: Session, match: Match, player_nums: Sequence[int], states: Sequence[ScoreState]) -> int:
+        """
+        Persists points that were already scored: appends them to the point log and saves the last score.
+
+        The match row is updated first, with a compare-and-swap on its version, so
+        a concurrent update is detected before anything is added to the log.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+        :param states: The score of the match after each of the points.
+        :return: The new version of the match.
+        :raises StaleDataError: If the match was changed since it was loaded; the caller rolls back.
+        """
+        return MatchService.save_points_batch(db, [(match, player_nums, states)])[0]
+
+    @staticmethod
+    def save_points_batch(
+            db: Session,
+            updates: Sequence[tuple[Match, Sequence[int], Sequence[ScoreState]]]
+    ) -> list[int]:
+        """
+        Persists the points of several matches, like `save_points`, in a single transaction.
+
+        :param db: The SQLAlchemy session.
+        :param updates: The Match object, the player numbers of the point winners and the score after each point,
+                        for every match.
+        :return: The new version of every match.
+        :raises StaleDataError: If a match was changed since it was loaded; the caller rolls back.
+        """
+        first_seqs = []
+        count_changes = []
+        for match, player_nums, states in updates:
+            first_seqs.append(match.points_played)
+            match.points_played += len(player_nums)
+            count_changes.append(MatchService._apply_score(db, match, states[-1]))
+        # UPDATE matches ... WHERE id = ? AND version = ?
+        db.flush()
+
+        versions = []
+        for (match, player_nums, states), first_seq in zip(updates, first_seqs):
+            PointLogService.record(db, match, player_nums, states, first_seq)
+            versions.append(match.version)
+        db.commit()
+        for count_change in count_changes:
+            MatchService._update_counts(count_change)
+        return versions
 
-        if score_utils.is_match_finished(score):
-            if player_num == 1:
+    @staticmethod
+    def undo_last_point(db: Session, match: Match) -> ScoreState:
+        """
+        Reverts the last point of a match using its point log.
+
+        The previous score is rebuilt from the nearest snapshot, so the cost does
+        not depend on the length of the match. Undoing the last point of a
+        finished match restores its archived point history into the log and reopens it.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :return: The score of the match before the removed point.
+        :raises InvalidGameStateError: If the match has no logged points.
+        :raises ConcurrentUpdateError: If the match was changed since it was loaded.
+        """
+        state = PointLogService.remove_last(db, match)
+        try:
+            MatchService._save_score(db, match, state)
+        except StaleDataError as e:
+            db.rollback()
+            raise ConcurrentUpdateError(f"Match {match.uuid} was changed by another request") from e
+        return state
+
+    @staticmethod
+    def _save_score(db: Session, match: Match, state: ScoreState) -> None:
+        """
+        Writes a score to the match, sets (or clears) the winner and commits.
+
+        The cached completed match counts and listing pages are updated when the match is finished or reopened.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :param state: The new score of the match.
+        :raises StaleDataError: If the match was changed since it was loaded.
+        """
+        count_change = MatchService._apply_score(db, match, state)
+        db.commit()
+        MatchService._update_counts(count_change)
+
+    @staticmethod
+    def _apply_score(db: Session, match: Match, state: ScoreState) -> tuple[bool, tuple[str, str]] | None:
+        """
+        Writes a score to the match, sets (or clears) the winner and increments the version, without committing.
+
+        :param db: The SQLAlchemy session of the match.
+        :param match: The Match object representing the current match.
+        :param state: The new score of the match.
+        :return: Whether the match was finished and the name keys of its players, if it was finished
+                 or reopened; None otherwise.
+        """
+        finished = state.game_state is GameState.FINISHED
+        count_change = None
+        if finished != (match.winner_id is not None):
+            count_change = (finished, MatchService._name_keys(db, match))
+
+        if finished:
+            if state.player1_sets > state.player2_sets:
                 match.winner_id = match.player1_id
             else:
                 match.winner_id = match.player2_id
-            match.current_game_state = 'finished'
+        elif match.winner_id is not None:
+            match.winner_id = None
 
-        match.score = json.dumps(score)
-        db.commit()
+        match.score = state
+        match.version += 1
+        return count_change
+
+    @staticmethod
+    def _update_counts(count_change: tuple[bool, tuple[str, str]] | None) -> None:
+        # Called after the commit, so the counts and the cached pages never include an unsaved change
+        if count_change is None:
+            return
+        finished, name_keys = count_change
+        if finished:
+            MATCH_COUNTS.match_finished(name_keys)
+        else:
+            MATCH_COUNTS.match_reopened(name_keys)
+        LISTING_PAGES.invalidate(name_keys)
+
+    @staticmethod
+    def _name_keys(db: Session, match: Match) -> tuple[str, str]:
+        # Both players in one query rather than two lazy loads
+        name_keys = dict(
+            db.execute(
+                select(Player.id, Player.name_key).where(Player.id.in_((match.player1_id, match.player2_id)))
+            ).tuples().all()
+        )
+        return name_keys[match.player1_id], name_keys[match.player2_id]
 
     @staticmethod
     def get_match_by_uuid(db: Session, uuid: str) -> Match:
@@ -119,53 +297,163 @@ class MatchService:
             return match
         raise NotFoundMatchError(f"Match with uuid: {uuid} not found")
 
+    @staticmethod
+    def get_scoreboard(db: Session, uuid: str) -> Match:
+        """
+        Retrieves a match to display its scoreboard: the match, both players and the winner in one query.
+
+        :param db: The SQLAlchemy session.
+        :param uuid: The UUID of the match to retrieve.
+        :return: The Match object with `player1`, `player2` and `winner` loaded.
+        :raises NotFoundMatchError: If a match with the given UUID is not found.
+        """
+        match = (
+            db.query(Match)
+            .options(
+                joinedload(Match.player1),
+                joinedload(Match.player2),
+                joinedload(Match.winner)
+            )
+            .filter(Match.uuid == uuid)
+            .first()
+        )
+        if match:
+            return match
+        raise NotFoundMatchError(f"Match with uuid: {uuid} not found")
+
+    @staticmethod
+    def get_score(db: Session, uuid: str) -> tuple[int, ScoreState]:
+        """
+        Retrieves only the ID and the score of a match, without loading the match or its players.
+
+        :param db: The SQLAlchemy session.
+        :param uuid: The UUID of the match.
+        :return: The ID and the current score of the match.
+        :raises NotFoundMatchError: If a match with the given UUID is not found.
+        """
+        row = db.execute(
+            select(
+                Match.id,
+                Match.player1_points, Match.player2_points,
+                Match.player1_games, Match.player2_games,
+                Match.player1_sets, Match.player2_sets,
+                Match.current_game_state
+            ).where(Match.uuid == uuid)
+        ).first()
+        if row is None:
+            raise NotFoundMatchError(f"Match with uuid: {uuid} not found")
+        match_id, *score = row
+        return match_id, ScoreState(*score)
+
+    @staticmethod
+    def _completed_matches_query(db: Session, player_name: str | None) -> Query[Match]:
+        """
+        Builds the query of completed matches, optionally filtered by player name.
+
+        :param db: The SQLAlchemy session.
+        :param player_name: The name of the player to filter by (optional).
+        :return: The query, without ordering or pagination.
+        """
+        return (
+            db.query(Match)
+            .options(
+                joinedload(Match.player1),
+                joinedload(Match.player2),
+                joinedload(Match.winner)
+            )
+            .filter(*completed_matches_criteria(player_name))
+        )
+
     @staticmethod
     def get_completed_matches(
             db: Session,
             page: int = MIN_PAGE,
             per_page: int = PER_PAGE,
             player_name: str | None = None
-    ) -> tuple[list[Match], int, int]:
+    ) -> tuple[list[Match], MatchCount, int]:
         """
         Retrieves a list of completed matches, with optional pagination and filtering by player name.
 
+        Matches are ordered by id. Pages are selected with OFFSET, which is only
+        cheap for the first pages; deeper pages are reached with
+        `get_completed_matches_page`. The total comes from `MATCH_COUNTS`, which may be
+        out of date or only a lower bound; a page past the real end is clamped to the last page.
+
         :param db: The SQLAlchemy session.
         :param page: The page number to retrieve (defaults to MIN_PAGE).
         :param per_page: The number of matches to retrieve per page (defaults to PER_PAGE).
         :param player_name: The name of the player to filter by (optional).
-        :return: A tuple containing the list of completed matches and the total number of completed matches.
+        :return: A tuple containing the list of completed matches, the number of completed matches
+                 and the corrected page number.
         :raises DatabaseError: If a database error occurs during retrieval.
         """
-        query = (
-            db.query(Match)
-            .options(
-                joinedload(Match.player1),
-                joinedload(Match.player2),
-                joinedload(Match.winner)
-            )
-            .filter(Match.winner_id.isnot(None))
-        )
-
-        # Filter by player name
-        if player_name:
-            search_pattern = f'%{player_name}%'
-            query = query.filter(
-                or_(
-                    Match.player1.has(Player.name.like(search_pattern)),
-                    Match.player2.has(Player.name.like(search_pattern))
-                )
-            )
+        query = MatchService._completed_matches_query(db, player_name)
 
         # Pagination
-        total = query.count()
-        correct_page = Validation.correct_page(page, total, per_page)
+        total = MATCH_COUNTS.count(db, player_name)
+        correct_page = Validation.correct_page(page, total.value, per_page)
         try:
-            matches = (query.offset((correct_page - 1) * per_page).limit(per_page).all())
+            matches = query.order_by(Match.id).offset((correct_page - 1) * per_page).limit(per_page).all()
+            if not matches and correct_page > MIN_PAGE:
+                # The cached count was too high: count the matches and read the last page
+                total = MatchCount(query.count())
+                correct_page = Validation.correct_page(page, total.value, per_page)
+                matches = query.order_by(Match.id).offset((correct_page - 1) * per_page).limit(per_page).all()
             return matches, total, correct_page
         except SQLAlchemyError as e:
             logger.error("Database error during getting list of completed matches", exc_info=True)
             raise DatabaseError("Failed to get completed matches") from e
 
+    @staticmethod
+    def get_completed_matches_page(
+            db: Session,
+            cursor: PageCursor | None,
+            per_page: int = PER_PAGE,
+            player_name: str | None = None
+    ) -> tuple[list[Match], PageCursor | None, PageCursor | None]:
+        """
+        Retrieves a page of completed matches by keyset pagination on the match id.
+
+        The page starts right after (or ends right before) the id in the cursor, so
+        the cost of a page does not depend on its depth.
+
+        :param db: The SQLAlchemy session.
+        :param cursor: The position of the page, or None for the first page.
+        :param per_page: The number of matches to retrieve per page (defaults to PER_PAGE).
+        :param player_name: The name of the player to filter by (optional).
+        :return: A tuple of the matches, ordered by id, and the cursors of the next and the previous page
+                 (None if there is no such page).
+        :raises DatabaseError: If a database error occurs during retrieval.
+        """
+        query = MatchService._completed_matches_query(db, player_name)
+        if cursor is None:
+            cursor = PageCursor(0)
+
+        try:
+            if cursor.forward:
+                query = query.filter(Match.id > cursor.row_id).order_by(Match.id)
+            else:
+                query = query.filter(Match.id < cursor.row_id).order_by(Match.id.desc())
+            # One extra row tells whether there is another page in this direction
+            matches = query.limit(per_page + 1).all()
+        except SQLAlchemyError as e:
+            logger.error("Database error during getting a page of completed matches", exc_info=True)
+            raise DatabaseError("Failed to get completed matches") from e
+
+        has_more = len(matches) > per_page
+        matches = matches[:per_page]
+        if not cursor.forward:
+            matches.reverse()
+        if not matches:
+            return [], None, None
+
+        # A page reached from the other direction always has a neighbour on that side
+        has_next = has_more if cursor.forward else True
+        has_prev = has_more if not cursor.forward else cursor.row_id > 0
+        next_cursor = PageCursor(matches[-1].id) if has_next else None
+        prev_cursor = PageCursor(matches[0].id, forward=False) if has_prev else None
+        return matches, next_cursor, prev_cursor
+
     @staticmethod
     def determine_player_number(params: dict[str, str]) -> int:
         """
@@ -185,3 +473,34 @@ class MatchService:
             return 2
         else:
             raise PlayerNumberError("Player number must be 1 or 2")
+
+    @staticmethod
+    def determine_player_numbers(params: dict[str, Any]) -> list[int]:
+        """
+        Returns the player numbers of all points sent in one request.
+
+        A batch is sent in the 'points' parameter, either as a comma separated
+        string of player numbers (form data) or as a list of them (JSON).
+        Otherwise the request holds a single point (see `determine_player_number`).
+
+        :param params: A dictionary of parameters.
+        :return: The player numbers (1 or 2), in order.
+        :raises PlayerNumberError: If the batch is empty, too long or contains something other than 1 or 2.
+        """
+        if 'points' not in params:
+            return [MatchService.determine_player_number(params)]
+
+        points = params['points']
+        if isinstance(points, str):
+            points = [point.strip() for point in points.split(',')]
+        if not isinstance(points, list) or not points:
+            raise PlayerNumberError("Points must be a non-empty list of player numbers")
+        if len(points) > MAX_POINTS_PER_REQUEST:
+            raise PlayerNumberError(f"No more than {MAX_POINTS_PER_REQUEST} points can be sent at once")
+
+        player_nums = []
+        for point in points:
+            if str(point) not in ('1', '2'):
+                raise PlayerNumberError("Player number must be 1 or 2")
+            player_nums.append(int(point))
+        return player_nums
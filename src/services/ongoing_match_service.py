@@ -0,0 +1,587 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import AbstractContextManager, ExitStack
+from dataclasses import dataclass, field
+from typing import Callable, Sequence
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from config.config import (
+    ONGOING_MATCHES_MAX_SIZE,
+    ONGOING_MATCH_IDLE_SECONDS,
+    CHECKPOINT_POINTS,
+    CHECKPOINT_SECONDS,
+    WRITE_BEHIND,
+    WRITE_BEHIND_FLUSH_SECONDS,
+    WRITE_BEHIND_BATCH_SIZE
+)
+from exceptions import ConcurrentUpdateError, InvalidGameStateError, NotFoundMatchError
+from models.match import Match
+from services.match_service import MatchService
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Errors of a save after which the points stay pending
+SAVE_ERRORS = (SQLAlchemyError, ConcurrentUpdateError)
+
+
+def score_etag(match_id: int, state: ScoreState) -> str:
+    """
+    Returns the strong entity tag of the score page of a match. The page is determined
+    by the match and its score, so the tag changes with every point and undo.
+
+    :param match_id: The ID of the match.
+    :param state: The score shown on the page.
+    :return: The quoted entity tag.
+    """
+    return f'"{match_id}-{state.pack():x}"'
+
+
+@dataclass
+class OngoingMatch:
+    """
+    A match kept in memory while it is played.
+
+    `state` is the current score. The points scored since the last save are kept
+    in `pending_points` together with the score after each of them, and
+    `saved_state` is the score stored in the database at `version`.
+    """
+    uuid: str
+    match_id: int
+    player1_id: int
+    player2_id: int
+    player1_name: str
+    player2_name: str
+    match_format: str
+    state: ScoreState
+    saved_state: ScoreState
+    version: int
+    last_access: float
+    saved_at: float
+    pending_points: list[int] = field(default_factory=list)
+    pending_states: list[ScoreState] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.state.game_state is GameState.FINISHED
+
+    @classmethod
+    def from_match(cls, match: Match, player1_name: str, player2_name: str) -> 'OngoingMatch':
+        """
+        Creates an ongoing match from a loaded Match object.
+
+        :param match: The Match object.
+        :param player1_name: The name of the first player.
+        :param player2_name: The name of the second player.
+        :return: The ongoing match.
+        """
+        state = match.score
+        return cls(
+            uuid=match.uuid,
+            match_id=match.id,
+            player1_id=match.player1_id,
+            player2_id=match.player2_id,
+            player1_name=player1_name,
+            player2_name=player2_name,
+            match_format=match.match_format,
+            state=state,
+            saved_state=state,
+            version=match.version,
+            last_access=0.0,
+            saved_at=0.0
+        )
+
+
+class OngoingMatchService:
+    """
+    Keeps the matches being played in memory, keyed by UUID.
+
+    Points are scored in memory and written to the database in one transaction
+    when the match is finished, when `checkpoint_points` points are unsaved or
+    `checkpoint_seconds` have passed since the last save, and when the match is
+    evicted. Matches are evicted least recently used first once there are more
+    than `max_size` of them, and after `idle_timeout` seconds without a request.
+
+    A background thread started by `start` wakes up every `flush_interval` seconds,
+    saves the matches whose last save is `checkpoint_seconds` old and evicts the idle
+    ones, so the points of a match that gets no more requests are written too. A crash
+    loses at most the points of the last `checkpoint_seconds` (plus `flush_interval`).
+
+    In write-behind mode the requests only save a match when it is finished or has
+    `checkpoint_points` unsaved points; the background thread writes the other points
+    on every wake-up, in transactions of up to `batch_size` matches. A crash loses at
+    most the points of the last `flush_interval` seconds (plus the time of a failing
+    flush), and never more than `checkpoint_points` points of a match.
+
+    Without the thread (`start` not called) a match is only saved by its own requests
+    and by evictions. `stop` writes everything before the server exits.
+
+    The registry lives in the memory of one process. If the match is changed
+    elsewhere (another process), the version of the row no longer matches the
+    version of the saved state, and the unsaved points are scored again on the
+    stored score.
+
+    The registry lock only guards the dictionary: matches are loaded and spilled without
+    it, and the lock of a match is always taken before the registry lock. A match missing
+    from memory is loaded once, the other requests for it wait for that load. The evicted
+    matches are spilled by the background thread when it runs, otherwise by the request
+    that finds them.
+
+    :param session_factory: A callable returning a context manager that yields a database session.
+    :param read_session_factory: Like `session_factory`, for read-only sessions that may lag behind
+                                 (a read replica); defaults to `session_factory`.
+    :param max_size: The maximum number of matches kept in memory.
+    :param idle_timeout: The number of seconds without a request after which a match is evicted.
+    :param checkpoint_points: The number of unsaved points that triggers a save.
+    :param checkpoint_seconds: The number of seconds since the last save after which a match is saved,
+                               on its next point or by the background thread; not used in write-behind mode.
+    :param write_behind: Whether the requests leave the unsaved points to the background thread.
+    :param flush_interval: The number of seconds between two wake-ups of the background thread.
+    :param batch_size: The maximum number of matches written in one transaction by `flush`.
+    :param clock: The monotonic clock, in seconds.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], AbstractContextManager[Session]],
+            read_session_factory: Callable[[], AbstractContextManager[Session]] | None = None,
+            max_size: int = ONGOING_MATCHES_MAX_SIZE,
+            idle_timeout: float = ONGOING_MATCH_IDLE_SECONDS,
+            checkpoint_points: int = CHECKPOINT_POINTS,
+            checkpoint_seconds: float = CHECKPOINT_SECONDS,
+            write_behind: bool = WRITE_BEHIND,
+            flush_interval: float = WRITE_BEHIND_FLUSH_SECONDS,
+            batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._session_factory = session_factory
+        self._read_session_factory = read_session_factory or session_factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkpoint_points = checkpoint_points
+        self.checkpoint_seconds = checkpoint_seconds
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._clock = clock
+        self._matches: OrderedDict[str, OngoingMatch] = OrderedDict()
+        # The loads in progress, set when the match is in memory (or failed to load)
+        self._loading: dict[str, threading.Event] = {}
+        # The matches being spilled, skipped by a concurrent eviction
+        self._evicting: set[str] = set()
+        self._lock = threading.Lock()
+        self._flusher: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._matches)
+
+    def __contains__(self, match_uuid: str) -> bool:
+        return match_uuid in self._matches
+
+    def get(self, match_uuid: str, read_only: bool = False) -> OngoingMatch:
+        """
+        Returns a match, loading it from the database if it is not in memory.
+
+        Finished matches are returned but not kept in memory.
+
+        A read-only match not in memory is loaded with the read session factory and
+        is not kept in memory either, since it may be behind the primary and must
+        not be scored. A match not found there (not replicated yet) is read from the primary.
+
+        :param match_uuid: The UUID of the match.
+        :param read_only: Whether the match is only displayed.
+        :return: The match.
+        :raises NotFoundMatchError: If a match with the given UUID is not found.
+        """
+        with self._lock:
+            entry = self._touch(match_uuid)
+        if entry is None and not read_only:
+            entry = self._load_shared(match_uuid)
+        if entry is not None:
+            self._evict_if_due()
+            return entry
+
+        try:
+            return self._load(self._read_session_factory, match_uuid)
+        except NotFoundMatchError:
+            if self._read_session_factory is self._session_factory:
+                raise
+            return self._load(self._session_factory, match_uuid)
+
+    def current_etag(self, match_uuid: str) -> str | None:
+        """
+        Returns the entity tag of the score page of a match (see `score_etag`) without loading
+        the match: from memory, or from the score columns read with the read session factory.
+
+        :param match_uuid: The UUID of the match.
+        :return: The entity tag, or None if the match is not found.
+        """
+        with self._lock:
+            entry = self._matches.get(match_uuid)
+            if entry is not None:
+                return score_etag(entry.match_id, entry.state)
+
+        try:
+            with self._read_session_factory() as db:
+                match_id, state = MatchService.get_score(db, match_uuid)
+        except NotFoundMatchError:
+            return None
+        return score_etag(match_id, state)
+
+    def _touch(self, match_uuid: str) -> OngoingMatch | None:
+        # The caller holds self._lock
+        entry = self._matches.get(match_uuid)
+        if entry is not None:
+            entry.last_access = self._clock()
+            self._matches.move_to_end(match_uuid)
+        return entry
+
+    def _load_shared(self, match_uuid: str) -> OngoingMatch:
+        """
+        Loads a match from the primary and puts it in memory unless it is finished.
+
+        Only one request loads a given match; the others wait for it without holding the
+        registry lock, then find the match in memory (or load it themselves if it was not kept).
+        """
+        while True:
+            with self._lock:
+                entry = self._touch(match_uuid)
+                if entry is not None:
+                    return entry
+                loading = self._loading.get(match_uuid)
+                if loading is None:
+                    loading = self._loading[match_uuid] = threading.Event()
+                    break
+            loading.wait()
+
+        try:
+            entry = self._load(self._session_factory, match_uuid)
+            if not entry.finished:
+                with self._lock:
+                    entry = self._matches.setdefault(match_uuid, entry)
+            return entry
+        finally:
+            with self._lock:
+                del self._loading[match_uuid]
+            loading.set()
+
+    def _load(self, session_factory: Callable[[], AbstractContextManager[Session]], match_uuid: str) -> OngoingMatch:
+        with session_factory() as db:
+            match = MatchService.get_scoreboard(db, match_uuid)
+            entry = OngoingMatch.from_match(match, match.player1.name, match.player2.name)
+        entry.last_access = entry.saved_at = self._clock()
+        return entry
+
+    def register(self, entry: OngoingMatch) -> None:
+        """
+        Puts a newly created match in memory, so its first request does not load it.
+
+        :param entry: The match, created with `OngoingMatch.from_match` after the match was committed.
+        """
+        entry.last_access = entry.saved_at = self._clock()
+        with self._lock:
+            self._matches[entry.uuid] = entry
+        self._evict_if_due()
+
+    def start(self) -> None:
+        """
+        Starts the background thread writing the unsaved points and evicting the idle matches.
+        """
+        if self._flusher is not None:
+            return
+        self._stopping.clear()
+        self._flusher = threading.Thread(target=self._run_flusher, name='ongoing-match-flusher', daemon=True)
+        self._flusher.start()
+        if self.write_behind:
+            logger.info(f"Write-behind of ongoing matches started, flushing every {self.flush_interval} s")
+        else:
+            logger.info(f"Checkpoints of ongoing matches started, saving points older than {self.checkpoint_seconds} s")
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and writes the unsaved points of every match, for example before the server stops.
+        """
+        if self._flusher is not None:
+            self._stopping.set()
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def add_points(self, entry: OngoingMatch, player_nums: Sequence[int]) -> ScoreState:
+        """
+        Scores points in memory, saving the match if it is finished or a checkpoint is due.
+
+        Nothing changes if any of the points is invalid.
+
+        :param entry: The match.
+        :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+        :return: The new score of the match.
+        :raises InvalidGameStateError: If a point is added to a finished match.
+        :raises PlayerNumberError: If a player number is not 1 or 2.
+        :raises SQLAlchemyError: If the match is finished and cannot be saved; it stays in memory
+                                 with its points pending.
+        :raises ConcurrentUpdateError: Like SQLAlchemyError.
+        """
+        with entry.lock:
+            engine = get_engine(entry.match_format)
+            state = entry.state
+            states = []
+            for player_num in player_nums:
+                state, _ = engine.play(state, player_num)
+                states.append(state)
+
+            entry.pending_points.extend(player_nums)
+            entry.pending_states.extend(states)
+            entry.state = state
+            with self._lock:
+                # Evicted since `get` returned it: nothing else would write these points
+                detached = self._matches.get(entry.uuid) is not entry
+            if (
+                    detached or
+                    entry.finished or
+                    len(entry.pending_points) >= self.checkpoint_points or
+                    not self.write_behind and self._clock() - entry.saved_at >= self.checkpoint_seconds
+            ):
+                try:
+                    self._save(entry)
+                except SAVE_ERRORS:
+                    # The points stay pending and are saved by the next checkpoint, flush or eviction
+                    logger.error(f"Failed to save ongoing match {entry.uuid}", exc_info=True)
+                    if entry.finished:
+                        # The result of the match is not reported before it is stored
+                        raise
+                finally:
+                    if detached and not (entry.finished and not entry.pending_points):
+                        self._reattach(entry)
+
+        if entry.finished and not entry.pending_points:
+            self._discard(entry)
+        return state
+
+    def undo_last_point(self, entry: OngoingMatch) -> ScoreState:
+        """
+        Reverts the last point of a match.
+
+        An unsaved point is simply dropped; otherwise the point is removed from the
+        database log, which also reopens a finished match.
+
+        :param entry: The match.
+        :return: The score of the match before the removed point.
+        :raises InvalidGameStateError: If the match has no points.
+        :raises NotFoundMatchError: If the match was deleted from the database.
+        """
+        with entry.lock:
+            if entry.pending_points:
+                entry.pending_points.pop()
+                entry.pending_states.pop()
+                entry.state = entry.pending_states[-1] if entry.pending_states else entry.saved_state
+                return entry.state
+
+            with self._session_factory() as db:
+                match = db.get(Match, entry.match_id)
+                if match is None:
+                    raise NotFoundMatchError(f"Match with uuid: {entry.uuid} not found")
+                # The undo saves the match once, which increments its version
+                version = match.version + 1
+                entry.state = entry.saved_state = MatchService.undo_last_point(db, match)
+                entry.version = version
+                entry.saved_at = self._clock()
+
+            if not entry.finished:
+                self._reattach(entry)
+        self._evict_if_due()
+        return entry.state
+
+    def flush(self, saved_before: float = 0.0) -> None:
+        """
+        Saves the unsaved points of every match in memory, `batch_size` matches per transaction.
+
+        A batch that fails is retried match by match, so one failing match does not
+        hold back the others; the points that still fail stay pending.
+
+        :param saved_before: Only the matches last saved at least this many seconds ago are saved.
+        """
+        with self._lock:
+            now = self._clock()
+            dirty = [
+                entry for entry in self._matches.values()
+                if entry.pending_points and now - entry.saved_at >= saved_before
+            ]
+
+        for start in range(0, len(dirty), self.batch_size):
+            batch = dirty[start:start + self.batch_size]
+            # The registry lock is not held, so the locks of several matches can be taken at once
+            with ExitStack() as stack:
+                for entry in batch:
+                    stack.enter_context(entry.lock)
+                batch = [entry for entry in batch if entry.pending_points]
+                try:
+                    self._save_batch(batch)
+                except SAVE_ERRORS:
+                    logger.error(f"Failed to save a batch of {len(batch)} ongoing matches", exc_info=True)
+                    for entry in batch:
+                        try:
+                            self._save(entry)
+                        except SAVE_ERRORS:
+                            logger.error(f"Failed to save ongoing match {entry.uuid}", exc_info=True)
+                        except NotFoundMatchError:
+                            self._drop_deleted(entry)
+
+            for entry in batch:
+                if entry.finished and not entry.pending_points:
+                    self._discard(entry)
+
+    def _run_flusher(self) -> None:
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush(0.0 if self.write_behind else self.checkpoint_seconds)
+                self._evict()
+            except Exception:
+                logger.critical("Unexpected error while flushing ongoing matches", exc_info=True)
+
+    def _reattach(self, entry: OngoingMatch) -> None:
+        """
+        Puts a match back in memory after it was evicted while a request was using it.
+
+        The caller holds the lock of the match.
+        """
+        with self._lock:
+            current = self._matches.setdefault(entry.uuid, entry)
+        if current is not entry:
+            # Loaded again meanwhile; that copy sees the saved points through the version of the row
+            logger.warning(f"Ongoing match {entry.uuid} was loaded again while it was detached")
+
+    def _drop_deleted(self, entry: OngoingMatch) -> None:
+        logger.error(f"Ongoing match {entry.uuid} was deleted, dropped its {len(entry.pending_points)} unsaved points")
+        self._discard(entry)
+
+    def _discard(self, entry: OngoingMatch) -> None:
+        with self._lock:
+            if self._matches.get(entry.uuid) is entry:
+                del self._matches[entry.uuid]
+
+    def _evict_if_due(self) -> None:
+        # The background thread evicts the matches when it runs, outside of the requests
+        if self._flusher is None:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Spills the least recently used matches over the size limit and the idle matches to the database.
+
+        The matches are chosen under the registry lock and saved after it is released. A match
+        used again meanwhile, or that fails to save, is kept in memory.
+        """
+        with self._lock:
+            now = self._clock()
+            excess = len(self._matches) - self.max_size
+            victims = []
+            for match_uuid, entry in self._matches.items():
+                if excess <= 0 and now - entry.last_access < self.idle_timeout:
+                    break
+                excess -= 1
+                if match_uuid not in self._evicting:
+                    self._evicting.add(match_uuid)
+                    victims.append((entry, entry.last_access))
+
+        for entry, last_access in victims:
+            try:
+                self._spill(entry, last_access)
+            finally:
+                with self._lock:
+                    self._evicting.discard(entry.uuid)
+
+    def _spill(self, entry: OngoingMatch, last_access: float) -> None:
+        with entry.lock:
+            try:
+                self._save(entry)
+            except SAVE_ERRORS:
+                logger.error(f"Failed to spill ongoing match {entry.uuid}, keeping it in memory", exc_info=True)
+                with self._lock:
+                    if self._matches.get(entry.uuid) is entry:
+                        self._matches.move_to_end(entry.uuid)
+                return
+            except NotFoundMatchError:
+                self._drop_deleted(entry)
+                return
+            with self._lock:
+                if self._matches.get(entry.uuid) is not entry or entry.last_access != last_access:
+                    return
+                del self._matches[entry.uuid]
+        logger.debug(f"Ongoing match {entry.uuid} evicted")
+
+    def _save(self, entry: OngoingMatch) -> None:
+        """
+        Writes the unsaved points of a match to the database in one transaction.
+
+        The caller holds the lock of the match.
+
+        :raises NotFoundMatchError: If the match was deleted from the database.
+        """
+        if not entry.pending_points:
+            return
+        with self._session_factory() as db:
+            match = db.get(Match, entry.match_id)
+            if match is None:
+                raise NotFoundMatchError(f"Match with uuid: {entry.uuid} not found")
+            state = entry.saved_state
+            if match.version != entry.version:
+                logger.warning(f"Match {entry.uuid} was changed elsewhere, its unsaved points are scored again")
+                state = match.score
+            try:
+                entry.state, entry.version = MatchService.apply_points(db, match, state, entry.pending_points)
+            except InvalidGameStateError:
+                logger.error(
+                    f"Dropped {len(entry.pending_points)} unsaved points of match {entry.uuid}, "
+                    f"it was finished elsewhere"
+                )
+                entry.state, entry.version = match.score, match.version
+        logger.debug(f"Saved {len(entry.pending_points)} points of match {entry.uuid}")
+        self._mark_saved(entry)
+
+    def _save_batch(self, entries: Sequence[OngoingMatch]) -> None:
+        """
+        Writes the unsaved points of several matches to the database in one transaction.
+
+        The caller holds the locks of the matches.
+        """
+        if not entries:
+            return
+        with self._session_factory() as db:
+            matches = {
+                match.id: match
+                for match in db.query(Match).filter(Match.id.in_([entry.match_id for entry in entries]))
+            }
+            # The matches changed (or deleted) elsewhere are saved one by one, which scores their points again
+            batch: list[OngoingMatch] = []
+            changed: list[OngoingMatch] = []
+            for entry in entries:
+                match = matches.get(entry.match_id)
+                (batch if match is not None and match.version == entry.version else changed).append(entry)
+            if batch:
+                versions = MatchService.save_points_batch(
+                    db,
+                    [(matches[entry.match_id], entry.pending_points, entry.pending_states) for entry in batch]
+                )
+                for entry, version in zip(batch, versions):
+                    entry.version = version
+                    self._mark_saved(entry)
+        logger.debug(f"Saved the points of {len(batch)} ongoing matches")
+        for entry in changed:
+            try:
+                self._save(entry)
+            except NotFoundMatchError:
+                self._drop_deleted(entry)
+
+    def _mark_saved(self, entry: OngoingMatch) -> None:
+        entry.saved_state = entry.state
+        entry.saved_at = self._clock()
+        entry.pending_points.clear()
+        entry.pending_states.clear()
@@ -0,0 +1,143 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generator, Iterable, Sequence
+
+from config.config import LISTING_CACHE_SIZE, LISTING_CACHE_TTL_SECONDS, REPLICA_LAG_SECONDS
+from services.match_count_service import filter_selects
+
+logger = logging.getLogger(__name__)
+
+# Player filter key (see `filter_key`), page number and cursor token of a listing page
+PageKey = tuple[str, int, str | None]
+
+
+class PageCacheService:
+    """
+    Caches the rendered pages of the completed matches listing.
+
+    The listing only changes when a match is finished or reopened, so the pages are
+    dropped then (see `invalidate`): the unfiltered pages and the pages of the filters
+    matching one of the players. The `max_pages` most recently used pages are kept, each
+    for at most `ttl` seconds, which also bounds how long a change made by another
+    process goes unnoticed.
+
+    A replica may not show the change yet when the pages are rendered again, so for
+    `replica_lag` seconds after an invalidation they are read from the primary (see
+    `recently_invalidated`); otherwise a stale page would be cached for `ttl` seconds.
+
+    :param max_pages: The maximum number of pages kept.
+    :param ttl: The number of seconds a page is served from the cache.
+    :param replica_lag: The number of seconds a change may take to reach the replicas.
+    :param clock: The monotonic clock, in seconds.
+    """
+
+    def __init__(
+            self,
+            max_pages: int = LISTING_CACHE_SIZE,
+            ttl: float = LISTING_CACHE_TTL_SECONDS,
+            replica_lag: float = REPLICA_LAG_SECONDS,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self.replica_lag = replica_lag
+        self._clock = clock
+        self._pages: OrderedDict[PageKey, tuple[bytes, float]] = OrderedDict()
+        # Incremented by every invalidation, so a page rendered concurrently with a change is not cached
+        self._generation = 0
+        self._invalidated_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    @property
+    def generation(self) -> int:
+        """
+        The number of invalidations so far, read before the data of a page is loaded.
+        """
+        return self._generation
+
+    def recently_invalidated(self) -> bool:
+        """
+        Returns whether the replicas may still miss the last change, so the pages must be read from the primary.
+        """
+        return self._clock() - self._invalidated_at < self.replica_lag
+
+    def get(self, key: PageKey) -> bytes | None:
+        """
+        Returns a cached page.
+
+        :param key: The filter, page number and cursor of the page.
+        :return: The encoded page, or None if it is not cached or has expired.
+        """
+        with self._lock:
+            cached = self._pages.get(key)
+            if cached is None:
+                return None
+            if self._clock() - cached[1] >= self.ttl:
+                del self._pages[key]
+                return None
+            self._pages.move_to_end(key)
+            return cached[0]
+
+    def put(self, key: PageKey, page: bytes, generation: int) -> None:
+        """
+        Caches a page, unless the listing changed since its data was loaded.
+
+        :param key: The filter, page number and cursor of the page.
+        :param page: The encoded page.
+        :param generation: The `generation` read before the data of the page was loaded.
+        """
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._pages[key] = (page, self._clock())
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def caching(self, key: PageKey, generation: int, chunks: Iterable[bytes]) -> Generator[bytes, None, None]:
+        """
+        Passes the chunks of a streamed page through and caches the page once all of them were sent.
+
+        A response that is not sent completely is not cached.
+
+        :param key: The filter, page number and cursor of the page.
+        :param generation: The `generation` read before the data of the page was loaded.
+        :param chunks: The encoded chunks of the page.
+        :return: The same chunks.
+        """
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.put(key, b''.join(parts), generation)
+
+    def invalidate(self, name_keys: Sequence[str]) -> None:
+        """
+        Drops the pages that change when a match of the given players is finished or reopened.
+
+        :param name_keys: The normalized names of the players of the match.
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at = self._clock()
+            stale = [key for key in self._pages if filter_selects(key[0], name_keys)]
+            for key in stale:
+                del self._pages[key]
+        logger.debug(f"Dropped {len(stale)} cached listing pages")
+
+    def clear(self) -> None:
+        """
+        Drops all cached pages.
+        """
+        with self._lock:
+            self._pages.clear()
+            self._generation += 1
+            self._invalidated_at = float('-inf')
+
+
+LISTING_PAGES = PageCacheService()
@@ -1,10 +1,14 @@
 import logging
+from typing import Sequence
 
+from sqlalchemy import insert, Executable, Select, select, func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from exceptions import DatabaseError, PlayerNotFound
-from models.player import Player
+from exceptions import DatabaseError, DuplicatePlayerError
+from models.base import Base
+from models.player import Player, PlayerNameTrigram, normalize_name, name_trigrams
 
 logger = logging.getLogger(__name__)
 
@@ -28,43 +32,106 @@ class PlayerService:
         return player
 
     @staticmethod
-    def get_or_create_player_id(db: Session, name: str) -> int:
+    def get_or_create_players(db: Session, names: Sequence[str]) -> list[tuple[int, str]]:
         """
-        Retrieves the ID of an existing player by name, or creates a new player if one doesn't exist.
+        Retrieves existing players by normalized name and creates the missing ones. The caller commits.
+
+        The missing players are inserted with one insert-or-ignore statement, so a
+        player created concurrently by another request is not inserted twice, and
+        their names are added to the search index with another one.
 
         :param db: The SQLAlchemy session.
-        :param name: The name of the player.
-        :return: The ID of the player.
+        :param names: The names of the players.
+        :return: The ID and the stored name of each player, in the order of `names`.
+        :raises DuplicatePlayerError: If two of the names resolve to the same player.
         :raises DatabaseError: If a database error occurs during retrieval or creation.
         """
+        keys = [normalize_name(name) for name in names]
+        if len(set(keys)) < len(keys):
+            raise DuplicatePlayerError(f'Player names must be different: {", ".join(names)}')
         try:
-            player: Player = db.query(Player).filter(Player.name.ilike(name)).first()
-            if not player:
-                player = PlayerService.create_player(name)
-                db.add(player)
-                db.commit()
-                db.refresh(player)
-            player_id: int = player.id
-            return player_id
+            players = PlayerService._find_by_keys(db, keys)
+            missing = {key: name.strip() for key, name in zip(keys, names) if key not in players}
+            if missing:
+                db.execute(
+                    PlayerService._insert_ignore(db, Player),
+                    [{"name": name, "name_key": key} for key, name in missing.items()]
+                )
+                created = PlayerService._find_by_keys(db, list(missing))
+                db.execute(
+                    PlayerService._insert_ignore(db, PlayerNameTrigram),
+                    [
+                        {"trigram": trigram, "player_id": player_id}
+                        for key, (player_id, _) in created.items()
+                        for trigram in name_trigrams(key)
+                    ]
+                )
+                players.update(created)
+            return [players[key] for key in keys]
         except SQLAlchemyError:
-            logger.error(f'Failed to get or create player id for name: {name}', exc_info=True)
-            raise DatabaseError('Failed to get or create player id')
+            logger.error(f'Failed to get or create players: {", ".join(names)}', exc_info=True)
+            raise DatabaseError('Failed to get or create players')
 
     @staticmethod
-    def get_name(db: Session, player_id: int) -> str:
+    def _find_by_keys(db: Session, keys: list[str]) -> dict[str, tuple[int, str]]:
+        rows = db.query(Player.id, Player.name, Player.name_key).filter(Player.name_key.in_(keys))
+        return {name_key: (player_id, name) for player_id, name, name_key in rows}
+
+    @staticmethod
+    def _insert_ignore(db: Session, model: type[Base]) -> Executable:
+        """
+        Builds an INSERT that skips the rows violating a unique constraint, in the dialect of the session.
         """
-        Retrieves the name of a player by their ID.
+        dialect = db.get_bind().dialect.name
+        if dialect == 'mysql':
+            return insert(model).prefix_with('IGNORE')
+        if dialect == 'postgresql':
+            return postgresql.insert(model).on_conflict_do_nothing()
+        if dialect == 'sqlite':
+            return sqlite.insert(model).on_conflict_do_nothing()
+        return insert(model)
+
+    @staticmethod
+    def matching_ids(name: str) -> Select[tuple[int]]:
+        """
+        Builds the query of the IDs of the players whose normalized name contains a string.
+
+        The trigram index narrows the players down: a string of one or two characters
+        is found by the trigrams it prefixes, a longer one by the players having all
+        of its trigrams, which are then checked against the whole string.
+
+        :param name: The string to search for; it is normalized like the names.
+        :return: The query, usable as an IN subquery.
+        """
+        key = normalize_name(name)
+        if len(key) < 3:
+            return (
+                select(PlayerNameTrigram.player_id)
+                .where(PlayerNameTrigram.trigram.startswith(key, autoescape=True))
+                .distinct()
+            )
+
+        trigrams = {key[i:i + 3] for i in range(len(key) - 2)}
+        candidates = (
+            select(PlayerNameTrigram.player_id)
+            .where(PlayerNameTrigram.trigram.in_(trigrams))
+            .group_by(PlayerNameTrigram.player_id)
+            .having(func.count() == len(trigrams))
+        )
+        return select(Player.id).where(Player.id.in_(candidates), Player.name_key.contains(key, autoescape=True))
+
+    @staticmethod
+    def find_player_ids(db: Session, name: str) -> list[int]:
+        """
+        Retrieves the IDs of the players whose normalized name contains a string.
 
         :param db: The SQLAlchemy session.
-        :param player_id: The ID of the player.
-        :return: The name of the player.
-        :raises PlayerNotFound: If a player with the given ID is not found.
+        :param name: The string to search for.
+        :return: The IDs of the players, in ascending order.
+        :raises DatabaseError: If a database error occurs during the search.
         """
-        player: Player = db.query(Player).get(player_id)
-
-        if player:
-            player_name: str = player.name
-            return player_name
-        else:
-            logger.error(f"Player with id {player_id} not found")
-            raise PlayerNotFound(player_id)
+        try:
+            return sorted(db.scalars(PlayerService.matching_ids(name)))
+        except SQLAlchemyError:
+            logger.error(f'Failed to search players by name: {name}', exc_info=True)
+            raise DatabaseError('Failed to search players')
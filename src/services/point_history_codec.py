@@ -0,0 +1,83 @@
+"""
+Binary codec for the full point sequence of a match.
+
+Each point is a single bit telling who won it, so a best-of-three match of a
+few hundred points takes a few dozen bytes. Layout of format version 1:
+
+    byte 0        format version
+    bytes 1-4     number of points, unsigned big-endian
+    bytes 5...    one bit per point, most significant bit first:
+                  0 - player 1 won the point, 1 - player 2 won it
+"""
+import struct
+from typing import Iterable, Iterator
+
+from exceptions import InvalidScoreError, PlayerNumberError
+
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('>BI')
+HEADER_SIZE = _HEADER.size
+
+
+def encode(player_nums: Iterable[int]) -> bytes:
+    """
+    Encodes a point sequence.
+
+    :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+    :return: The encoded point history.
+    :raises PlayerNumberError: If a player number is not 1 or 2.
+    """
+    data = bytearray(HEADER_SIZE)
+    count = 0
+    byte = 0
+    for player_num in player_nums:
+        if player_num != 1 and player_num != 2:
+            raise PlayerNumberError("Player number must be 1 or 2")
+        byte = (byte << 1) | (player_num - 1)
+        count += 1
+        if count & 7 == 0:
+            data.append(byte)
+            byte = 0
+
+    if count & 7:
+        data.append(byte << (8 - (count & 7)))
+    _HEADER.pack_into(data, 0, FORMAT_VERSION, count)
+    return bytes(data)
+
+
+def length(data: bytes) -> int:
+    """
+    Returns the number of points in an encoded history.
+
+    :param data: The encoded point history.
+    :return: The number of points.
+    :raises InvalidScoreError: If the data is truncated or has an unknown version.
+    """
+    if len(data) < HEADER_SIZE:
+        raise InvalidScoreError("Point history is truncated")
+    version, count = _HEADER.unpack_from(data)
+    if version != FORMAT_VERSION:
+        raise InvalidScoreError(f"Unknown point history format version: {version}")
+    if len(data) < HEADER_SIZE + (count + 7) // 8:
+        raise InvalidScoreError("Point history is truncated")
+    return int(count)
+
+
+def decode(data: bytes) -> Iterator[int]:
+    """
+    Streams the point winners of an encoded history.
+
+    :param data: The encoded point history.
+    :return: An iterator over the player numbers (1 or 2) of the point winners, in order.
+    :raises InvalidScoreError: If the data is truncated or has an unknown version.
+    """
+    count = length(data)
+    for offset in range(HEADER_SIZE, HEADER_SIZE + count // 8):
+        byte = data[offset]
+        for shift in range(7, -1, -1):
+            yield ((byte >> shift) & 1) + 1
+
+    if count & 7:
+        byte = data[HEADER_SIZE + count // 8]
+        for shift in range(7, 7 - (count & 7), -1):
+            yield ((byte >> shift) & 1) + 1
@@ -0,0 +1,192 @@
+import logging
+from typing import Sequence
+
+from sqlalchemy import insert, delete, select
+from sqlalchemy.orm import Session
+
+from config.config import SNAPSHOT_INTERVAL
+from exceptions import InvalidGameStateError
+from models.match import Match
+from models.match_point import MatchPoint, MatchSnapshot
+from services import score_utils, point_history_codec
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import get_engine
+
+logger = logging.getLogger(__name__)
+
+
+class PointLogService:
+    """
+    Provides services for the append-only point log of a match.
+
+    Every point is stored as one `MatchPoint` row, and every SNAPSHOT_INTERVAL
+    points the score is stored as a packed `MatchSnapshot`. The score after any
+    number of points is rebuilt by replaying at most SNAPSHOT_INTERVAL points.
+
+    When a match is finished its rows are compacted into the bit-packed
+    `Match.point_history` column and removed from the log.
+
+    A match that was already in progress when the log was introduced has a snapshot
+    of its score at seq 0 and is replayed from it. Its log is never archived, since
+    the point history is replayed from 0-0, and its points logged before the log
+    existed cannot be undone.
+    """
+
+    @staticmethod
+    def record(
+            db: Session,
+            match: Match,
+            player_nums: Sequence[int],
+            states: Sequence[ScoreState],
+            first_seq: int | None = None
+    ) -> None:
+        """
+        Appends points to the log of a match. The caller commits.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+        :param states: The score of the match after each of the points.
+        :param first_seq: The number of points logged before these ones, if `match.points_played`
+                          was already advanced by the caller.
+        """
+        PointLogService._append(db, match, player_nums, states, first_seq)
+        if states and states[-1].game_state is GameState.FINISHED:
+            PointLogService.archive(db, match)
+
+    @staticmethod
+    def _append(
+            db: Session,
+            match: Match,
+            player_nums: Sequence[int],
+            states: Sequence[ScoreState],
+            first_seq: int | None = None
+    ) -> None:
+        seq = match.points_played if first_seq is None else first_seq
+        points = []
+        snapshots = []
+        for player_num, state in zip(player_nums, states):
+            seq += 1
+            points.append({"match_id": match.id, "seq": seq, "winner": player_num})
+            if seq % SNAPSHOT_INTERVAL == 0:
+                snapshots.append({"match_id": match.id, "seq": seq, "state": state.pack()})
+
+        if points:
+            db.execute(insert(MatchPoint), points)
+        if snapshots:
+            db.execute(insert(MatchSnapshot), snapshots)
+        match.points_played = seq
+
+    @staticmethod
+    def score_at(db: Session, match: Match, index: int) -> ScoreState:
+        """
+        Rebuilds the score of a match after the given number of points.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :param index: The number of points played (0 for the initial score).
+        :return: The score of the match after `index` points.
+        :raises InvalidGameStateError: If the index is outside the log.
+        """
+        if not 0 <= index <= match.points_played:
+            raise InvalidGameStateError(f"Match {match.uuid} has no point with index {index}")
+        if match.point_history is not None:
+            return score_utils.replay_history(match.point_history, index, match.match_format)
+
+        snapshot = (
+            db.query(MatchSnapshot.seq, MatchSnapshot.state)
+            .filter(MatchSnapshot.match_id == match.id, MatchSnapshot.seq <= index)
+            .order_by(MatchSnapshot.seq.desc())
+            .first()
+        )
+        if snapshot:
+            seq, state = snapshot.seq, ScoreState.unpack(snapshot.state)
+        else:
+            seq, state = 0, ScoreState()
+
+        winners = (
+            db.query(MatchPoint.winner)
+            .filter(MatchPoint.match_id == match.id, MatchPoint.seq > seq, MatchPoint.seq <= index)
+            .order_by(MatchPoint.seq)
+        )
+        return get_engine(match.match_format).play_all(state, (player_num for (player_num,) in winners))
+
+    @staticmethod
+    def remove_last(db: Session, match: Match) -> ScoreState:
+        """
+        Removes the last point from the log of a match. The caller commits.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the current match.
+        :return: The score of the match before the removed point.
+        :raises InvalidGameStateError: If the log is empty or does not lead to the score of the match.
+        """
+        seq = match.points_played
+        if seq == 0:
+            raise InvalidGameStateError("There are no points to undo")
+        if match.point_history is not None:
+            PointLogService.restore(db, match)
+
+        state = PointLogService.score_at(db, match, seq - 1)
+        last_winner = db.scalar(
+            select(MatchPoint.winner).where(MatchPoint.match_id == match.id, MatchPoint.seq == seq)
+        )
+        if last_winner is None or get_engine(match.match_format).play(state, last_winner)[0] != match.score:
+            logger.error(f"The point log of match {match.uuid} does not lead to its score")
+            raise InvalidGameStateError("The points of this match cannot be undone")
+        db.execute(delete(MatchPoint).where(MatchPoint.match_id == match.id, MatchPoint.seq == seq))
+        db.execute(delete(MatchSnapshot).where(MatchSnapshot.match_id == match.id, MatchSnapshot.seq == seq))
+        match.points_played = seq - 1
+        logger.info(f"Point {seq} of match {match.uuid} was undone")
+        return state
+
+    @staticmethod
+    def archive(db: Session, match: Match) -> None:
+        """
+        Compacts the log of a finished match into `Match.point_history`. The caller commits.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the finished match.
+        """
+        if PointLogService._has_base_snapshot(db, match):
+            return
+        winners = (
+            db.query(MatchPoint.winner)
+            .filter(MatchPoint.match_id == match.id)
+            .order_by(MatchPoint.seq)
+        )
+        match.point_history = point_history_codec.encode(player_num for (player_num,) in winners)
+        db.execute(delete(MatchPoint).where(MatchPoint.match_id == match.id))
+        db.execute(delete(MatchSnapshot).where(MatchSnapshot.match_id == match.id))
+        logger.info(f"Point log of match {match.uuid} archived into {len(match.point_history)} bytes")
+
+    @staticmethod
+    def _has_base_snapshot(db: Session, match: Match) -> bool:
+        # The score of a match that did not start at 0-0 (see the class docstring)
+        return db.scalar(
+            select(MatchSnapshot.id).where(MatchSnapshot.match_id == match.id, MatchSnapshot.seq == 0)
+        ) is not None
+
+    @staticmethod
+    def restore(db: Session, match: Match) -> None:
+        """
+        Moves the archived point history of a match back into the log, so it can be edited. The caller commits.
+
+        :param db: The SQLAlchemy session.
+        :param match: The Match object representing the finished match.
+        :raises InvalidScoreError: If the point history is corrupted.
+        """
+        if match.point_history is None:
+            return
+
+        engine = get_engine(match.match_format)
+        player_nums = list(point_history_codec.decode(match.point_history))
+        states = []
+        state = ScoreState()
+        for player_num in player_nums:
+            state, _ = engine.play(state, player_num)
+            states.append(state)
+
+        match.point_history = None
+        match.points_played = 0
+        PointLogService._append(db, match, player_nums, states)
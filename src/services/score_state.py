@@ -0,0 +1,118 @@
+"""
+Immutable score value type shared by the strategies, score utilities and views.
+"""
+from enum import Enum
+from typing import NamedTuple
+
+from exceptions import InvalidScoreError
+
+
+class GameState(str, Enum):
+    """
+    State of the game being played.
+
+    Members compare equal to their values, which are stored in `Match.current_game_state`.
+    """
+    REGULAR = 'regular'
+    DEUCE = 'deuce'
+    ADVANTAGE_1 = 'advantage_1'
+    ADVANTAGE_2 = 'advantage_2'
+    TIE_BREAK = 'tie_break'
+    FINISHED = 'finished'
+
+    @staticmethod
+    def advantage(player_num: int) -> 'GameState':
+        """
+        Returns the advantage state of the given player.
+
+        :param player_num: The player number (1 or 2).
+        :return: ADVANTAGE_1 or ADVANTAGE_2.
+        """
+        return GameState.ADVANTAGE_1 if player_num == 1 else GameState.ADVANTAGE_2
+
+
+_GAME_STATES = tuple(GameState)
+_GAME_STATE_CODES = {game_state: code for code, game_state in enumerate(_GAME_STATES)}
+_GAME_STATE_BITS = 3
+# Bit width of every counter in the packed form, in field order
+_PACKED_WIDTHS = (10, 10, 5, 5, 3, 3)
+
+
+class ScoreState(NamedTuple):
+    """
+    Score of a match at one moment.
+
+    A slotted tuple, so creating, comparing and hashing a state is cheap and
+    a state can be used directly as a dictionary key. Player-relative fields
+    are read with `points`, `games` and `sets`, which index the tuple by player number.
+    """
+    player1_points: int = 0
+    player2_points: int = 0
+    player1_games: int = 0
+    player2_games: int = 0
+    player1_sets: int = 0
+    player2_sets: int = 0
+    game_state: GameState = GameState.REGULAR
+
+    def points(self, player_num: int) -> int:
+        return self[player_num - 1]  # type: ignore[return-value]
+
+    def games(self, player_num: int) -> int:
+        return self[player_num + 1]  # type: ignore[return-value]
+
+    def sets(self, player_num: int) -> int:
+        return self[player_num + 3]  # type: ignore[return-value]
+
+    def add_point(self, player_num: int) -> 'ScoreState':
+        """
+        Returns a copy of the state with one more point for the given player.
+
+        :param player_num: The player number (1 or 2).
+        :return: The new state.
+        """
+        if player_num == 1:
+            return self._replace(player1_points=self.player1_points + 1)
+        return self._replace(player2_points=self.player2_points + 1)
+
+    def pack(self) -> int:
+        """
+        Packs the state into a single non-negative integer (39 bits).
+
+        :return: The packed state.
+        :raises ValueError: If a counter does not fit into its bit field.
+        """
+        packed = 0
+        for value, width in zip(reversed(self[:6]), reversed(_PACKED_WIDTHS)):
+            if value >> width:
+                raise ValueError(f"Score counter {value} does not fit into {width} bits")
+            packed = (packed << width) | value
+        return (packed << _GAME_STATE_BITS) | _GAME_STATE_CODES[self.game_state]
+
+    @classmethod
+    def unpack(cls, packed: int) -> 'ScoreState':
+        """
+        Restores a state packed with `pack`.
+
+        :param packed: The packed state.
+        :return: The score state.
+        :raises InvalidScoreError: If the packed value is corrupted.
+        """
+        try:
+            game_state = _GAME_STATES[packed & ((1 << _GAME_STATE_BITS) - 1)]
+        except IndexError as e:
+            raise InvalidScoreError("Packed score data is corrupted") from e
+        packed >>= _GAME_STATE_BITS
+        counters: list[int] = []
+        for width in _PACKED_WIDTHS:
+            counters.append(packed & ((1 << width) - 1))
+            packed >>= width
+        player1_points, player2_points, player1_games, player2_games, player1_sets, player2_sets = counters
+        return cls(
+            player1_points=player1_points,
+            player2_points=player2_points,
+            player1_games=player1_games,
+            player2_games=player2_games,
+            player1_sets=player1_sets,
+            player2_sets=player2_sets,
+            game_state=game_state
+        )
@@ -1,100 +1,121 @@
-from config.config import MIN_TIE_BREAK_POINTS, SCORE_DIFF, MIN_SETS, MIN_GAMES
-from models.match import Match
+from itertools import islice
 
-ScoreDict = dict[str, dict[str, int]]
+from config.config import SCORE_DIFF
+from services import point_history_codec
+from services.match_rules import MatchRules, STANDARD_RULES, DEFAULT_FORMAT
+from services.score_state import ScoreState, GameState
 
 
-def process_tie_break(match: Match, score: ScoreDict, player_key: str, opponent_key: str) -> None:
+def process_tie_break(state: ScoreState, player_num: int, rules: MatchRules = STANDARD_RULES) -> ScoreState:
     """
     Processes a point scored during a tie-break game.
 
-    Increases the player's score. If the player scores at least
-    MIN_TIE_BREAK_POINTS points and leads the opponent by at least SCORE_DIFF,
-    the set is reset.
+    Increases the player's score. If the player reaches the tie-break target
+    of the rules and leads the opponent by at least SCORE_DIFF, the set is reset.
 
-    :param match: The Match object representing the current match.
-    :param score: A dictionary representing the current score of the match.
-    :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-    :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+    :param state: The current score of the match.
+    :param player_num: The player number (1 or 2).
+    :param rules: The rules of the match format.
+    :return: The new score of the match.
     """
-    score[player_key]['points'] += 1
-    if (score[player_key]['points'] >= MIN_TIE_BREAK_POINTS and
-            (score[player_key]['points'] - score[opponent_key]['points']) >= SCORE_DIFF):
-        reset_set(match, score, player_key)
+    target = rules.tie_break_target(state.player1_sets, state.player2_sets)
+    state = state.add_point(player_num)
+    points = state.points(player_num)
+    if points >= target and points - state.points(get_opponent_num(player_num)) >= SCORE_DIFF:
+        state = reset_set(state, player_num, rules)
+    return state
 
 
-def get_opponent_key(player_key: str) -> str:
+def get_opponent_num(player_num: int) -> int:
     """
-    Returns the opponent key given the player key.
+    Returns the opponent number given the player number.
 
-    :param player_key: Player key (e.g. 'player1').
-    :return: Opponent key (e.g. 'player2').
+    :param player_num: Player number (1 or 2).
+    :return: Opponent number (2 or 1).
     """
-    return "player2" if player_key == "player1" else "player1"
+    return 3 - player_num
 
 
-def reset_set(match: Match, score: ScoreDict, winner_key: str) -> None:
+def reset_set(state: ScoreState, winner_num: int, rules: MatchRules = STANDARD_RULES) -> ScoreState:
     """
     Resets the score for a set after a winner is determined.
 
-    :param match: The Match object representing the current match.
-    :param score: A dictionary representing the current score of the match.
-    :param winner_key: The key representing the winner of the set (e.g., 'player1').
+    If the rules replace the deciding set with a match tie-break, the new set
+    starts directly in the tie-break.
+
+    :param state: The current score of the match.
+    :param winner_num: The number of the player who won the set.
+    :param rules: The rules of the match format.
+    :return: The new score of the match.
     """
-    score[winner_key]["sets"] += 1
-    score[winner_key]["games"] = 0
-    opponent_key = get_opponent_key(winner_key)
-    score[opponent_key]["games"] = 0
-    score[winner_key]["points"] = 0
-    score[opponent_key]["points"] = 0
-    match.current_game_state = 'regular'
+    if winner_num == 1:
+        sets = (state.player1_sets + 1, state.player2_sets)
+    else:
+        sets = (state.player1_sets, state.player2_sets + 1)
+    game_state = GameState.TIE_BREAK if rules.is_match_tie_break(*sets) else GameState.REGULAR
+    return ScoreState(0, 0, 0, 0, *sets, game_state)
 
 
-def reset_game(score: ScoreDict, winner_key: str) -> None:
+def reset_game(state: ScoreState, winner_num: int) -> ScoreState:
     """
     Resets the score for a game after a winner is determined.
 
-    :param score: A dictionary representing the current score of the match.
-    :param winner_key: The key representing the winner of the game (e.g., 'player1').
+    :param state: The current score of the match.
+    :param winner_num: The number of the player who won the game.
+    :return: The new score of the match.
     """
-    score[winner_key]["games"] += 1
-    score[winner_key]["points"] = 0
-    opponent_key = get_opponent_key(winner_key)
-    score[opponent_key]["points"] = 0
+    if winner_num == 1:
+        return state._replace(player1_points=0, player2_points=0, player1_games=state.player1_games + 1)
+    return state._replace(player1_points=0, player2_points=0, player2_games=state.player2_games + 1)
 
 
-def is_match_finished(score: ScoreDict) -> bool:
+def is_match_finished(state: ScoreState, rules: MatchRules = STANDARD_RULES) -> bool:
     """
     Checks if the match is finished.
 
-    :param score: A dictionary representing the current score of the match.
+    :param state: The current score of the match.
+    :param rules: The rules of the match format.
     :return: True if the match is finished, False otherwise.
     """
-    return score["player1"]["sets"] == MIN_SETS or score["player2"]["sets"] == MIN_SETS
+    return state.player1_sets == rules.sets_to_win or state.player2_sets == rules.sets_to_win
 
 
-def is_set_finished(score: ScoreDict, player_key: str, opponent_key: str) -> bool:
+def is_set_finished(state: ScoreState, player_num: int, rules: MatchRules = STANDARD_RULES) -> bool:
     """
     Checks if a set is finished.
 
-    :param score: A dictionary representing the current score of the match.
-    :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-    :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+    :param state: The current score of the match.
+    :param player_num: The number of the player who scored the last point.
+    :param rules: The rules of the match format.
     :return: True if the set is finished, False otherwise.
     """
-    return (
-            score[player_key]["games"] >= MIN_GAMES and
-            abs(score[player_key]["games"] - score[opponent_key]["games"]) >= SCORE_DIFF
-    )
+    games = state.games(player_num)
+    return games >= rules.games_per_set and abs(games - state.games(get_opponent_num(player_num))) >= SCORE_DIFF
 
 
-def is_tie_break(score: ScoreDict, player_key: str, opponent_key: str) -> bool:
+def is_tie_break(state: ScoreState, rules: MatchRules = STANDARD_RULES) -> bool:
     """
     Checks if a set is at tie-break.
 
-    :param score: A dictionary representing the current score of the match.
-    :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-    :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+    :param state: The current score of the match.
+    :param rules: The rules of the match format.
     :return: True if the set is at tie-break, False otherwise.
     """
-    return score[player_key]["games"] == MIN_GAMES and score[opponent_key]["games"] == MIN_GAMES
+    return state.player1_games == rules.games_per_set and state.player2_games == rules.games_per_set
+
+
+def replay_history(history: bytes, index: int | None = None, match_format: str = DEFAULT_FORMAT) -> ScoreState:
+    """
+    Rebuilds a score by streaming over an encoded point history.
+
+    :param history: The point history encoded with `point_history_codec`.
+    :param index: The number of points to replay (all points by default).
+    :param match_format: The format of the match.
+    :return: The score of the match after `index` points.
+    :raises InvalidScoreError: If the point history is corrupted.
+    :raises MatchFormatError: If the format is unknown.
+    """
+    # The engine is compiled from the strategies, which depend on this module
+    from services.scoring_engine import get_engine
+
+    return get_engine(match_format).play_all(ScoreState(), islice(point_history_codec.decode(history), index))
@@ -0,0 +1,260 @@
+"""
+Precompiled scoring engine.
+
+Every reachable score of a match is enumerated once at import time by playing
+the reference strategies, and the result is stored as a flat transition table.
+Scoring a point is then a single list lookup instead of a strategy dispatch
+followed by the set and match checks.
+
+Each match format is compiled into its own engine once, on first use, so the
+per-point code never looks at the format rules.
+
+Point counts inside deuce and a tie-break can grow without bound, so the table
+stores them normalized (both counters are lowered until the smaller one equals
+the base of the current state). The number of removed points is carried next to
+the state id by the caller and added back when the score is written out.
+"""
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Iterable
+
+from exceptions import InvalidGameStateError, PlayerNumberError
+from services import score_utils
+from services.match_rules import MatchRules, STANDARD_RULES, DEFAULT_FORMAT, MATCH_FORMATS, get_rules
+from services.score_state import ScoreState, GameState
+from services.strategies.advantage_state_strategy import AdvantageStateStrategy
+from services.strategies.deuce_state_strategy import DeuceStateStrategy
+from services.strategies.game_state_strategy import GameStateStrategy
+from services.strategies.regular_state_strategy import RegularStateStrategy, MIN_POINTS
+from services.strategies.tie_break_state_strategy import TieBreakStateStrategy
+
+logger = logging.getLogger(__name__)
+
+_advantage_strategy = AdvantageStateStrategy()
+STATE_STRATEGY: dict[GameState, GameStateStrategy] = {
+    GameState.REGULAR: RegularStateStrategy(),
+    GameState.DEUCE: DeuceStateStrategy(),
+    GameState.TIE_BREAK: TieBreakStateStrategy(),
+    GameState.ADVANTAGE_1: _advantage_strategy,
+    GameState.ADVANTAGE_2: _advantage_strategy,
+}
+
+# Flags stored in the low bits of every transition table entry
+GAME_WON = 1
+SET_WON = 2
+MATCH_WON = 4
+CARRY = 8
+FLAG_BITS = 4
+FLAG_MASK = (1 << FLAG_BITS) - 1
+
+# Table entry of a state that does not accept points (the match is finished)
+NO_TRANSITION = -1
+
+
+def play_reference_point(state: ScoreState, player_num: int, rules: MatchRules = STANDARD_RULES) -> ScoreState:
+    """
+    Adds a point using the strategy classes.
+
+    This is the reference implementation of the scoring rules. The transition
+    table is built from it, so both always agree.
+
+    :param state: The current score of the match.
+    :param player_num: The player number (1 or 2).
+    :param rules: The rules of the match format.
+    :return: The new score of the match.
+    :raises InvalidGameStateError: If the game state does not accept points.
+    """
+    strategy = STATE_STRATEGY.get(state.game_state)
+    if not strategy:
+        raise InvalidGameStateError(f"Unknown game state: {state.game_state.value}")
+
+    state = strategy.add_point(state, player_num, rules)
+
+    if score_utils.is_set_finished(state, player_num, rules):
+        state = score_utils.reset_set(state, player_num, rules)
+
+    if score_utils.is_match_finished(state, rules):
+        state = state._replace(game_state=GameState.FINISHED)
+    return state
+
+
+def _normalize(state: ScoreState, rules: MatchRules) -> tuple[ScoreState, int]:
+    """
+    Lowers both point counters of an endless deuce or tie-break to the state base.
+
+    :param state: The raw score.
+    :param rules: The rules of the match format.
+    :return: A tuple of the normalized score and the number of points removed from each player.
+    """
+    if state.game_state is GameState.TIE_BREAK:
+        base = rules.tie_break_target(state.player1_sets, state.player2_sets) - 1
+    else:
+        base = MIN_POINTS
+    extra = min(state.player1_points, state.player2_points) - base
+    if extra <= 0:
+        return state, 0
+    return state._replace(
+        player1_points=state.player1_points - extra,
+        player2_points=state.player2_points - extra
+    ), extra
+
+
+class ScoringEngine:
+    """
+    Transition table over every reachable (points, games, sets, state) tuple.
+
+    A state is identified by its index in `states`. The entry for a point won by
+    `player_num` in state `state_id` is stored at `(state_id << 1) | (player_num - 1)`
+    and packs the next state id with the GAME_WON / SET_WON / MATCH_WON / CARRY flags.
+
+    :param rules: The rules of the match format the table is compiled for.
+    """
+
+    def __init__(self, rules: MatchRules = STANDARD_RULES) -> None:
+        self.rules = rules
+        initial_state = ScoreState()
+        self.states: list[ScoreState] = [initial_state]
+        self.index: dict[ScoreState, int] = {initial_state: 0}
+        self.table: list[int] = []
+        self._build()
+        logger.info(
+            f"Scoring engine for format '{rules.name}' compiled: "
+            f"{len(self.states)} states, {len(self.table)} transitions"
+        )
+
+    def _build(self) -> None:
+        """
+        Enumerates the reachable states breadth-first, playing each point with the reference strategies.
+        """
+        queue = deque([0])
+        transitions: dict[int, int] = {}
+        while queue:
+            state_id = queue.popleft()
+            state = self.states[state_id]
+            if state.game_state is GameState.FINISHED:
+                transitions[state_id << 1] = NO_TRANSITION
+                transitions[(state_id << 1) | 1] = NO_TRANSITION
+                continue
+
+            for player_num in (1, 2):
+                next_state, extra = _normalize(play_reference_point(state, player_num, self.rules), self.rules)
+
+                flags = CARRY if extra else 0
+                if next_state.sets(player_num) != state.sets(player_num):
+                    flags |= GAME_WON | SET_WON
+                elif next_state.games(player_num) != state.games(player_num):
+                    flags |= GAME_WON
+                if next_state.game_state is GameState.FINISHED:
+                    flags |= MATCH_WON
+
+                next_id = self.index.get(next_state)
+                if next_id is None:
+                    next_id = len(self.states)
+                    self.states.append(next_state)
+                    self.index[next_state] = next_id
+                    queue.append(next_id)
+                transitions[(state_id << 1) | (player_num - 1)] = (next_id << FLAG_BITS) | flags
+
+        self.table = [transitions[i] for i in range(len(self.states) * 2)]
+
+    def encode(self, state: ScoreState) -> tuple[int, int]:
+        """
+        Finds the table state of a score.
+
+        :param state: The current score of the match.
+        :return: A tuple of the state id and the number of points carried outside the table.
+        :raises InvalidGameStateError: If the score is not reachable under the scoring rules.
+        """
+        normalized, extra = _normalize(state, self.rules)
+        state_id = self.index.get(normalized)
+        if state_id is None:
+            raise InvalidGameStateError(f"Unreachable score for game state: {state.game_state.value}")
+        return state_id, extra
+
+    def score_point(self, state_id: int, player_num: int) -> tuple[int, int]:
+        """
+        Looks up the transition for a point.
+
+        :param state_id: The current state id.
+        :param player_num: The player number (1 or 2).
+        :return: A tuple of the next state id and its flags.
+        :raises InvalidGameStateError: If the match is already finished.
+        """
+        entry = self.table[(state_id << 1) | (player_num - 1)]
+        if entry == NO_TRANSITION:
+            raise InvalidGameStateError("Match is already finished")
+        return entry >> FLAG_BITS, entry & FLAG_MASK
+
+    def decode(self, state_id: int, extra: int = 0) -> ScoreState:
+        """
+        Returns the score of a table state with the carried points added back.
+
+        :param state_id: The state id.
+        :param extra: The number of points carried outside the table.
+        :return: The score of the match.
+        """
+        state = self.states[state_id]
+        if not extra:
+            return state
+        return state._replace(
+            player1_points=state.player1_points + extra,
+            player2_points=state.player2_points + extra
+        )
+
+    def play(self, state: ScoreState, player_num: int) -> tuple[ScoreState, int]:
+        """
+        Adds a point to a score.
+
+        :param state: The current score of the match.
+        :param player_num: The player number (1 or 2).
+        :return: A tuple of the new score and the transition flags.
+        :raises PlayerNumberError: If the player number is not 1 or 2.
+        :raises InvalidGameStateError: If the score is unreachable or the match is finished.
+        """
+        if player_num != 1 and player_num != 2:
+            raise PlayerNumberError("Player number must be 1 or 2")
+
+        state_id, extra = self.encode(state)
+        next_id, flags = self.score_point(state_id, player_num)
+        if flags & GAME_WON:
+            extra = 0
+        elif flags & CARRY:
+            extra += 1
+        return self.decode(next_id, extra), flags
+
+    def play_all(self, state: ScoreState, player_nums: Iterable[int]) -> ScoreState:
+        """
+        Adds a sequence of points to a score, walking the table by state id.
+
+        :param state: The current score of the match.
+        :param player_nums: The player numbers (1 or 2) of the point winners, in order.
+        :return: The new score of the match.
+        :raises PlayerNumberError: If a player number is not 1 or 2.
+        :raises InvalidGameStateError: If the score is unreachable or a point follows the end of the match.
+        """
+        state_id, extra = self.encode(state)
+        for player_num in player_nums:
+            if player_num != 1 and player_num != 2:
+                raise PlayerNumberError("Player number must be 1 or 2")
+            state_id, flags = self.score_point(state_id, player_num)
+            if flags & GAME_WON:
+                extra = 0
+            elif flags & CARRY:
+                extra += 1
+        return self.decode(state_id, extra)
+
+
+@lru_cache(maxsize=len(MATCH_FORMATS))
+def get_engine(match_format: str = DEFAULT_FORMAT) -> ScoringEngine:
+    """
+    Returns the scoring engine of a match format, compiling it on first use.
+
+    :param match_format: The name of the format.
+    :return: The scoring engine.
+    :raises MatchFormatError: If the format is unknown.
+    """
+    return ScoringEngine(get_rules(match_format))
+
+
+SCORING_ENGINE = get_engine(DEFAULT_FORMAT)
@@ -1,7 +1,8 @@
 import logging
 
 from exceptions import InvalidGameStateError
-from models.match import Match
+from services.match_rules import MatchRules, STANDARD_RULES
+from services.score_state import ScoreState, GameState
 from services.score_utils import reset_game, is_tie_break
 from services.strategies.game_state_strategy import GameStateStrategy
 
@@ -19,45 +20,35 @@ class AdvantageStateStrategy(GameStateStrategy):
 
     def add_point(
             self,
-            match: Match,
-            score: dict[str, dict[str, int]],
-            player_key: str,
-            opponent_key: str,
-            player_num: int
-    ) -> None:
+            state: ScoreState,
+            player_num: int,
+            rules: MatchRules = STANDARD_RULES
+    ) -> ScoreState:
         """
         Adds a point to the specified player's score and updates the game state.
 
-        :param match: The Match object representing the current match.
-        :param score: A dictionary representing the current score of the match.
-        :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-        :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+        :param state: The current score of the match.
         :param player_num: The player number (1 or 2).
+        :param rules: The rules of the match format.
+        :return: The new score of the match.
         """
-        if not match.current_game_state.startswith('advantage_'):
-            logger.error(f"Invalid game state for AdvantageStateStrategy: {match.current_game_state}")
-            raise InvalidGameStateError(f"Expected advantage state but got: {match.current_game_state}")
-
-        try:
-            current_advantage_player = int(match.current_game_state.split('_')[1])
-        except (IndexError, ValueError) as e:
-            logger.error(
-                f"Error parsing advantage player from game state: {match.current_game_state}",
-                exc_info=True
-            )
-            raise InvalidGameStateError(f"Invalid advantage game state format: {match.current_game_state}") from e
+        if state.game_state is GameState.ADVANTAGE_1:
+            current_advantage_player = 1
+        elif state.game_state is GameState.ADVANTAGE_2:
+            current_advantage_player = 2
+        else:
+            logger.error(f"Invalid game state for AdvantageStateStrategy: {state.game_state}")
+            raise InvalidGameStateError(f"Expected advantage state but got: {state.game_state}")
 
         logger.debug(
             f"Advantage state: current advantage player is {current_advantage_player}, scoring player is {player_num}"
         )
 
         if player_num == current_advantage_player:
-            reset_game(score, player_key)
-            if is_tie_break(score, player_key, opponent_key):
-                match.current_game_state = 'tie_break'
-            else:
-                match.current_game_state = 'regular'
-        else:
-            score[player_key]["points"] += 1
-            match.current_game_state = 'deuce'
-            logger.debug(f"Point for player {player_num} in deuce. Game state reset to deuce.")
+            state = reset_game(state, player_num)
+            if is_tie_break(state, rules):
+                return state._replace(game_state=GameState.TIE_BREAK)
+            return state._replace(game_state=GameState.REGULAR)
+
+        logger.debug(f"Point for player {player_num} in deuce. Game state reset to deuce.")
+        return state.add_point(player_num)._replace(game_state=GameState.DEUCE)
@@ -1,7 +1,10 @@
-from models.match import Match
-from services.strategies.game_state_strategy import GameStateStrategy
 import logging
 
+from services.match_rules import MatchRules, STANDARD_RULES
+from services.score_state import ScoreState, GameState
+from services.score_utils import get_opponent_num, reset_game, is_tie_break
+from services.strategies.game_state_strategy import GameStateStrategy
+
 logger = logging.getLogger(__name__)
 
 class DeuceStateStrategy(GameStateStrategy):
@@ -10,27 +13,33 @@ class DeuceStateStrategy(GameStateStrategy):
 
     This strategy handles point additions when the game is in a deuce state.
     It determines whether a player gains an advantage or if the score remains at deuce.
+    Under no-ad rules the point played at deuce decides the game.
     """
 
     def add_point(
             self,
-            match: Match,
-            score: dict[str, dict[str, int]],
-            player_key: str,
-            opponent_key: str,
-            player_num: int
-    ) -> None:
+            state: ScoreState,
+            player_num: int,
+            rules: MatchRules = STANDARD_RULES
+    ) -> ScoreState:
         """
         Adds a point to the specified player's score and updates the game state.
 
-        :param match: The Match object representing the current match.
-        :param score: A dictionary representing the current score of the match.
-        :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-        :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+        :param state: The current score of the match.
         :param player_num: The player number (1 or 2).
+        :param rules: The rules of the match format.
+        :return: The new score of the match.
         """
-        score[player_key]["points"] += 1
-        logger.debug(f"Player '{player_key}' scored a point.")
-        if score[player_key]["points"] != score[opponent_key]["points"]:
-            match.current_game_state = f'advantage_{player_num}'
-            logger.debug(f"Points differ. Updating game state to: {match.current_game_state}")
+        if rules.no_ad:
+            logger.debug(f"Player {player_num} won the deciding point.")
+            state = reset_game(state, player_num)
+            if is_tie_break(state, rules):
+                return state._replace(game_state=GameState.TIE_BREAK)
+            return state._replace(game_state=GameState.REGULAR)
+
+        state = state.add_point(player_num)
+        logger.debug(f"Player {player_num} scored a point.")
+        if state.points(player_num) != state.points(get_opponent_num(player_num)):
+            state = state._replace(game_state=GameState.advantage(player_num))
+            logger.debug(f"Points differ. Updating game state to: {state.game_state.value}")
+        return state
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
-from models.match import Match
+from services.match_rules import MatchRules, STANDARD_RULES
+from services.score_state import ScoreState
 
 
 class GameStateStrategy(ABC):
@@ -14,19 +15,16 @@ class GameStateStrategy(ABC):
     @abstractmethod
     def add_point(
             self,
-            match: Match,
-            score: dict[str, dict[str, int]],
-            player_key: str,
-            opponent_key: str,
-            player_num: int
-    ) -> None:
+            state: ScoreState,
+            player_num: int,
+            rules: MatchRules = STANDARD_RULES
+    ) -> ScoreState:
         """
         Adds a point to the specified player's score and updates the game state.
 
-        :param match: The Match object representing the current match.
-        :param score: A dictionary representing the current score of the match.
-        :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-        :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+        :param state: The current score of the match.
         :param player_num: The player number (1 or 2).
+        :param rules: The rules of the match format.
+        :return: The new score of the match.
         """
         pass
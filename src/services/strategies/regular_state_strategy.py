@@ -1,5 +1,7 @@
-from models.match import Match
-from services.score_utils import reset_game, SCORE_DIFF, is_tie_break
+from config.config import SCORE_DIFF
+from services.match_rules import MatchRules, STANDARD_RULES
+from services.score_state import ScoreState, GameState
+from services.score_utils import reset_game, is_tie_break, get_opponent_num
 from services.strategies.game_state_strategy import GameStateStrategy
 
 MIN_POINTS = 3
@@ -15,32 +17,27 @@ class RegularStateStrategy(GameStateStrategy):
 
     def add_point(
             self,
-            match: Match,
-            score: dict[str, dict[str, int]],
-            player_key: str,
-            opponent_key: str,
-            player_num: int
-    ) -> None:
+            state: ScoreState,
+            player_num: int,
+            rules: MatchRules = STANDARD_RULES
+    ) -> ScoreState:
         """
         Adds a point to the specified player's score and updates the game state.
 
-        :param match: The Match object representing the current match.
-        :param score: A dictionary representing the current score of the match.
-        :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-        :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+        :param state: The current score of the match.
         :param player_num: The player number (1 or 2).
+        :param rules: The rules of the match format.
+        :return: The new score of the match.
         """
-        score[player_key]["points"] += 1
-        if (
-                score[player_key]["points"] > MIN_POINTS and
-                score[player_key]["points"] - score[opponent_key]["points"] >= SCORE_DIFF
-        ):
-            reset_game(score, player_key)
-            if is_tie_break(score, player_key, opponent_key):
-                match.current_game_state = 'tie_break'
-
-        elif (
-                score[player_key]["points"] == MIN_POINTS and
-                score[opponent_key]["points"] == MIN_POINTS
-        ):
-            match.current_game_state = 'deuce'
+        state = state.add_point(player_num)
+        points = state.points(player_num)
+        opponent_points = state.points(get_opponent_num(player_num))
+        if points > MIN_POINTS and points - opponent_points >= SCORE_DIFF:
+            state = reset_game(state, player_num)
+            if is_tie_break(state, rules):
+                state = state._replace(game_state=GameState.TIE_BREAK)
+
+        elif points == MIN_POINTS and opponent_points == MIN_POINTS:
+            state = state._replace(game_state=GameState.DEUCE)
+
+        return state
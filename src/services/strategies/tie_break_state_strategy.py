@@ -1,4 +1,5 @@
-from models.match import Match
+from services.match_rules import MatchRules, STANDARD_RULES
+from services.score_state import ScoreState
 from services.score_utils import process_tie_break
 from services.strategies.game_state_strategy import GameStateStrategy
 
@@ -13,19 +14,16 @@ class TieBreakStateStrategy(GameStateStrategy):
 
     def add_point(
             self,
-            match: Match,
-            score: dict[str, dict[str, int]],
-            player_key: str,
-            opponent_key: str,
-            player_num: int
-    ) -> None:
+            state: ScoreState,
+            player_num: int,
+            rules: MatchRules = STANDARD_RULES
+    ) -> ScoreState:
         """
         Adds a point to the specified player's score and updates the game state during a tie-break.
 
-        :param match: The Match object representing the current match.
-        :param score: A dictionary representing the current score of the match.
-        :param player_key: The key representing the player in the score dictionary (e.g., 'player1').
-        :param opponent_key: The key representing the opponent in the score dictionary (e.g., 'player2').
+        :param state: The current score of the match.
         :param player_num: The player number (1 or 2).
+        :param rules: The rules of the match format.
+        :return: The new score of the match.
         """
-        process_tie_break(match, score, player_key, opponent_key)
+        return process_tie_break(state, player_num, rules)
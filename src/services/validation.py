@@ -1,9 +1,13 @@
+from math import ceil
+
 from config.config import NAME_PATTERN, MAX_LENGTH, MIN_PAGE
+from models.player import normalize_name
+from services.match_rules import MATCH_FORMATS
 
 
 class Validation:
     """
-    A class containing static methods for validating player names and page numbers.
+    A class containing static methods for validating player names, match formats and page numbers.
     """
 
     @staticmethod
@@ -26,7 +30,8 @@ class Validation:
         if not player_name2:
             errors["player2"] = "The second player name cannot be empty."
 
-        if player_name1 == player_name2:
+        # Names that differ only in case or whitespace belong to the same player
+        if normalize_name(player1_name) == normalize_name(player2_name):
             errors["duplicate"] = "Player names must be different"
 
         def is_valid_name(name: str) -> bool:
@@ -44,6 +49,19 @@ class Validation:
 
         return errors
 
+    @staticmethod
+    def match_format(match_format: str) -> dict[str, str]:
+        """
+        Validates that the match format is one of the known formats.
+
+        :param match_format: The name of the match format.
+        :return: A dictionary containing an error message if validation fails.
+                 Returns an empty dictionary if the format is known.
+        """
+        if match_format not in MATCH_FORMATS:
+            return {"match_format": "Unknown match format."}
+        return {}
+
     @staticmethod
     def correct_page(page: int, total_matches: int, per_page: int) -> int:
         """
@@ -54,7 +72,7 @@ class Validation:
         :param per_page: The number of matches per page.
         :return: The corrected page number if it was out of range, otherwise the original page number.
         """
-        last_page = total_matches // per_page + 1
+        last_page = max(MIN_PAGE, ceil(total_matches / per_page))
         if page < MIN_PAGE:
             return MIN_PAGE
         elif page > last_page:
@@ -0,0 +1,210 @@
+"""
+Exact match win probability.
+
+Player 1 is assumed to win every point independently with probability `p`.
+The probability of winning a game, a tie-break, a set and the match is computed
+by memoized dynamic programming over the rules of the match format (see
+`services.match_rules`), the same rules the strategies implement; an endless
+deuce or tie-break is summed in closed form.
+
+For the scoreboard the probability of every scoring engine state of a format
+is precomputed for a grid of `p` values, so a lookup is one table access.
+"""
+from functools import lru_cache
+
+from config.config import SCORE_DIFF, POINT_WIN_PROBABILITY
+from services.match_rules import MatchRules, STANDARD_RULES, DEFAULT_FORMAT, MATCH_FORMATS
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import get_engine
+from services.strategies.regular_state_strategy import MIN_POINTS
+
+# Number of grid steps between p = 0 and p = 1
+GRID_SIZE = 100
+
+
+@lru_cache(maxsize=None)
+def race_win_probability(
+        points: int,
+        opponent_points: int,
+        target: int,
+        p: float,
+        margin: int = SCORE_DIFF
+) -> float:
+    """
+    Probability of winning a race to `target` points by a margin of `margin`.
+
+    :param points: The points of the player.
+    :param opponent_points: The points of the opponent.
+    :param target: The number of points needed to win (4 for a game, the tie-break points for a tie-break).
+    :param p: The probability that the player wins a point.
+    :param margin: The lead needed to win (SCORE_DIFF, or 1 for a no-ad game).
+    :return: The probability that the player wins the race.
+    """
+    if points >= target and points - opponent_points >= margin:
+        return 1.0
+    if opponent_points >= target and opponent_points - points >= margin:
+        return 0.0
+
+    base = target - 1
+    if margin == SCORE_DIFF and points >= base and opponent_points >= base and abs(points - opponent_points) < margin:
+        # Past the base only the difference matters; normalize so the recursion stays finite
+        shift = min(points, opponent_points) - base
+        points -= shift
+        opponent_points -= shift
+        if points == opponent_points:
+            q = 1.0 - p
+            # Win two points in a row before losing two in a row
+            return p * p / (p * p + q * q)
+
+    return (
+            p * race_win_probability(points + 1, opponent_points, target, p, margin) +
+            (1.0 - p) * race_win_probability(points, opponent_points + 1, target, p, margin)
+    )
+
+
+def _game_margin(rules: MatchRules) -> int:
+    return 1 if rules.no_ad else SCORE_DIFF
+
+
+@lru_cache(maxsize=None)
+def set_win_probability(games: int, opponent_games: int, p: float, rules: MatchRules = STANDARD_RULES) -> float:
+    """
+    Probability of winning a set from the given game score, at the start of a game.
+
+    :param games: The games of the player.
+    :param opponent_games: The games of the opponent.
+    :param p: The probability that the player wins a point.
+    :param rules: The rules of the match format.
+    :return: The probability that the player wins the set.
+    """
+    if games >= rules.games_per_set and games - opponent_games >= SCORE_DIFF:
+        return 1.0
+    if opponent_games >= rules.games_per_set and opponent_games - games >= SCORE_DIFF:
+        return 0.0
+    if games == rules.games_per_set and opponent_games == rules.games_per_set:
+        return race_win_probability(0, 0, rules.tie_break_points, p)
+
+    game = race_win_probability(0, 0, MIN_POINTS + 1, p, _game_margin(rules))
+    return (
+            game * set_win_probability(games + 1, opponent_games, p, rules) +
+            (1.0 - game) * set_win_probability(games, opponent_games + 1, p, rules)
+    )
+
+
+@lru_cache(maxsize=None)
+def match_win_probability_from_sets(
+        sets: int,
+        opponent_sets: int,
+        p: float,
+        rules: MatchRules = STANDARD_RULES
+) -> float:
+    """
+    Probability of winning the match from the given set score, at the start of a set.
+
+    :param sets: The sets of the player.
+    :param opponent_sets: The sets of the opponent.
+    :param p: The probability that the player wins a point.
+    :param rules: The rules of the match format.
+    :return: The probability that the player wins the match.
+    """
+    if sets >= rules.sets_to_win:
+        return 1.0
+    if opponent_sets >= rules.sets_to_win:
+        return 0.0
+
+    if rules.is_match_tie_break(sets, opponent_sets):
+        set_ = race_win_probability(0, 0, rules.tie_break_target(sets, opponent_sets), p)
+    else:
+        set_ = set_win_probability(0, 0, p, rules)
+    return (
+            set_ * match_win_probability_from_sets(sets + 1, opponent_sets, p, rules) +
+            (1.0 - set_) * match_win_probability_from_sets(sets, opponent_sets + 1, p, rules)
+    )
+
+
+def _match_win_probability_from_games(
+        state: ScoreState,
+        games: int,
+        opponent_games: int,
+        p: float,
+        rules: MatchRules
+) -> float:
+    set_ = set_win_probability(games, opponent_games, p, rules)
+    return (
+            set_ * match_win_probability_from_sets(state.player1_sets + 1, state.player2_sets, p, rules) +
+            (1.0 - set_) * match_win_probability_from_sets(state.player1_sets, state.player2_sets + 1, p, rules)
+    )
+
+
+def compute_match_win_probability(state: ScoreState, p: float, rules: MatchRules = STANDARD_RULES) -> float:
+    """
+    Computes the probability that player 1 wins the match from the given score.
+
+    :param state: The current score of the match.
+    :param p: The probability that player 1 wins a point.
+    :param rules: The rules of the match format.
+    :return: The probability that player 1 wins the match.
+    """
+    if state.game_state is GameState.FINISHED:
+        return 1.0 if state.player1_sets > state.player2_sets else 0.0
+
+    sets, opponent_sets = state.player1_sets, state.player2_sets
+    if state.game_state is GameState.TIE_BREAK:
+        target = rules.tie_break_target(sets, opponent_sets)
+        tie_break = race_win_probability(state.player1_points, state.player2_points, target, p)
+        return (
+                tie_break * match_win_probability_from_sets(sets + 1, opponent_sets, p, rules) +
+                (1.0 - tie_break) * match_win_probability_from_sets(sets, opponent_sets + 1, p, rules)
+        )
+
+    game = race_win_probability(state.player1_points, state.player2_points, MIN_POINTS + 1, p, _game_margin(rules))
+    games, opponent_games = state.player1_games, state.player2_games
+    return (
+            game * _match_win_probability_from_games(state, games + 1, opponent_games, p, rules) +
+            (1.0 - game) * _match_win_probability_from_games(state, games, opponent_games + 1, p, rules)
+    )
+
+
+@lru_cache(maxsize=(GRID_SIZE + 1) * len(MATCH_FORMATS))
+def _grid_row(match_format: str, grid_index: int) -> tuple[float, ...]:
+    """
+    Returns the match win probability of every scoring engine state of a format for one grid value of p.
+
+    :param match_format: The name of the match format.
+    :param grid_index: The index of p in the grid (p = grid_index / GRID_SIZE).
+    :return: The probabilities, indexed by state id.
+    """
+    engine = get_engine(match_format)
+    p = grid_index / GRID_SIZE
+    return tuple(compute_match_win_probability(state, p, engine.rules) for state in engine.states)
+
+
+def match_win_probability(
+        state: ScoreState,
+        p: float = POINT_WIN_PROBABILITY,
+        match_format: str = DEFAULT_FORMAT
+) -> float:
+    """
+    Looks up the probability that player 1 wins the match, with p rounded to the grid.
+
+    The probability of player 2 is one minus the result.
+
+    :param state: The current score of the match.
+    :param p: The probability that player 1 wins a point.
+    :param match_format: The name of the match format.
+    :return: The probability that player 1 wins the match.
+    :raises InvalidGameStateError: If the score is not reachable under the scoring rules.
+    :raises MatchFormatError: If the format is unknown.
+    """
+    state_id, _ = get_engine(match_format).encode(state)
+    return _grid_row(match_format, round(min(max(p, 0.0), 1.0) * GRID_SIZE))[state_id]
+
+
+def precompute(p: float = POINT_WIN_PROBABILITY) -> None:
+    """
+    Fills the table row of every match format for the given p, so the scoreboard lookups never compute a row.
+
+    :param p: The probability that player 1 wins a point.
+    """
+    for match_format in MATCH_FORMATS:
+        _grid_row(match_format, round(min(max(p, 0.0), 1.0) * GRID_SIZE))
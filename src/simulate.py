@@ -0,0 +1,173 @@
+"""
+Monte Carlo match simulator.
+
+Plays many matches at once under the scoring rules of a match format compiled
+into its scoring engine. The state of every simulated match is one id in a NumPy array, and one
+step advances all unfinished matches by a point with a vectorized lookup into
+the transition table. Large runs are split into shards played in a process pool.
+
+Usage:
+    python -m simulate --matches 1000000 --p 0.52 --workers 4 --format best_of_5
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from services.match_rules import DEFAULT_FORMAT, MATCH_FORMATS
+from services.scoring_engine import ScoringEngine, get_engine, FLAG_BITS, NO_TRANSITION
+
+# Matches simulated by one process pool task
+SHARD_SIZE = 250_000
+
+
+@dataclass
+class SimulationResult:
+    """
+    Aggregated outcome of simulated matches.
+    """
+    matches: int = 0
+    player1_wins: int = 0
+    total_points: int = 0
+    set_scores: dict[tuple[int, int], int] = field(default_factory=dict)
+
+    def merge(self, other: 'SimulationResult') -> None:
+        self.matches += other.matches
+        self.player1_wins += other.player1_wins
+        self.total_points += other.total_points
+        for set_score, count in other.set_scores.items():
+            self.set_scores[set_score] = self.set_scores.get(set_score, 0) + count
+
+
+def _transition_arrays(engine: ScoringEngine) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the NumPy form of a scoring engine table.
+
+    :param engine: The scoring engine of the match format.
+    :return: A tuple of the next-state array of shape (states, 2) and the finished-state mask.
+    """
+    table = np.array(engine.table, dtype=np.int64).reshape(-1, 2)
+    finished = table[:, 0] == NO_TRANSITION
+    next_state = (table >> FLAG_BITS).astype(np.int32)
+    # Finished states loop onto themselves, so they can stay in the batch
+    next_state[finished] = np.flatnonzero(finished)[:, None]
+    return next_state, finished
+
+
+def simulate_matches(
+        matches: int,
+        p: float,
+        seed: int | None = None,
+        match_format: str = DEFAULT_FORMAT
+) -> SimulationResult:
+    """
+    Simulates matches in the current process.
+
+    :param matches: The number of matches to simulate.
+    :param p: The probability that player 1 wins a point.
+    :param seed: The seed of the random generator.
+    :param match_format: The name of the match format.
+    :return: The aggregated outcome.
+    """
+    engine = get_engine(match_format)
+    next_state, finished = _transition_arrays(engine)
+    rng = np.random.default_rng(seed)
+    states = np.zeros(matches, dtype=np.int32)
+    points = np.zeros(matches, dtype=np.int32)
+    active = np.arange(matches)
+
+    while active.size:
+        # Column 0 is a point for player 1, column 1 a point for player 2
+        winners = (rng.random(active.size) >= p).astype(np.int8)
+        states[active] = next_state[states[active], winners]
+        points[active] += 1
+        active = active[~finished[states[active]]]
+
+    result = SimulationResult(matches=matches, total_points=int(points.sum()))
+    final_states, counts = np.unique(states, return_counts=True)
+    for state_id, count in zip(final_states.tolist(), counts.tolist()):
+        state = engine.states[state_id]
+        if state.player1_sets > state.player2_sets:
+            result.player1_wins += count
+        result.set_scores[(state.player1_sets, state.player2_sets)] = count
+    return result
+
+
+def _run_shard(args: tuple[int, float, int, str]) -> SimulationResult:
+    matches, p, seed, match_format = args
+    return simulate_matches(matches, p, seed, match_format)
+
+
+def simulate(
+        matches: int,
+        p: float,
+        workers: int = 1,
+        seed: int | None = None,
+        match_format: str = DEFAULT_FORMAT
+) -> SimulationResult:
+    """
+    Simulates matches, sharding the work across a process pool.
+
+    :param matches: The number of matches to simulate.
+    :param p: The probability that player 1 wins a point.
+    :param workers: The number of worker processes (1 runs everything in this process).
+    :param seed: The seed from which the seeds of all shards are derived.
+    :param match_format: The name of the match format.
+    :return: The aggregated outcome.
+    """
+    shard_sizes = [SHARD_SIZE] * (matches // SHARD_SIZE)
+    if matches % SHARD_SIZE:
+        shard_sizes.append(matches % SHARD_SIZE)
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(len(shard_sizes))]
+    shards = [(size, p, shard_seed, match_format) for size, shard_seed in zip(shard_sizes, seeds)]
+
+    result = SimulationResult()
+    if workers <= 1:
+        for shard in shards:
+            result.merge(_run_shard(shard))
+        return result
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for shard_result in executor.map(_run_shard, shards):
+            result.merge(shard_result)
+    return result
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def _probability(value: str) -> float:
+    number = float(value)
+    if not 0 <= number <= 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a probability between 0 and 1")
+    return number
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate tennis matches under the scoreboard scoring rules.")
+    parser.add_argument("--matches", type=_positive_int, default=100_000, help="number of matches to simulate")
+    parser.add_argument("--p", type=_probability, default=0.5, help="probability that player 1 wins a point")
+    parser.add_argument("--workers", type=_positive_int, default=1, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--format", choices=sorted(MATCH_FORMATS), default=DEFAULT_FORMAT, help="match format")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = simulate(args.matches, args.p, args.workers, args.seed, args.format)
+    elapsed = time.perf_counter() - started
+
+    print(f"Matches: {result.matches} in {elapsed:.2f}s ({result.matches / elapsed:,.0f} matches/s)")
+    print(f"Player 1 wins: {result.player1_wins / result.matches:.4f}")
+    print(f"Average points per match: {result.total_points / result.matches:.1f}")
+    for (player1_sets, player2_sets), count in sorted(result.set_scores.items()):
+        print(f"Sets {player1_sets}-{player2_sets}: {count / result.matches:.4f}")
+
+
+if __name__ == '__main__':
+    main()
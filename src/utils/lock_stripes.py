@@ -0,0 +1,32 @@
+import threading
+
+from config.config import MATCH_LOCK_STRIPES
+
+
+class LockStripes:
+    """
+    A fixed table of locks shared by keys through a hash.
+
+    The same key always gets the same lock, so the work on one key is serialized,
+    while keys on different stripes run in parallel. Two keys may share a stripe;
+    the memory used does not grow with the number of keys.
+
+    :param stripes: The number of locks.
+    """
+
+    def __init__(self, stripes: int = MATCH_LOCK_STRIPES) -> None:
+        if stripes < 1:
+            raise ValueError("The number of lock stripes must be positive")
+        self._locks = tuple(threading.Lock() for _ in range(stripes))
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def lock_for(self, key: str) -> threading.Lock:
+        """
+        Returns the lock of a key.
+
+        :param key: The key, for example the UUID of a match.
+        :return: The lock of the stripe of the key.
+        """
+        return self._locks[hash(key) % len(self._locks)]
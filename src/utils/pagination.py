@@ -0,0 +1,40 @@
+import base64
+import binascii
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """
+    Position of a keyset page in a list ordered by id.
+
+    A forward cursor selects the rows after `row_id`, a backward cursor the rows before it.
+    """
+    row_id: int
+    forward: bool = True
+
+    def encode(self) -> str:
+        """
+        Returns the opaque URL-safe token of the cursor.
+
+        :return: The token.
+        """
+        raw = f"{'n' if self.forward else 'p'}{self.row_id}".encode('ascii')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode(cls, token: str) -> 'PageCursor':
+        """
+        Parses a token created by `encode`.
+
+        :param token: The token.
+        :return: The cursor.
+        :raises ValueError: If the token is malformed.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('ascii')
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed page cursor: {token}") from e
+        if len(raw) < 2 or raw[0] not in 'np' or not raw[1:].isdigit():
+            raise ValueError(f"Malformed page cursor: {token}")
+        return cls(int(raw[1:]), raw[0] == 'n')
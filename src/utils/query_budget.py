@@ -0,0 +1,61 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Generator
+
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryCount:
+    """
+    The SQL statements executed within a `count_queries` block.
+
+    :param budget: The number of statements allowed, or None for no limit.
+    """
+    budget: int | None = None
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def exceeded(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+
+_current: ContextVar[QueryCount | None] = ContextVar('query_count', default=None)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_statement(conn: Any, cursor: Any, statement: str, *args: Any) -> None:
+    query_count = _current.get()
+    if query_count is not None:
+        query_count.statements.append(statement)
+
+
+@contextmanager
+def count_queries(budget: int | None = None, label: str = 'block') -> Generator[QueryCount, None, None]:
+    """
+    Counts the SQL statements executed by the current thread (or task) within the block,
+    on any engine. A warning with the statements is logged when the budget is exceeded.
+
+    :param budget: The number of statements allowed, or None for no limit.
+    :param label: The name of the block in the warning, for example the request.
+    :return: The count, updated while the block runs.
+    """
+    query_count = QueryCount(budget)
+    token = _current.set(query_count)
+    try:
+        yield query_count
+    finally:
+        _current.reset(token)
+        if query_count.exceeded:
+            logger.warning(
+                f"{label} executed {query_count.count} SQL statements, over the budget of {budget}: "
+                f"{query_count.statements}"
+            )
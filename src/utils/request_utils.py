@@ -1,3 +1,4 @@
+import json
 from typing import Any
 from urllib.parse import parse_qs
 
@@ -12,4 +13,35 @@ def parse_form_data(environ: dict[str, Any]) -> dict[str, str]:
     content_length = int(environ.get('CONTENT_LENGTH', 0))
     post_data_bytes = environ['wsgi.input'].read(content_length).decode('utf-8')
     params = parse_qs(post_data_bytes)
-    return {k: v[0] if v else '' for k, v in params.items()}
\ No newline at end of file
+    return {k: v[0] if v else '' for k, v in params.items()}
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Checks whether an If-None-Match header matches an entity tag, with the weak comparison the header uses.
+
+    :param if_none_match: The value of the If-None-Match header
+    :param etag: The current entity tag
+    :return: True if the cached representation of the client is current
+    """
+    if if_none_match.strip() == '*':
+        return True
+    tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+    return etag.removeprefix('W/') in tags
+
+
+def parse_request_data(environ: dict[str, Any]) -> dict[str, Any]:
+    """
+    Parse the request body from WSGI environ object as JSON or form data, depending on its content type.
+
+    :param environ: WSGI environment dictionary
+    :return: Dictionary with the request parameters
+    :raises ValueError: If a JSON body is malformed or is not an object
+    """
+    if not environ.get('CONTENT_TYPE', '').startswith('application/json'):
+        return parse_form_data(environ)
+
+    content_length = int(environ.get('CONTENT_LENGTH', 0) or 0)
+    data = json.loads(environ['wsgi.input'].read(content_length).decode('utf-8') or '{}')
+    if not isinstance(data, dict):
+        raise ValueError("JSON body must be an object")
+    return data
@@ -1,9 +1,10 @@
 import logging
-import os
-from typing import Any
+from typing import Any, Iterator
 
-from jinja2 import FileSystemLoader, Environment
+from jinja2 import Environment
 
+from config.config import TEMPLATE_STREAM_CHUNK_SIZE
+from views.environment import ENVIRONMENT
 from views.template_name import TemplateName
 
 logger = logging.getLogger(__name__)
@@ -11,10 +12,7 @@ logger = logging.getLogger(__name__)
 
 class BaseView:
     def __init__(self) -> None:
-        template_path = os.path.join(os.path.dirname(__file__), '../templates')
-        loader = FileSystemLoader(searchpath=template_path, encoding='utf-8')
-        self.env = Environment(loader=loader, autoescape=True)
-        logger.debug(f"Initialized Jinja2 Environment with template path: {template_path}")
+        self.env: Environment = ENVIRONMENT
 
     def render_template(self, template_name: TemplateName, context: dict[str, Any] | None = None) -> str:
         """
@@ -32,5 +30,50 @@ class BaseView:
             logger.critical(f"Template not found: {template_name.value}")
             return "Error rendering template"
 
+    def stream_template(
+            self,
+            template_name: TemplateName,
+            context: dict[str, Any] | None = None,
+            chunk_size: int = TEMPLATE_STREAM_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Renders a template as it is iterated, in UTF-8 encoded chunks, to be returned as a WSGI response body.
+
+        The page is never held in memory as a whole. The template is loaded before the first
+        chunk is requested, so a missing template is reported before the response starts; an error
+        while rendering happens after the headers are sent, so it is logged and aborts the response.
+
+        :param template_name: The TemplateName enum member representing the template to render.
+        :param context: A dictionary containing the data to be passed to the template.
+        :param chunk_size: The number of characters collected into one chunk.
+        :return: An iterator over the encoded chunks, or over an error message if the template is not found.
+        """
+        context = context or {}
+        try:
+            template = self.env.get_template(template_name.value)
+        except Exception:
+            logger.critical(f"Template not found: {template_name.value}")
+            return iter([b"Error rendering template"])
+        return self._encode_chunks(template_name, template.generate(**context), chunk_size)
+
+    @staticmethod
+    def _encode_chunks(template_name: TemplateName, parts: Iterator[str], chunk_size: int) -> Iterator[bytes]:
+        # Jinja yields many short strings; they are joined so each chunk is worth a write
+        buffer: list[str] = []
+        size = 0
+        try:
+            for part in parts:
+                buffer.append(part)
+                size += len(part)
+                if size >= chunk_size:
+                    yield ''.join(buffer).encode('utf-8')
+                    buffer.clear()
+                    size = 0
+        except Exception:
+            logger.critical(f"Error while rendering template: {template_name.value}", exc_info=True)
+            raise
+        if buffer:
+            yield ''.join(buffer).encode('utf-8')
+
     def render_error_page(self, context: dict[str, str | None]) -> str:
         return self.render_template(TemplateName.ERROR_PAGE, context)
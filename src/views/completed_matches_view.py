@@ -1,3 +1,5 @@
+from typing import Any, Iterator
+
 from views.base_view import BaseView
 from views.template_name import TemplateName
 
@@ -13,5 +15,5 @@ class CompletedMatchesView(BaseView):
         """
         super().__init__()
 
-    def render_completed_matches(self, context: dict[str, int | str | list[dict[str, str]]]) -> str:
-        return self.render_template(TemplateName.COMPLETED_MATCHES, context)
+    def stream_completed_matches(self, context: dict[str, Any]) -> Iterator[bytes]:
+        return self.stream_template(TemplateName.COMPLETED_MATCHES, context)
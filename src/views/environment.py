@@ -0,0 +1,83 @@
+import logging
+import os
+from enum import Enum
+
+from jinja2 import (
+    BaseLoader,
+    BytecodeCache,
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+)
+
+from config.config import TEMPLATE_AUTO_RELOAD, TEMPLATE_CACHE_DIR, TEMPLATE_MODULES_DIR
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '../templates')
+
+
+class TennisPoint(Enum):
+    LOVE = 0
+    FIFTEEN = 15
+    THIRTY = 30
+    FORTY = 40
+
+
+def tennis_points(points: int) -> str:
+    return {
+        0: f'{TennisPoint.LOVE.value}',
+        1: f'{TennisPoint.FIFTEEN.value}',
+        2: f'{TennisPoint.THIRTY.value}',
+        3: f'{TennisPoint.FORTY.value}'
+    }.get(points, f'{TennisPoint.FORTY.value}')
+
+
+def tie_break_points(points: int) -> str:
+    return f'{points}'
+
+
+def create_environment(
+        auto_reload: bool = TEMPLATE_AUTO_RELOAD,
+        cache_dir: str | None = TEMPLATE_CACHE_DIR,
+        modules_dir: str | None = TEMPLATE_MODULES_DIR
+) -> Environment:
+    """
+    Creates a Jinja2 environment for the templates of the application, with their filters.
+
+    Templates precompiled into `modules_dir` (see `views.precompile`) are loaded as Python
+    modules; the others are compiled from the template files, through the bytecode cache.
+
+    :param auto_reload: Whether a template file is checked for changes on every use.
+    :param cache_dir: The directory of the compiled template bytecode, kept across restarts;
+                      None uses Jinja's private per-user temporary directory and '' disables the cache.
+    :param modules_dir: The directory of the precompiled templates, or None.
+    :return: The environment.
+    """
+    loader: BaseLoader = FileSystemLoader(searchpath=TEMPLATE_PATH, encoding='utf-8')
+    if modules_dir is not None:
+        if os.path.isdir(modules_dir):
+            loader = ChoiceLoader([ModuleLoader(modules_dir), loader])
+            logger.info(f"Loading precompiled templates from {modules_dir}")
+        else:
+            logger.warning(f"Precompiled templates directory {modules_dir} not found, compiling templates")
+
+    bytecode_cache: BytecodeCache | None = None
+    if cache_dir is None:
+        # Jinja creates the directory for the current user only and refuses one owned by another user
+        bytecode_cache = FileSystemBytecodeCache()
+    elif cache_dir:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    env = Environment(loader=loader, autoescape=True, auto_reload=auto_reload, bytecode_cache=bytecode_cache)
+    env.filters['tennis_points'] = tennis_points
+    env.filters['tie_break_points'] = tie_break_points
+    logger.debug(f"Initialized Jinja2 Environment with template path: {TEMPLATE_PATH}")
+    return env
+
+
+# The environment shared by all views of the process, so templates are compiled and cached once
+ENVIRONMENT = create_environment()
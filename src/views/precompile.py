@@ -0,0 +1,37 @@
+"""
+Precompiles the templates into Python modules, as a build step.
+
+The application loads the modules instead of compiling the template files when
+TEMPLATE_MODULES_DIR is set to the output directory.
+
+Usage:
+    python -m views.precompile ../build/templates
+"""
+import argparse
+
+from views.environment import create_environment
+
+
+def precompile(target: str) -> list[str]:
+    """
+    Compiles all templates into `target`, including the layouts the pages extend.
+
+    :param target: The output directory.
+    :return: The names of the compiled templates.
+    """
+    env = create_environment(cache_dir='', modules_dir=None)
+    env.compile_templates(target, extensions=['html'], zip=None, ignore_errors=False)
+    return env.list_templates(extensions=['html'])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompile the templates into Python modules.")
+    parser.add_argument("target", help="output directory of the compiled templates")
+    args = parser.parse_args(argv)
+
+    names = precompile(args.target)
+    print(f"Compiled {len(names)} templates into {args.target}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,25 @@
 import logging
 import os
-from typing import Any, Callable
+from typing import Any, Callable, Iterable
 
 from whitenoise import WhiteNoise
 
+from config.config import QUERY_BUDGET_PER_REQUEST
 from controllers.completed_matches_controller import CompletedMatchesController
 from controllers.home_controller import HomeController
 from controllers.match_controller import MatchController
+from utils.query_budget import count_queries
 
 logger = logging.getLogger(__name__)
 
+# A controller method handling the requests of a route: (environ, start_response) -> response body
+Handler = Callable[[dict[str, Any], Callable[[str, list[tuple[str, str]]], None]], Iterable[bytes]]
+
 home_controller = HomeController()
 match_controller = MatchController()
 completed_matches_controller = CompletedMatchesController()
 
-routes = {
+routes: dict[str, dict[str, Handler]] = {
     "GET": {
         "/": home_controller.index,
         "/index": home_controller.index,
@@ -33,6 +38,8 @@ def application(environ: dict[str, Any], start_response: Callable[[str, list[tup
     """
     WSGI application that handles routing and request processing.
 
+    A request executing more than QUERY_BUDGET_PER_REQUEST SQL statements is logged.
+
     :param environ: A dictionary containing the WSGI environment variables.
     :param start_response: A callable used to begin the HTTP response.
     :return: A list of bytes representing the response body.
@@ -44,7 +51,8 @@ def application(environ: dict[str, Any], start_response: Callable[[str, list[tup
 
         handler = routes.get(method, {}).get(path)
         if handler:
-            return handler(environ, start_response)
+            with count_queries(QUERY_BUDGET_PER_REQUEST, label=f"{method} {path}"):
+                return handler(environ, start_response)
         else:
             logger.warning(f"404 Not Found: {method} {path}")
             start_response("404 Not Found", [("Content-Type", "text/plain")])
@@ -1,9 +1,51 @@
-import json
+import io
 import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Generator, Iterable
 
 import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from models.base import Base
 from models.match import Match
+from models.match_point import MatchPoint, MatchSnapshot  # noqa
+from models.player import Player
+from services.match_count_service import MATCH_COUNTS
+from services.page_cache_service import LISTING_PAGES
+from services.score_state import ScoreState, GameState
+
+
+@pytest.fixture(autouse=True)
+def clear_match_counts() -> Generator[None, None, None]:
+    """
+    Fixture that drops the completed match counts and listing pages cached by the previous test,
+    which used another database.
+    """
+    MATCH_COUNTS.clear()
+    LISTING_PAGES.clear()
+    yield
+
+
+class FakeClock:
+    """
+    A monotonic clock the tests move by setting `now`, in seconds.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """
+    Fixture that provides a clock stopped at 0, for the services taking a `clock` callable.
+    """
+    return FakeClock()
 
 
 @pytest.fixture
@@ -15,27 +57,121 @@ def match() -> Match:
         uuid=str(uuid.uuid4()),
         player1_id=1,
         player2_id=2,
-        score=json.dumps({
-            "player1": {"sets": 0, "games": 0, "points": 0},
-            "player2": {"sets": 0, "games": 0, "points": 0}
-        }),
-        current_game_state='regular'
+        current_game_state=GameState.REGULAR
     )
 
 
-def setup_score(match: Match, initial_score: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]:
+@pytest.fixture
+def db() -> Generator[Session, None, None]:
+    """
+    Fixture that provides a session bound to an empty in-memory SQLite database.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def session_factory() -> Generator[Callable[[], ContextManager[Session]], None, None]:
+    """
+    Fixture that provides a `get_db`-like session factory over one in-memory SQLite database with two players.
+    """
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autoflush=False, bind=engine)
+
+    @contextmanager
+    def get_db() -> Generator[Session, None, None]:
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    with get_db() as db:
+        db.add_all([Player(name="Roger"), Player(name="Rafael")])
+        db.commit()
+    yield get_db
+    engine.dispose()
+
+
+@pytest.fixture
+def stored_match(db: Session) -> Match:
+    """
+    Fixture that stores two players and a new match between them in the `db` session.
+    """
+    player1 = Player(name="Roger")
+    player2 = Player(name="Rafael")
+    db.add_all([player1, player2])
+    db.flush()
+    new_match = Match(uuid=str(uuid.uuid4()), player1_id=player1.id, player2_id=player2.id)
+    db.add(new_match)
+    db.commit()
+    return new_match
+
+
+def setup_score(initial_score: dict[str, dict[str, int]], game_state: str = 'regular') -> ScoreState:
     """
     Sets up the score for a match based on the given initial score.
 
-    :param match: The `Match` object to set up the score for.
     :param initial_score: A dictionary representing the initial score for the players.
                           Example: {"player1": {"points": 1, "games": 2}, "player2": {"sets": 1}}
-    :return: A dictionary representing the updated score.
-    """
-    score: dict[str, dict[str, int]] = json.loads(match.score)
-    for player in ["player1", "player2"]:
-        if player in initial_score:
-            for key in ["points", "games", "sets"]:
-                if key in initial_score[player]:
-                    score[player][key] = initial_score[player][key]
-    return score
+    :param game_state: The game state of the score.
+    :return: A `ScoreState` with the given values and zeros elsewhere.
+    """
+    player1 = initial_score.get("player1", {})
+    player2 = initial_score.get("player2", {})
+    return ScoreState(
+        player1_points=player1.get("points", 0),
+        player2_points=player2.get("points", 0),
+        player1_games=player1.get("games", 0),
+        player2_games=player2.get("games", 0),
+        player1_sets=player1.get("sets", 0),
+        player2_sets=player2.get("sets", 0),
+        game_state=GameState(game_state)
+    )
+
+
+Handler = Callable[[dict[str, Any], Callable[[str, list[tuple[str, str]]], None]], Iterable[bytes]]
+
+
+def call_wsgi(
+        handler: Handler,
+        method: str = 'GET',
+        query: str = '',
+        body: bytes = b'',
+        content_type: str = 'application/x-www-form-urlencoded',
+        **headers: str
+) -> tuple[str, dict[str, str], bytes]:
+    """
+    Calls a controller like the WSGI server does.
+
+    :param handler: The controller method.
+    :param method: The HTTP method.
+    :param query: The query string.
+    :param body: The request body.
+    :param content_type: The content type of the body.
+    :param headers: The request headers, as WSGI environ keys (HTTP_IF_NONE_MATCH=...).
+    :return: The status, the response headers and the response body.
+    """
+    environ = {
+        'REQUEST_METHOD': method,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': content_type,
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        **headers
+    }
+    response: dict[str, Any] = {}
+
+    def start_response(status: str, response_headers: list[tuple[str, str]]) -> None:
+        response['status'] = status
+        response['headers'] = dict(response_headers)
+
+    response_body = b''.join(handler(environ, start_response))
+    return response['status'], response['headers'], response_body
@@ -0,0 +1,83 @@
+import pytest
+
+import benchmark
+from benchmark import BenchmarkResult
+
+
+def _result(ops_per_sec: float = 1000.0, p95_us: float = 10.0, peak_alloc_bytes: float = 500.0) -> BenchmarkResult:
+    return BenchmarkResult('engine', ops_per_sec, 5.0, p95_us, 20.0, peak_alloc_bytes)
+
+
+class TestBenchmark:
+    """
+    Tests for the benchmark suite.
+    """
+
+    def test_in_memory_benchmarks_run(self) -> None:
+        """
+        Tests that the in-memory benchmarks produce a measurement for the engine and every strategy.
+        """
+        results = [benchmark.bench_scoring_engine(200), *benchmark.bench_strategies(200)]
+
+        assert [result.name for result in results] == [
+            'scoring_engine.play',
+            'strategy.regular',
+            'strategy.deuce',
+            'strategy.tie_break',
+            'strategy.advantage_1',
+            'strategy.advantage_2',
+        ]
+        for result in results:
+            assert result.ops_per_sec > 0
+            assert 0 < result.p50_us <= result.p95_us <= result.p99_us
+
+    def test_add_point_benchmark_runs(self) -> None:
+        """
+        Tests that the database benchmark plays past the end of a match.
+        """
+        result = benchmark.bench_add_point(300)
+
+        assert result.ops_per_sec > 0
+        assert result.peak_alloc_bytes > 0
+
+    def test_post_benchmark_restores_session_bind(self) -> None:
+        """
+        Tests that the request benchmark binds the application session factory back to its engine.
+        """
+        from database import session
+
+        engine = session.SessionLocal.kw['bind']
+
+        result = benchmark.bench_match_score_post(100)
+
+        assert result.ops_per_sec > 0
+        assert session.SessionLocal.kw['bind'] is engine
+
+    @pytest.mark.parametrize(
+        "result, regressions",
+        [
+            (_result(), 0),
+            (_result(ops_per_sec=800.0, p95_us=12.0, peak_alloc_bytes=600.0), 0),
+            (_result(ops_per_sec=700.0), 1),
+            (_result(p95_us=13.0), 1),
+            (_result(peak_alloc_bytes=700.0), 1),
+            (_result(ops_per_sec=10.0, p95_us=100.0, peak_alloc_bytes=5000.0), 3),
+        ],
+        ids=["Same", "WithinThreshold", "Throughput", "Latency", "Allocations", "All"]
+    )
+    def test_compare(self, result: BenchmarkResult, regressions: int) -> None:
+        """
+        Tests that only changes beyond the threshold are reported.
+
+        :param result: The measurement of this run.
+        :param regressions: The expected number of reported regressions.
+        """
+        baseline = {'engine': {'ops_per_sec': 1000.0, 'p95_us': 10.0, 'peak_alloc_bytes': 500.0}}
+
+        assert len(benchmark.compare([result], baseline, 0.25)) == regressions
+
+    def test_compare_ignores_new_benchmarks(self) -> None:
+        """
+        Tests that a benchmark missing from the baseline does not fail the run.
+        """
+        assert benchmark.compare([_result(ops_per_sec=1.0)], {}, 0.25) == []
@@ -0,0 +1,106 @@
+import uuid
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Generator
+
+import pytest
+from sqlalchemy.orm import Session
+
+from controllers import completed_matches_controller
+from controllers.completed_matches_controller import CompletedMatchesController
+from models.match import Match
+from services.match_count_service import MATCH_COUNTS, MatchCount
+from services.page_cache_service import LISTING_PAGES
+from tests.conftest import call_wsgi
+
+
+@pytest.fixture
+def sessions(
+        session_factory: Callable[[], ContextManager[Session]],
+        monkeypatch: pytest.MonkeyPatch
+) -> list[str]:
+    """
+    Fixture that points the listing at the `session_factory` database, with one finished match,
+    and records which session factory each request opens ('primary' or 'replica').
+    """
+    opened: list[str] = []
+
+    def recording(name: str) -> Callable[[], ContextManager[Session]]:
+        @contextmanager
+        def factory() -> Generator[Session, None, None]:
+            opened.append(name)
+            with session_factory() as db:
+                yield db
+        return factory
+
+    monkeypatch.setattr(completed_matches_controller, 'get_db', recording('primary'))
+    monkeypatch.setattr(completed_matches_controller, 'get_read_db', recording('replica'))
+    with session_factory() as db:
+        db.add(Match(uuid=str(uuid.uuid4()), player1_id=1, player2_id=2, winner_id=1))
+        db.commit()
+    return opened
+
+
+class TestCompletedMatchesController:
+    """
+    Tests for the cached pages of the completed matches listing.
+    """
+
+    def test_filter_spellings_share_page(self, sessions: list[str]) -> None:
+        """
+        Tests that filters differing only in case and whitespace are served the same cached page.
+        """
+        controller = CompletedMatchesController()
+
+        status, _, page = call_wsgi(controller.list_completed_matches, query='filter_by_player_name=Roger++')
+        assert status == '200 OK'
+        assert b'Rafael' in page
+
+        status, _, cached = call_wsgi(controller.list_completed_matches, query='filter_by_player_name=rOGER')
+        assert status == '200 OK'
+        assert cached == page
+        assert sessions == ['replica']
+
+    def test_primary_is_read_after_invalidation(self, sessions: list[str]) -> None:
+        """
+        Tests that the pages rendered right after a match was finished are read from the primary.
+        """
+        controller = CompletedMatchesController()
+        LISTING_PAGES.invalidate(("roger", "rafael"))
+
+        call_wsgi(controller.list_completed_matches)
+        call_wsgi(controller.list_completed_matches)
+
+        assert sessions == ['primary']
+
+    @pytest.mark.parametrize("page", [2, 12], ids=["Offset", "Cursor"])
+    def test_page_past_stale_count(self, sessions: list[str], page: int, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a page past the real end, allowed by an outdated count, is clamped to the last page.
+
+        :param page: The requested page number.
+        """
+        monkeypatch.setattr(MATCH_COUNTS, 'count', lambda *args: MatchCount(100))
+        controller = CompletedMatchesController()
+
+        status, _, body = call_wsgi(controller.list_completed_matches, query=f'page={page}')
+
+        assert status == '200 OK'
+        assert b'Rafael' in body
+        assert b'Next' not in body
+
+    def test_lower_bound_count_links_next_page(self, sessions: list[str], monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a count known only as a lower bound is shown as such and the next page is linked by cursor.
+        """
+        monkeypatch.setattr(MATCH_COUNTS, 'count', lambda *args: MatchCount(5, exact=False))
+        with completed_matches_controller.get_db() as db:
+            for _ in range(5):
+                db.add(Match(uuid=str(uuid.uuid4()), player1_id=1, player2_id=2, winner_id=2))
+            db.commit()
+        controller = CompletedMatchesController()
+
+        status, _, body = call_wsgi(controller.list_completed_matches)
+
+        assert status == '200 OK'
+        assert b'More than 5 matches found' in body
+        assert b'cursor=' in body
@@ -1,6 +1,5 @@
 import pytest
 
-from models.match import Match
 from services.strategies.deuce_state_strategy import DeuceStateStrategy
 from tests.conftest import setup_score
 
@@ -28,7 +27,6 @@ class TestDeuceStateStrategy:
     )
     def test_add_point(
             self,
-            match: Match,
             initial_score: dict[str, dict[str, int]],
             player_key: str,
             expected_state: str,
@@ -42,7 +40,6 @@ class TestDeuceStateStrategy:
         """
         Tests the `add_point` method of the `DeuceStateStrategy` class.
 
-        :param match: A `Match` object (fixture).
         :param initial_score: A dictionary representing the initial score of the match.
         :param player_key: The key representing the player who scored a point ('player1' or 'player2').
         :param expected_state: The expected game state after adding the point (e.g., 'advantage_1').
@@ -55,20 +52,14 @@ class TestDeuceStateStrategy:
         """
         strategy = DeuceStateStrategy()
 
-        score = setup_score(match, initial_score)
+        state = setup_score(initial_score, 'deuce')
 
-        strategy.add_point(
-            match,
-            score,
-            player_key=player_key,
-            opponent_key="player2" if player_key == "player1" else "player1",
-            player_num=1 if player_key == "player1" else 2
-        )
+        state = strategy.add_point(state, player_num=1 if player_key == "player1" else 2)
 
-        assert match.current_game_state == expected_state
-        assert score["player1"]["points"] == expected_points_player1
-        assert score["player2"]["points"] == expected_points_player2
-        assert score["player1"]["games"] == expected_games_player1
-        assert score["player2"]["games"] == expected_games_player2
-        assert score["player1"]["sets"] == expected_sets_player1
-        assert score["player2"]["sets"] == expected_sets_player2
+        assert state.game_state == expected_state
+        assert state.player1_points == expected_points_player1
+        assert state.player2_points == expected_points_player2
+        assert state.player1_games == expected_games_player1
+        assert state.player2_games == expected_games_player2
+        assert state.player1_sets == expected_sets_player1
+        assert state.player2_sets == expected_sets_player2
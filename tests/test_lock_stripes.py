@@ -0,0 +1,66 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+from utils.lock_stripes import LockStripes
+
+
+class TestLockStripes:
+    """
+    Tests for the striped locks serializing the updates of a match.
+    """
+
+    def test_same_key_gets_same_lock(self) -> None:
+        """
+        Tests that a key is always mapped to the same lock.
+        """
+        stripes = LockStripes(8)
+        key = str(uuid.uuid4())
+
+        assert stripes.lock_for(key) is stripes.lock_for(key)
+
+    def test_locks_are_bounded(self) -> None:
+        """
+        Tests that any number of keys share the fixed number of stripes.
+        """
+        stripes = LockStripes(4)
+
+        locks = {id(stripes.lock_for(str(uuid.uuid4()))) for _ in range(1000)}
+
+        assert len(stripes) == 4
+        assert len(locks) <= 4
+
+    @pytest.mark.parametrize("count", [0, -1], ids=["Zero", "Negative"])
+    def test_invalid_stripe_count(self, count: int) -> None:
+        """
+        Tests that a table without locks is rejected.
+
+        :param count: The number of stripes.
+        """
+        with pytest.raises(ValueError):
+            LockStripes(count)
+
+    def test_updates_of_a_key_are_serialized(self) -> None:
+        """
+        Tests that concurrent read-modify-write cycles on one key do not lose updates.
+        """
+        stripes = LockStripes(8)
+        key = str(uuid.uuid4())
+        counter = [0]
+
+        def increment() -> None:
+            for _ in range(50):
+                with stripes.lock_for(key):
+                    value = counter[0]
+                    time.sleep(0)
+                    counter[0] = value + 1
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter[0] == 400
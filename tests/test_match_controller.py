@@ -0,0 +1,217 @@
+import json
+from typing import Any, Callable, ContextManager
+from urllib.parse import urlencode
+
+import pytest
+from sqlalchemy.orm import Session
+
+from controllers import match_controller
+from controllers.match_controller import MatchController
+from exceptions import ConcurrentUpdateError
+from services.match_service import MatchService
+from services.ongoing_match_service import OngoingMatchService
+from services.score_state import ScoreState
+from tests.conftest import call_wsgi
+from utils.query_budget import count_queries
+
+
+@pytest.fixture
+def controller(
+        session_factory: Callable[[], ContextManager[Session]],
+        monkeypatch: pytest.MonkeyPatch
+) -> MatchController:
+    """
+    Fixture that provides a match controller using the `session_factory` database.
+    """
+    monkeypatch.setattr(match_controller, 'get_db', session_factory)
+    controller = MatchController()
+    controller.ongoing_matches = OngoingMatchService(session_factory)
+    return controller
+
+
+@pytest.fixture
+def match_uuid(controller: MatchController) -> str:
+    """
+    Fixture that creates a match between Roger and Rafael through the new match form.
+    """
+    status, headers, _ = call_wsgi(
+        controller.create_match, 'POST', body=urlencode({'player1': 'Roger', 'player2': 'Rafael'}).encode()
+    )
+    assert status == '302 Found'
+    return headers['Location'].split('uuid=')[1]
+
+
+class TestScoreEtag:
+    """
+    Tests for the conditional GET of the score page.
+    """
+
+    def test_get_returns_etag(self, controller: MatchController, match_uuid: str) -> None:
+        """
+        Tests that the score page carries an entity tag and must be revalidated.
+        """
+        status, headers, body = call_wsgi(controller.match_score, query=f'uuid={match_uuid}')
+
+        assert status == '200 OK'
+        assert headers['ETag'].startswith('"')
+        assert headers['Cache-Control'] == 'no-cache'
+        assert body
+
+    def test_current_etag_is_not_modified(self, controller: MatchController, match_uuid: str) -> None:
+        """
+        Tests that a conditional GET with the current tag is answered with 304 and an empty body.
+        """
+        etag = call_wsgi(controller.match_score, query=f'uuid={match_uuid}')[1]['ETag']
+
+        status, headers, body = call_wsgi(controller.match_score, query=f'uuid={match_uuid}', HTTP_IF_NONE_MATCH=etag)
+
+        assert status == '304 Not Modified'
+        assert headers['ETag'] == etag
+        assert body == b''
+
+    def test_stale_etag_gets_page(self, controller: MatchController, match_uuid: str) -> None:
+        """
+        Tests that a conditional GET with an outdated tag gets the full page.
+        """
+        status, headers, body = call_wsgi(
+            controller.match_score, query=f'uuid={match_uuid}', HTTP_IF_NONE_MATCH='"0-0"'
+        )
+
+        assert status == '200 OK'
+        assert headers['ETag'] != '"0-0"'
+        assert body
+
+    def test_point_changes_etag(self, controller: MatchController, match_uuid: str) -> None:
+        """
+        Tests that scoring a point changes the tag, so the tag from before the point gets the new page.
+        """
+        etag = call_wsgi(controller.match_score, query=f'uuid={match_uuid}')[1]['ETag']
+
+        status, _, _ = call_wsgi(controller.match_score, 'POST', query=f'uuid={match_uuid}', body=b'player1_point=1')
+        assert status == '200 OK'
+
+        status, headers, _ = call_wsgi(controller.match_score, query=f'uuid={match_uuid}', HTTP_IF_NONE_MATCH=etag)
+        assert status == '200 OK'
+        assert headers['ETag'] != etag
+
+
+class TestScoreUpdate:
+    """
+    Tests for the score updates posted to the score page.
+    """
+
+    def test_point_is_scored_under_stripe_lock(
+            self,
+            controller: MatchController,
+            match_uuid: str,
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Tests that a point is scored while the lock stripe of the match is held, and the lock is released after.
+        """
+        lock = controller.match_locks.lock_for(match_uuid)
+        held = []
+        add_points = controller.ongoing_matches.add_points
+
+        def recording_add_points(entry: Any, player_nums: list[int]) -> ScoreState:
+            held.append(lock.locked())
+            return add_points(entry, player_nums)
+
+        monkeypatch.setattr(controller.ongoing_matches, 'add_points', recording_add_points)
+
+        status, _, _ = call_wsgi(controller.match_score, 'POST', query=f'uuid={match_uuid}', body=b'player2_point=1')
+
+        assert status == '200 OK'
+        assert held == [True]
+        assert not lock.locked()
+        assert controller.ongoing_matches.get(match_uuid).state == ScoreState(player2_points=1)
+
+    @pytest.mark.parametrize(
+        "body, content_type",
+        [
+            (b'points=1,2,2', 'application/x-www-form-urlencoded'),
+            (json.dumps({'points': [1, 2, 2]}).encode(), 'application/json'),
+        ],
+        ids=["Form", "JSON"]
+    )
+    def test_batch(self, controller: MatchController, match_uuid: str, body: bytes, content_type: str) -> None:
+        """
+        Tests that a batch of points is scored from a form or a JSON body.
+
+        :param body: The request body.
+        :param content_type: The content type of the body.
+        """
+        status, _, _ = call_wsgi(
+            controller.match_score, 'POST', query=f'uuid={match_uuid}', body=body, content_type=content_type
+        )
+
+        assert status == '200 OK'
+        assert controller.ongoing_matches.get(match_uuid).state == ScoreState(player1_points=1, player2_points=2)
+
+    def test_undo(self, controller: MatchController, match_uuid: str) -> None:
+        """
+        Tests that an undo posted to the score page removes the last point.
+        """
+        call_wsgi(controller.match_score, 'POST', query=f'uuid={match_uuid}', body=b'points=1,2')
+
+        status, _, _ = call_wsgi(controller.match_score, 'POST', query=f'uuid={match_uuid}', body=b'undo=1')
+
+        assert status == '200 OK'
+        assert controller.ongoing_matches.get(match_uuid).state == ScoreState(player1_points=1)
+
+    @pytest.mark.parametrize("body", [b'[1, 2]', b'{"points": '], ids=["NotObject", "Malformed"])
+    def test_invalid_json_body(self, controller: MatchController, match_uuid: str, body: bytes) -> None:
+        """
+        Tests that a JSON body that cannot be parsed is rejected with 400 and scores nothing.
+
+        :param body: The request body.
+        """
+        status, _, _ = call_wsgi(
+            controller.match_score, 'POST', query=f'uuid={match_uuid}', body=body, content_type='application/json'
+        )
+
+        assert status == '400 Bad Request'
+        assert controller.ongoing_matches.get(match_uuid).state == ScoreState()
+
+    def test_concurrent_update(
+            self,
+            controller: MatchController,
+            match_uuid: str,
+            monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """
+        Tests that a finishing point whose save conflicts with another update is answered with 409.
+        """
+        def apply_points(*args: Any) -> None:
+            raise ConcurrentUpdateError(f"Match {match_uuid} was changed by another request")
+
+        monkeypatch.setattr(MatchService, 'apply_points', apply_points)
+
+        status, _, _ = call_wsgi(
+            controller.match_score,
+            'POST',
+            query=f'uuid={match_uuid}',
+            body=json.dumps({'points': [1] * 48}).encode(),
+            content_type='application/json'
+        )
+
+        assert status == '409 Conflict'
+        assert not controller.match_locks.lock_for(match_uuid).locked()
+
+    def test_finishing_point_does_not_reload_match(self, controller: MatchController, match_uuid: str) -> None:
+        """
+        Tests that the point finishing a match is saved without reading the match again after the commit.
+        """
+        call_wsgi(
+            controller.match_score,
+            'POST',
+            query=f'uuid={match_uuid}',
+            body=json.dumps({'points': [1] * 47}).encode(),
+            content_type='application/json'
+        )
+
+        with count_queries() as queries:
+            status, _, _ = call_wsgi(controller.match_score, 'POST', query=f'uuid={match_uuid}', body=b'player1_point=1')
+
+        assert status == '200 OK'
+        assert queries.statements[-1].startswith('UPDATE matches')
@@ -0,0 +1,172 @@
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from models.match import Match
+from models.player import Player
+from services.match_count_service import MATCH_COUNTS, MatchCount, MatchCountService, filter_selects
+from services.match_service import MatchService
+from services.score_state import ScoreState
+from tests.conftest import FakeClock
+from utils.query_budget import count_queries
+
+
+@pytest.fixture
+def players(db: Session) -> list[Player]:
+    """
+    Fixture that stores three players.
+    """
+    players = [Player(name="Roger Federer"), Player(name="Rafael Nadal"), Player(name="Novak Djokovic")]
+    db.add_all(players)
+    db.commit()
+    return players
+
+
+def _add_matches(db: Session, player1: Player, player2: Player, count: int, finished: bool = True) -> list[Match]:
+    matches = [
+        Match(
+            uuid=str(uuid.uuid4()),
+            player1_id=player1.id,
+            player2_id=player2.id,
+            winner_id=player1.id if finished else None
+        )
+        for _ in range(count)
+    ]
+    db.add_all(matches)
+    db.commit()
+    return matches
+
+
+class TestMatchCountService:
+    """
+    Tests for the cached completed match counts.
+    """
+
+    @pytest.mark.parametrize(
+        "player_name, expected",
+        [(None, 5), ("", 5), ("federer", 5), ("  NADAL ", 3), ("Djokovic", 2), ("Murray", 0), ("%", 0)],
+        ids=["Overall", "Empty", "Player", "Normalized", "Other", "Unknown", "Wildcard"]
+    )
+    def test_count(self, db: Session, players: list[Player], player_name: str | None, expected: int) -> None:
+        """
+        Tests the overall and filtered counts; unfinished matches are not counted.
+
+        :param player_name: The player filter.
+        :param expected: The expected count.
+        """
+        roger, rafael, novak = players
+        _add_matches(db, roger, rafael, 3)
+        _add_matches(db, novak, roger, 2)
+        _add_matches(db, rafael, novak, 4, finished=False)
+
+        assert MatchCountService().count(db, player_name) == MatchCount(expected)
+
+    def test_count_is_cached(self, db: Session, players: list[Player], clock: FakeClock) -> None:
+        """
+        Tests that a cached count does not query the database until it expires.
+        """
+        _add_matches(db, players[0], players[1], 2)
+        counts = MatchCountService(ttl=60, clock=clock)
+        counts.count(db, "roger")
+
+        with count_queries() as queries:
+            assert counts.count(db, "ROGER") == MatchCount(2)
+        assert queries.count == 0
+
+        clock.now = 60
+        with count_queries() as queries:
+            counts.count(db, "roger")
+        assert queries.count == 1
+
+    def test_finished_and_reopened_match_update_counts(self, db: Session, players: list[Player]) -> None:
+        """
+        Tests that finishing a match and undoing its last point update the cached counts without queries.
+        """
+        roger, rafael, novak = players
+        match = _add_matches(db, roger, rafael, 1, finished=False)[0]
+        for player_name in (None, "roger", "nadal", "djokovic"):
+            MATCH_COUNTS.count(db, player_name)
+
+        with count_queries() as queries:
+            MatchService.add_points(db, match, ScoreState(), [1] * 48)
+            counts = [MATCH_COUNTS.count(db, name).value for name in (None, "roger", "nadal", "djokovic")]
+            assert counts == [1, 1, 1, 0]
+
+            MatchService.undo_last_point(db, match)
+            counts = [MATCH_COUNTS.count(db, name).value for name in (None, "roger", "nadal", "djokovic")]
+            assert counts == [0, 0, 0, 0]
+        assert not any("count(" in statement.lower() for statement in queries.statements)
+
+    def test_counts_are_not_cached_while_replicas_lag(
+            self,
+            db: Session,
+            players: list[Player],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a count computed right after an update, which a replica may not show yet, is not cached.
+        """
+        roger, rafael, _ = players
+        counts = MatchCountService(replica_lag=5, clock=clock)
+        counts.match_finished((roger.name_key, rafael.name_key))
+        _add_matches(db, roger, rafael, 1)
+
+        counts.count(db, "Roger  Federer")
+        with count_queries() as queries:
+            assert counts.count(db, "roger federer") == MatchCount(1)
+        assert queries.count == 1
+
+        clock.now = 5
+        counts.count(db, "roger federer")
+        with count_queries() as queries:
+            assert counts.count(db, "ROGER FEDERER") == MatchCount(1)
+        assert queries.count == 0
+
+    @pytest.mark.parametrize(
+        "key, selected",
+        [("", True), ("federer", True), ("r n", False), ("nadal", True), ("novak", False)],
+        ids=["NoFilter", "Player", "AcrossNames", "OtherPlayer", "UnrelatedFilter"]
+    )
+    def test_filter_selects(self, key: str, selected: bool) -> None:
+        """
+        Tests which cached filters a finished match of Roger Federer and Rafael Nadal changes.
+
+        :param key: The key of the filter.
+        :param selected: Whether the filter selects the match.
+        """
+        assert filter_selects(key, ("roger federer", "rafael nadal")) is selected
+
+    def test_filtered_counts_are_bounded(self, db: Session, players: list[Player]) -> None:
+        """
+        Tests that only the most recently used filters are kept, and the overall count is never dropped.
+        """
+        counts = MatchCountService(max_filters=2)
+        for player_name in (None, "roger", "rafael", "roger", "novak"):
+            counts.count(db, player_name)
+
+        with count_queries() as queries:
+            counts.count(db, None)
+            counts.count(db, "roger")
+            counts.count(db, "novak")
+        assert queries.count == 0
+
+        with count_queries() as queries:
+            counts.count(db, "rafael")
+        assert queries.count == 1
+
+    def test_large_filter_is_bounded(self, db: Session, players: list[Player]) -> None:
+        """
+        Tests that a filter matching more matches than the limit is counted as "more than the limit".
+        """
+        roger, rafael, novak = players
+        for _ in range(10):
+            _add_matches(db, roger, rafael, 1)
+            _add_matches(db, novak, rafael, 1)
+        counts = MatchCountService(exact_limit=4)
+
+        assert counts.count(db, "roger") == MatchCount(4, exact=False)
+        assert counts.count(db, "nadal") == MatchCount(4, exact=False)
+        assert counts.count(db, "novak") == MatchCount(4, exact=False)
+        assert counts.count(db, None) == MatchCount(20)
+        assert MatchCountService(exact_limit=10).count(db, "roger") == MatchCount(10)
@@ -0,0 +1,263 @@
+import uuid
+from typing import Any
+
+import pytest
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from config.config import MAX_UPDATE_RETRIES
+from exceptions import InvalidGameStateError, PlayerNumberError, MatchFormatError, ConcurrentUpdateError
+from models.match import Match
+from services.match_service import MatchService
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import get_engine
+from utils.pagination import PageCursor
+
+
+class TestMatchService:
+    """
+    Tests for the point ingestion methods of `MatchService`.
+    """
+
+    @pytest.mark.parametrize(
+        "params, expected",
+        [
+            ({"player1_point": "1"}, [1]),
+            ({"player2_point": "1"}, [2]),
+            ({"points": "1,2, 2,1"}, [1, 2, 2, 1]),
+            ({"points": [2, 2, 1]}, [2, 2, 1]),
+        ],
+        ids=["SinglePlayer1", "SinglePlayer2", "FormBatch", "JsonBatch"]
+    )
+    def test_determine_player_numbers(self, params: dict[str, Any], expected: list[int]) -> None:
+        """
+        Tests parsing of single points and batches.
+
+        :param params: The request parameters.
+        :param expected: The expected player numbers.
+        """
+        assert MatchService.determine_player_numbers(params) == expected
+
+    @pytest.mark.parametrize(
+        "params",
+        [{}, {"points": ""}, {"points": "1,3"}, {"points": []}, {"points": "1" * 1000}],
+        ids=["NoPoint", "Empty", "UnknownPlayer", "EmptyList", "NotSeparated"]
+    )
+    def test_determine_player_numbers_invalid(self, params: dict[str, Any]) -> None:
+        """
+        Tests that malformed point parameters are rejected.
+
+        :param params: The request parameters.
+        """
+        with pytest.raises(PlayerNumberError):
+            MatchService.determine_player_numbers(params)
+
+    def test_add_points_matches_single_points(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a batch produces the same score as the same points added one by one.
+        """
+        player_nums = [1, 1, 2, 1, 2, 2, 2, 1, 1, 1] * 5
+
+        expected = ScoreState()
+        for player_num in player_nums:
+            expected = MatchService.add_point(db, stored_match, expected, player_num)
+        stored_match.score = ScoreState()
+
+        state = MatchService.add_points(db, stored_match, ScoreState(), player_nums)
+
+        assert state == expected
+        assert stored_match.score == expected
+
+    def test_add_points_finishes_match(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a batch winning the last point sets the winner.
+        """
+        state = MatchService.add_points(db, stored_match, ScoreState(), [2] * 48)
+
+        assert state.game_state is GameState.FINISHED
+        assert stored_match.winner_id == stored_match.player2_id
+
+    def test_add_points_after_finish_is_rejected(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a batch continuing after the end of the match is not persisted.
+        """
+        with pytest.raises(InvalidGameStateError):
+            MatchService.add_points(db, stored_match, ScoreState(), [2] * 49)
+
+        db.rollback()
+        assert stored_match.winner_id is None
+        assert stored_match.current_game_state == 'regular'
+
+    @pytest.mark.parametrize(
+        "match_format, points_to_win",
+        [("standard", 48), ("best_of_5", 72), ("short_sets", 32), ("doubles", 48)]
+    )
+    def test_match_format(self, db: Session, stored_match: Match, match_format: str, points_to_win: int) -> None:
+        """
+        Tests that points are scored and undone under the rules of the match format.
+
+        :param match_format: The name of the match format.
+        :param points_to_win: The number of points player 2 needs to win the match without losing a point.
+        """
+        match = MatchService.create_match(db, stored_match.player1_id, stored_match.player2_id, match_format)
+
+        state = MatchService.add_points(db, match, ScoreState(), [2] * points_to_win)
+        assert state.game_state is GameState.FINISHED
+
+        state = MatchService.undo_last_point(db, match)
+        assert state.game_state is not GameState.FINISHED
+        assert match.winner_id is None
+
+    def test_create_match_unknown_format(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a match cannot be created with an unknown format.
+        """
+        with pytest.raises(MatchFormatError):
+            MatchService.create_match(db, stored_match.player1_id, stored_match.player2_id, "best_of_7")
+
+
+class TestConcurrentUpdates:
+    """
+    Tests for the compare-and-swap on the version of a match.
+    """
+
+    def test_conflict_is_retried_on_new_score(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that points saved over a concurrent update are scored again on the new score.
+        """
+        other_db = Session(bind=db.get_bind())
+        other_match = other_db.get(Match, stored_match.id)
+        concurrent = MatchService.add_points(other_db, other_match, ScoreState(), [2, 2])
+        other_db.close()
+
+        state = MatchService.add_points(db, stored_match, ScoreState(), [1])
+
+        assert state == get_engine("standard").play_all(concurrent, [1])
+        db.expire_all()
+        assert stored_match.score == state
+        assert (stored_match.points_played, stored_match.version) == (3, 2)
+
+    def test_versions_increase(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that every save increments the version once.
+        """
+        state, version = MatchService.apply_points(db, stored_match, ScoreState(), [1, 2])
+        assert version == 1
+
+        state, version = MatchService.apply_points(db, stored_match, state, [1])
+        MatchService.undo_last_point(db, stored_match)
+        assert (version, stored_match.version) == (2, 3)
+
+    def test_retries_are_bounded(self, db: Session, stored_match: Match, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a match changed on every attempt gives up after MAX_UPDATE_RETRIES retries.
+        """
+        attempts = []
+
+        def conflicting_save(*args: Any) -> int:
+            attempts.append(args)
+            raise StaleDataError("concurrent update")
+
+        monkeypatch.setattr(MatchService, "save_points", conflicting_save)
+
+        with pytest.raises(ConcurrentUpdateError):
+            MatchService.add_point(db, stored_match, ScoreState(), 1)
+        assert len(attempts) == MAX_UPDATE_RETRIES + 1
+
+    def test_stale_undo_is_rejected(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that an undo of a match changed since it was loaded is rejected.
+        """
+        MatchService.add_points(db, stored_match, ScoreState(), [1, 1])
+        db.refresh(stored_match)
+        other_db = Session(bind=db.get_bind())
+        other_match = other_db.get(Match, stored_match.id)
+        MatchService.add_points(other_db, other_match, other_match.score, [2])
+        other_db.close()
+
+        with pytest.raises(ConcurrentUpdateError):
+            MatchService.undo_last_point(db, stored_match)
+
+
+@pytest.fixture
+def completed_matches(db: Session, stored_match: Match) -> list[int]:
+    """
+    Fixture that stores 23 finished matches (and one unfinished) and returns the ids of the finished ones.
+    """
+    matches = [
+        Match(
+            uuid=str(uuid.uuid4()),
+            player1_id=stored_match.player1_id,
+            player2_id=stored_match.player2_id,
+            winner_id=stored_match.player1_id
+        )
+        for _ in range(23)
+    ]
+    db.add_all(matches)
+    db.commit()
+    return [match.id for match in matches]
+
+
+class TestCompletedMatches:
+    """
+    Tests for the pagination of completed matches.
+    """
+
+    def test_keyset_pages_match_numbered_pages(self, db: Session, completed_matches: list[int]) -> None:
+        """
+        Tests that walking the cursors forward and back visits the same pages as the page numbers.
+        """
+        numbered = [
+            [match.id for match in MatchService.get_completed_matches(db, page=page, per_page=5)[0]]
+            for page in range(1, 6)
+        ]
+
+        pages = []
+        cursor = None
+        while True:
+            matches, cursor, _ = MatchService.get_completed_matches_page(db, cursor, per_page=5)
+            pages.append([match.id for match in matches])
+            if cursor is None:
+                break
+        assert pages == numbered
+        assert sum(pages, []) == completed_matches
+
+        _, _, cursor = MatchService.get_completed_matches_page(db, PageCursor(pages[-2][-1]), per_page=5)
+        backwards = []
+        while cursor is not None:
+            matches, _, cursor = MatchService.get_completed_matches_page(db, cursor, per_page=5)
+            backwards.append([match.id for match in matches])
+        assert backwards == numbered[-2::-1]
+
+    def test_first_page_has_no_previous_page(self, db: Session, completed_matches: list[int]) -> None:
+        """
+        Tests the cursors of the first page.
+        """
+        matches, next_cursor, prev_cursor = MatchService.get_completed_matches_page(db, None, per_page=10)
+
+        assert [match.id for match in matches] == completed_matches[:10]
+        assert next_cursor == PageCursor(completed_matches[9])
+        assert prev_cursor is None
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [PageCursor(1), PageCursor(123456789, forward=False), PageCursor(0)],
+        ids=["Forward", "Backward", "Start"]
+    )
+    def test_cursor_token_round_trip(self, cursor: PageCursor) -> None:
+        """
+        Tests that a cursor survives its opaque token.
+
+        :param cursor: The cursor.
+        """
+        assert PageCursor.decode(cursor.encode()) == cursor
+
+    @pytest.mark.parametrize("token", ["", "garbage!!", "eDEy", "bg"], ids=["Empty", "NotBase64", "Prefix", "NoId"])
+    def test_invalid_cursor_token(self, token: str) -> None:
+        """
+        Tests that malformed tokens are rejected.
+
+        :param token: The token.
+        """
+        with pytest.raises(ValueError):
+            PageCursor.decode(token)
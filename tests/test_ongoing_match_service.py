@@ -0,0 +1,587 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Generator, Callable, ContextManager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from exceptions import NotFoundMatchError
+from models.base import Base
+from models.match import Match
+from models.match_point import MatchPoint
+from services.match_service import MatchService
+from services.ongoing_match_service import OngoingMatchService, score_etag
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import get_engine
+from utils.query_budget import count_queries
+from tests.conftest import FakeClock
+
+
+def _create_match(session_factory: Callable[[], ContextManager[Session]]) -> str:
+    match_uuid = str(uuid.uuid4())
+    with session_factory() as db:
+        db.add(Match(uuid=match_uuid, player1_id=1, player2_id=2))
+        db.commit()
+    return match_uuid
+
+
+def _stored(session_factory: Callable[[], ContextManager[Session]], match_uuid: str) -> tuple[ScoreState, int, int]:
+    with session_factory() as db:
+        match = db.query(Match).filter(Match.uuid == match_uuid).one()
+        logged = db.query(MatchPoint).filter(MatchPoint.match_id == match.id).count()
+        return match.score, match.points_played, logged
+
+
+class TestOngoingMatchService:
+    """
+    Tests for the in-memory registry of ongoing matches.
+    """
+
+    def test_points_are_saved_at_checkpoint(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that points stay in memory until the checkpoint and are then saved together.
+        """
+        service = OngoingMatchService(session_factory, checkpoint_points=5, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+
+        service.add_points(entry, [1, 1, 2, 1])
+        assert _stored(session_factory, match_uuid) == (ScoreState(), 0, 0)
+
+        state = service.add_points(entry, [1])
+        assert _stored(session_factory, match_uuid) == (state, 5, 5)
+        assert entry.pending_points == []
+
+    def test_checkpoint_after_time(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a point scored long enough after the last save is saved at once.
+        """
+        service = OngoingMatchService(session_factory, checkpoint_points=100, checkpoint_seconds=60, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+
+        service.add_points(entry, [1])
+        clock.now = 61.0
+        state = service.add_points(entry, [2])
+
+        assert _stored(session_factory, match_uuid) == (state, 2, 2)
+
+    def test_finished_match_is_saved_and_released(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a finished match is saved with its winner and leaves the registry.
+        """
+        service = OngoingMatchService(session_factory, checkpoint_points=1000, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+
+        state = service.add_points(entry, [2] * 48)
+
+        assert state.game_state is GameState.FINISHED
+        assert match_uuid not in service
+        with session_factory() as db:
+            assert db.query(Match).filter(Match.uuid == match_uuid).one().winner_id == 2
+
+    def test_lru_eviction_spills_to_database(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that the least recently used match is saved when the registry is full.
+        """
+        service = OngoingMatchService(session_factory, max_size=1, checkpoint_points=1000, clock=clock)
+        first_uuid = _create_match(session_factory)
+        state = service.add_points(service.get(first_uuid), [1, 1])
+
+        service.get(_create_match(session_factory))
+
+        assert first_uuid not in service
+        assert len(service) == 1
+        assert _stored(session_factory, first_uuid) == (state, 2, 2)
+        assert service.get(first_uuid).state == state
+
+    def test_idle_eviction(self, session_factory: Callable[[], ContextManager[Session]], clock: FakeClock) -> None:
+        """
+        Tests that an idle match is saved and evicted on the next access to the registry.
+        """
+        service = OngoingMatchService(
+            session_factory, idle_timeout=60, checkpoint_points=1000, checkpoint_seconds=1000, clock=clock
+        )
+        idle_uuid = _create_match(session_factory)
+        state = service.add_points(service.get(idle_uuid), [2])
+        active_uuid = _create_match(session_factory)
+        clock.now = 30.0
+        service.get(active_uuid)
+
+        clock.now = 70.0
+        service.get(active_uuid)
+
+        assert idle_uuid not in service
+        assert active_uuid in service
+        assert _stored(session_factory, idle_uuid) == (state, 1, 1)
+
+    def test_undo(self, session_factory: Callable[[], ContextManager[Session]], clock: FakeClock) -> None:
+        """
+        Tests undoing both an unsaved and a saved point.
+        """
+        service = OngoingMatchService(session_factory, checkpoint_points=3, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        after_two = service.add_points(entry, [1, 2])
+        service.add_points(entry, [1])
+        service.add_points(entry, [1])
+
+        # The fourth point was never saved
+        assert service.undo_last_point(entry) == _stored(session_factory, match_uuid)[0]
+        # The third point is removed from the database log
+        assert service.undo_last_point(entry) == after_two
+        assert _stored(session_factory, match_uuid) == (after_two, 2, 2)
+
+    def test_undo_reopens_finished_match(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that undoing the last point of a finished match puts it back in the registry.
+        """
+        service = OngoingMatchService(session_factory, clock=clock)
+        match_uuid = _create_match(session_factory)
+        service.add_points(service.get(match_uuid), [1] * 48)
+
+        entry = service.get(match_uuid)
+        state = service.undo_last_point(entry)
+
+        assert state.game_state is not GameState.FINISHED
+        assert match_uuid in service
+        assert service.add_points(service.get(match_uuid), [1]).game_state is GameState.FINISHED
+
+    def test_background_checkpoint_of_idle_match(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that without write-behind the background thread saves a match that gets no more points
+        once its checkpoint is due, and only then.
+        """
+        service = OngoingMatchService(
+            session_factory, checkpoint_points=1000, checkpoint_seconds=60, flush_interval=0.01, clock=clock
+        )
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        state = service.add_points(entry, [1, 2])
+        service.start()
+        try:
+            time.sleep(0.05)
+            with entry.lock:
+                assert entry.pending_points == [1, 2]
+
+            clock.now = 60.0
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                with entry.lock:
+                    if not entry.pending_points:
+                        break
+                time.sleep(0.01)
+            with entry.lock:
+                assert entry.pending_points == []
+        finally:
+            service.stop()
+
+        assert _stored(session_factory, match_uuid) == (state, 2, 2)
+
+    def test_flush(self, session_factory: Callable[[], ContextManager[Session]], clock: FakeClock) -> None:
+        """
+        Tests that flushing saves the unsaved points of every match.
+        """
+        service = OngoingMatchService(session_factory, checkpoint_points=1000, clock=clock)
+        match_uuids = [_create_match(session_factory) for _ in range(3)]
+        states = [service.add_points(service.get(match_uuid), [1, 2, 2]) for match_uuid in match_uuids]
+
+        service.flush()
+
+        for match_uuid, state in zip(match_uuids, states):
+            assert _stored(session_factory, match_uuid) == (state, 3, 3)
+
+    def test_database_is_used_without_registry_lock(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that matches are loaded and spilled without holding the registry lock.
+        """
+        locked = []
+
+        @contextmanager
+        def get_db() -> Generator[Session, None, None]:
+            locked.append(service._lock.locked())
+            with session_factory() as db:
+                yield db
+
+        service = OngoingMatchService(get_db, max_size=1, checkpoint_points=1000, clock=clock)
+        first_uuid = _create_match(session_factory)
+        service.add_points(service.get(first_uuid), [1])
+        service.get(_create_match(session_factory))
+
+        assert first_uuid not in service
+        assert locked == [False] * 3
+
+    def test_concurrent_requests_share_one_load(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that requests for a match being loaded wait for that load instead of loading it again.
+        """
+        loads = []
+        release = threading.Event()
+
+        @contextmanager
+        def get_db() -> Generator[Session, None, None]:
+            loads.append(1)
+            release.wait(5)
+            with session_factory() as db:
+                yield db
+
+        service = OngoingMatchService(get_db, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entries = []
+        threads = [threading.Thread(target=lambda: entries.append(service.get(match_uuid))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while not loads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(loads) == 1
+        assert len(entries) == 3
+        assert all(entry is entries[0] for entry in entries)
+
+    def test_points_of_evicted_match_are_saved(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that points scored on a match evicted after it was returned are saved and the match is kept.
+        """
+        service = OngoingMatchService(session_factory, max_size=1, checkpoint_points=1000, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        service.get(_create_match(session_factory))
+        assert match_uuid not in service
+
+        state = service.add_points(entry, [2, 2])
+
+        assert _stored(session_factory, match_uuid) == (state, 2, 2)
+        assert service.get(match_uuid) is entry
+
+    def test_unknown_match(self, session_factory: Callable[[], ContextManager[Session]]) -> None:
+        """
+        Tests that an unknown UUID is reported as not found.
+        """
+        with pytest.raises(NotFoundMatchError):
+            OngoingMatchService(session_factory).get(str(uuid.uuid4()))
+
+    def test_read_only_match_is_read_from_replica(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a displayed match is read with the read session factory and is not kept in memory,
+        while a match already in memory is returned from memory.
+        """
+        reads = []
+
+        @contextmanager
+        def get_read_db() -> Generator[Session, None, None]:
+            reads.append(1)
+            with session_factory() as db:
+                yield db
+
+        service = OngoingMatchService(session_factory, get_read_db, clock=clock)
+        match_uuid = _create_match(session_factory)
+
+        assert service.get(match_uuid, read_only=True).state == ScoreState()
+        assert match_uuid not in service
+        assert len(reads) == 1
+
+        entry = service.get(match_uuid)
+        service.add_points(entry, [1])
+        assert service.get(match_uuid, read_only=True) is entry
+        assert len(reads) == 1
+
+    def test_read_only_match_not_replicated(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a match missing on the replica (replication lag) is read from the primary.
+        """
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        lagging = sessionmaker(bind=engine)
+        service = OngoingMatchService(session_factory, lagging.begin, clock=clock)
+        match_uuid = _create_match(session_factory)
+
+        assert service.get(match_uuid, read_only=True).uuid == match_uuid
+        with pytest.raises(NotFoundMatchError):
+            service.get(str(uuid.uuid4()), read_only=True)
+        engine.dispose()
+
+
+class TestWriteBehind:
+    """
+    Tests for the write-behind mode of the registry of ongoing matches.
+    """
+
+    def test_points_wait_for_flush(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that points are not saved by the request that scored them, however old the last save is.
+        """
+        service = OngoingMatchService(session_factory, checkpoint_seconds=60, write_behind=True, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+
+        clock.now = 1000.0
+        state = service.add_points(entry, [1, 2])
+        assert _stored(session_factory, match_uuid) == (ScoreState(), 0, 0)
+
+        service.flush()
+        assert _stored(session_factory, match_uuid) == (state, 2, 2)
+
+    def test_flush_batches_transactions(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that the matches are written `batch_size` per transaction.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True, batch_size=2, clock=clock)
+        match_uuids = [_create_match(session_factory) for _ in range(5)]
+        states = [service.add_points(service.get(match_uuid), [2, 1, 1]) for match_uuid in match_uuids]
+        commits = []
+        with session_factory() as db:
+            event.listen(db.get_bind(), "commit", lambda connection: commits.append(connection))
+
+        service.flush()
+
+        assert len(commits) == 3
+        for match_uuid, state in zip(match_uuids, states):
+            assert _stored(session_factory, match_uuid) == (state, 3, 3)
+
+    def test_finished_match_is_saved_synchronously(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that the point finishing a match is saved by its request.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True, clock=clock)
+        match_uuid = _create_match(session_factory)
+
+        state = service.add_points(service.get(match_uuid), [1] * 48)
+
+        # The point log of a finished match is archived
+        assert _stored(session_factory, match_uuid) == (state, 48, 0)
+        assert match_uuid not in service
+
+    def test_failed_save_of_finished_match(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            monkeypatch: pytest.MonkeyPatch,
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a finished match that cannot be saved is reported as an error and kept for the next flush.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True, checkpoint_points=1000, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        service.add_points(entry, [1] * 47)
+
+        def apply_points(*args: Any) -> None:
+            raise OperationalError("UPDATE", {}, Exception("database is locked"))
+
+        with monkeypatch.context() as patch:
+            patch.setattr(MatchService, "apply_points", apply_points)
+            with pytest.raises(OperationalError):
+                service.add_points(entry, [1])
+
+        assert entry.finished
+        assert match_uuid in service
+        assert _stored(session_factory, match_uuid) == (ScoreState(), 0, 0)
+
+        service.flush()
+
+        assert _stored(session_factory, match_uuid) == (entry.state, 48, 0)
+        assert match_uuid not in service
+
+    def test_background_flusher(self, session_factory: Callable[[], ContextManager[Session]]) -> None:
+        """
+        Tests that the background thread writes the points and that stopping it writes the rest.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True, flush_interval=0.01)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        service.start()
+        try:
+            state = service.add_points(entry, [1])
+            # The database is not read while the thread may write: the test engine has a single connection
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                with entry.lock:
+                    if not entry.pending_points:
+                        break
+                time.sleep(0.01)
+            with entry.lock:
+                assert _stored(session_factory, match_uuid) == (state, 1, 1)
+        finally:
+            state = service.add_points(entry, [2])
+            service.stop()
+
+        assert _stored(session_factory, match_uuid) == (state, 2, 2)
+
+    def test_match_changed_elsewhere(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that unsaved points of a match changed by another process are scored again on its stored score.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        service.add_points(entry, [1, 1])
+        with session_factory() as db:
+            match = db.query(Match).filter(Match.uuid == match_uuid).one()
+            elsewhere = MatchService.add_points(db, match, match.score, [2])
+
+        service.flush()
+
+        expected = get_engine("standard").play_all(elsewhere, [1, 1])
+        assert entry.state == expected
+        assert _stored(session_factory, match_uuid) == (expected, 3, 3)
+
+    @pytest.mark.parametrize("batch_size", [1, 2], ids=["Alone", "InBatch"])
+    def test_deleted_match_is_dropped(
+            self,
+            session_factory: Callable[[], ContextManager[Session]],
+            clock: FakeClock,
+            batch_size: int
+    ) -> None:
+        """
+        Tests that the unsaved points of a match deleted from the database are dropped by the flush,
+        while the other matches are saved.
+
+        :param batch_size: The number of matches saved per transaction.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True, batch_size=batch_size, clock=clock)
+        deleted_uuid, kept_uuid = _create_match(session_factory), _create_match(session_factory)
+        deleted = service.get(deleted_uuid)
+        service.add_points(deleted, [1])
+        state = service.add_points(service.get(kept_uuid), [2])
+        with session_factory() as db:
+            db.query(Match).filter(Match.uuid == deleted_uuid).delete()
+            db.commit()
+
+        service.flush()
+
+        assert deleted_uuid not in service
+        assert _stored(session_factory, kept_uuid) == (state, 1, 1)
+
+    def test_undo_of_deleted_match(self, session_factory: Callable[[], ContextManager[Session]]) -> None:
+        """
+        Tests that undoing a saved point of a match deleted from the database reports the match as not found.
+        """
+        service = OngoingMatchService(session_factory, write_behind=True)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        service.add_points(entry, [1])
+        service.flush()
+        with session_factory() as db:
+            db.query(Match).filter(Match.uuid == match_uuid).delete()
+            db.commit()
+
+        with pytest.raises(NotFoundMatchError):
+            service.undo_last_point(entry)
+
+
+class TestScoreEtag:
+    """
+    Tests for the entity tags of the score page.
+    """
+
+    def test_etag_follows_score(self, session_factory: Callable[[], ContextManager[Session]], clock: FakeClock) -> None:
+        """
+        Tests that the tag changes with every point, even when an undone point is replaced by another one.
+        """
+        service = OngoingMatchService(session_factory, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+
+        tags = [service.current_etag(match_uuid)]
+        service.add_points(entry, [1])
+        tags.append(service.current_etag(match_uuid))
+        service.undo_last_point(entry)
+        assert service.current_etag(match_uuid) == tags[0]
+
+        service.add_points(entry, [2])
+        tags.append(service.current_etag(match_uuid))
+        assert len(set(tags)) == 3
+        assert tags[-1] == score_etag(entry.match_id, entry.state)
+
+    def test_etag_from_database(self, session_factory: Callable[[], ContextManager[Session]], clock: FakeClock) -> None:
+        """
+        Tests that the tag of a match not in memory is read with one statement and equals the tag in memory.
+        """
+        service = OngoingMatchService(session_factory, clock=clock)
+        match_uuid = _create_match(session_factory)
+        entry = service.get(match_uuid)
+        service.add_points(entry, [1, 2, 2])
+        in_memory = service.current_etag(match_uuid)
+
+        service.flush()
+        other = OngoingMatchService(session_factory, clock=clock)
+        with count_queries() as queries:
+            assert other.current_etag(match_uuid) == in_memory
+        assert queries.count == 1
+        assert match_uuid not in other
+
+    def test_unknown_match_has_no_etag(self, session_factory: Callable[[], ContextManager[Session]]) -> None:
+        """
+        Tests that an unknown UUID has no tag.
+        """
+        assert OngoingMatchService(session_factory).current_etag(str(uuid.uuid4())) is None
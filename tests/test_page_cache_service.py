@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from models.match import Match
+from services.match_service import MatchService
+from services.page_cache_service import LISTING_PAGES, PageCacheService
+from services.score_state import ScoreState
+from tests.conftest import FakeClock
+
+
+class TestPageCacheService:
+    """
+    Tests for the cache of rendered listing pages.
+    """
+
+    def test_page_expires(self, clock: FakeClock) -> None:
+        """
+        Tests that a page is served until its TTL has passed.
+        """
+        pages = PageCacheService(ttl=60, clock=clock)
+        pages.put(('', 1, None), b'page', pages.generation)
+
+        clock.now = 59
+        assert pages.get(('', 1, None)) == b'page'
+        clock.now = 60
+        assert pages.get(('', 1, None)) is None
+
+    def test_least_recently_used_page_is_evicted(self, clock: FakeClock) -> None:
+        """
+        Tests that the number of pages is bounded and the least recently used one is dropped.
+        """
+        pages = PageCacheService(max_pages=2, clock=clock)
+        for page in (1, 2):
+            pages.put(('', page, None), b'page %d' % page, pages.generation)
+        pages.get(('', 1, None))
+
+        pages.put(('', 3, None), b'page 3', pages.generation)
+
+        assert len(pages) == 2
+        assert pages.get(('', 2, None)) is None
+        assert pages.get(('', 1, None)) == b'page 1'
+
+    @pytest.mark.parametrize(
+        "player_name, dropped",
+        [("", True), ("fed", True), ("nadal", True), ("novak", False)],
+        ids=["NoFilter", "MatchingFilter", "OtherPlayer", "UnrelatedFilter"]
+    )
+    def test_invalidate(self, player_name: str, dropped: bool, clock: FakeClock) -> None:
+        """
+        Tests that a finished match drops the unfiltered pages and the pages of the filters matching its players.
+
+        :param player_name: The normalized filter of the page.
+        :param dropped: Whether the page is dropped.
+        """
+        pages = PageCacheService(clock=clock)
+        pages.put((player_name, 1, None), b'page', pages.generation)
+
+        pages.invalidate(("roger federer", "rafael nadal"))
+
+        assert (pages.get((player_name, 1, None)) is None) is dropped
+
+    def test_page_loaded_before_invalidation_is_not_cached(self, clock: FakeClock) -> None:
+        """
+        Tests that a page whose data was loaded before a match was finished is not cached.
+        """
+        pages = PageCacheService(clock=clock)
+        generation = pages.generation
+
+        pages.invalidate(("andy murray",))
+        pages.put(('', 1, None), b'stale page', generation)
+
+        assert pages.get(('', 1, None)) is None
+
+    def test_primary_is_read_after_invalidation(self, clock: FakeClock) -> None:
+        """
+        Tests that the pages are read from the primary until the replicas have caught up with a change.
+        """
+        pages = PageCacheService(replica_lag=5, clock=clock)
+        assert not pages.recently_invalidated()
+
+        clock.now = 100
+        pages.invalidate(("andy murray",))
+
+        assert pages.recently_invalidated()
+        clock.now = 105
+        assert not pages.recently_invalidated()
+
+    def test_streamed_page_is_cached_when_sent(self, clock: FakeClock) -> None:
+        """
+        Tests that a streamed page is cached once all its chunks were sent, and not when the response is cut.
+        """
+        pages = PageCacheService(clock=clock)
+
+        assert b''.join(pages.caching(('', 1, None), pages.generation, [b'a', b'b'])) == b'ab'
+        assert pages.get(('', 1, None)) == b'ab'
+
+        chunks = pages.caching(('', 2, None), pages.generation, [b'a', b'b'])
+        next(chunks)
+        chunks.close()
+        assert pages.get(('', 2, None)) is None
+
+    def test_finished_and_reopened_match_drop_pages(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that finishing a match and undoing its last point both drop the listing pages.
+        """
+        LISTING_PAGES.put(('', 1, None), b'page', LISTING_PAGES.generation)
+        MatchService.add_points(db, stored_match, ScoreState(), [1] * 48)
+        assert LISTING_PAGES.get(('', 1, None)) is None
+
+        LISTING_PAGES.put(('', 1, None), b'page', LISTING_PAGES.generation)
+        MatchService.undo_last_point(db, stored_match)
+        assert LISTING_PAGES.get(('', 1, None)) is None
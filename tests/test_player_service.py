@@ -0,0 +1,159 @@
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from exceptions import DuplicatePlayerError
+from models.player import Player, PlayerNameTrigram, normalize_name
+from services.match_service import MatchService
+from services.ongoing_match_service import OngoingMatch
+from services.player_service import PlayerService
+from services.score_state import ScoreState
+
+
+def _count_statements(db: Session) -> list[str]:
+    statements: list[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(db.get_bind(), 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+class TestPlayerService:
+    """
+    Tests for resolving the players of a new match.
+    """
+
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("Roger", "roger"),
+            ("  Rafael   Nadal ", "rafael nadal"),
+            ("Jean-Paul\tSTRAßE", "jean-paul strasse"),
+        ],
+        ids=["Case", "Whitespace", "CaseFold"]
+    )
+    def test_normalize_name(self, name: str, expected: str) -> None:
+        """
+        Tests the lookup key of player names.
+
+        :param name: The name of the player.
+        :param expected: The expected key.
+        """
+        assert normalize_name(name) == expected
+
+    def test_creates_missing_players(self, db: Session) -> None:
+        """
+        Tests that missing players are created and existing ones reused, case-insensitively.
+        """
+        db.add(Player(name="Roger"))
+        db.commit()
+
+        players = PlayerService.get_or_create_players(db, ("roger", "Rafael"))
+        db.commit()
+
+        assert [name for _, name in players] == ["Roger", "Rafael"]
+        assert db.query(Player).count() == 2
+        assert players == PlayerService.get_or_create_players(db, ("ROGER", " rafael "))
+        assert db.query(Player.name_key).order_by(Player.id).all() == [("roger",), ("rafael",)]
+
+    @pytest.mark.parametrize("names", [
+        ("Roger  Federer", "roger federer"),
+        ("Straße", "STRASSE"),
+    ])
+    def test_same_player_twice_is_rejected(self, db: Session, names: tuple[str, str]) -> None:
+        """
+        Tests that two names resolving to the same player are rejected before anything is stored.
+
+        :param names: Two spellings of the same name.
+        """
+        with pytest.raises(DuplicatePlayerError):
+            PlayerService.get_or_create_players(db, names)
+
+        assert db.query(Player).count() == 0
+
+    def test_existing_players_take_one_query(self, db: Session) -> None:
+        """
+        Tests that two existing players are resolved with a single SELECT.
+        """
+        db.add_all([Player(name="Roger"), Player(name="Rafael")])
+        db.commit()
+        statements = _count_statements(db)
+
+        PlayerService.get_or_create_players(db, ("Rafael", "Roger"))
+
+        assert len(statements) == 1
+
+    def test_match_creation_is_one_transaction(self, db: Session) -> None:
+        """
+        Tests that creating a match with two new players takes two SELECTs, the player upsert,
+        the search index upsert and the match INSERT.
+        """
+        statements = _count_statements(db)
+
+        (player1_id, _), (player2_id, _) = PlayerService.get_or_create_players(db, ("Roger", "Rafael"))
+        match = MatchService.create_match(db, player1_id, player2_id)
+        ongoing_match = OngoingMatch.from_match(match, "Roger", "Rafael")
+        db.commit()
+
+        assert [statement.split()[0] for statement in statements] == ["SELECT", "INSERT", "SELECT", "INSERT", "INSERT"]
+        assert ongoing_match.match_id is not None
+        assert ongoing_match.state == ScoreState()
+
+
+class TestPlayerSearch:
+    """
+    Tests for the player name search index.
+    """
+
+    @pytest.fixture
+    def players(self, db: Session) -> dict[str, int]:
+        """
+        Fixture that stores players, one of them through `get_or_create_players`, and returns their IDs by name.
+        """
+        db.add_all([Player(name="Roger Federer"), Player(name="Rafael Nadal"), Player(name="Novak Djokovic")])
+        db.flush()
+        PlayerService.get_or_create_players(db, ("Andy Murray",))
+        db.commit()
+        return {name: player_id for player_id, name in db.query(Player.id, Player.name)}
+
+    @pytest.mark.parametrize(
+        "query, expected",
+        [
+            ("federer", ["Roger Federer"]),
+            ("  RAFAEL  nadal", ["Rafael Nadal"]),
+            ("r f", ["Roger Federer"]),
+            ("a", ["Rafael Nadal", "Novak Djokovic", "Andy Murray"]),
+            ("ay", ["Andy Murray"]),
+            ("c", ["Novak Djokovic"]),
+            ("er", ["Roger Federer"]),
+            ("murray", ["Andy Murray"]),
+            ("nadalx", []),
+            ("ovak nad", []),
+            ("%", []),
+        ],
+        ids=[
+            "Word", "Normalized", "AcrossWords", "OneChar", "TwoCharsAtEnd", "LastChar",
+            "Repeated", "CreatedByService", "Longer", "NoSubstring", "Wildcard"
+        ]
+    )
+    def test_find_player_ids(self, db: Session, players: dict[str, int], query: str, expected: list[str]) -> None:
+        """
+        Tests that the search finds exactly the players whose name contains the query.
+
+        :param query: The searched string.
+        :param expected: The names of the players expected to be found.
+        """
+        assert PlayerService.find_player_ids(db, query) == sorted(players[name] for name in expected)
+
+    def test_new_player_is_indexed(self, db: Session) -> None:
+        """
+        Tests that every character of a new name starts one indexed trigram.
+        """
+        db.add(Player(name="Ana"))
+        db.commit()
+
+        assert sorted(db.query(PlayerNameTrigram.trigram)) == [("a  ",), ("ana",), ("na ",)]
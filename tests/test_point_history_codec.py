@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from exceptions import InvalidScoreError
+from services import point_history_codec, score_utils
+from services.score_state import ScoreState
+from services.scoring_engine import SCORING_ENGINE
+
+
+class TestPointHistoryCodec:
+    """
+    Tests for the bit-packed point history codec.
+    """
+
+    @pytest.mark.parametrize("count", [0, 1, 7, 8, 9, 250])
+    def test_round_trip(self, count: int) -> None:
+        """
+        Tests that a point sequence survives encoding and decoding.
+
+        :param count: The number of points in the sequence.
+        """
+        rng = random.Random(count)
+        player_nums = [rng.choice([1, 2]) for _ in range(count)]
+
+        data = point_history_codec.encode(player_nums)
+
+        assert len(data) == point_history_codec.HEADER_SIZE + (count + 7) // 8
+        assert point_history_codec.length(data) == count
+        assert list(point_history_codec.decode(data)) == player_nums
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"", b"\x01\x00\x00\x00\x09\xff", b"\x02\x00\x00\x00\x00"],
+        ids=["Empty", "Truncated", "UnknownVersion"]
+    )
+    def test_corrupted(self, data: bytes) -> None:
+        """
+        Tests that corrupted histories are rejected.
+
+        :param data: The corrupted data.
+        """
+        with pytest.raises(InvalidScoreError):
+            list(point_history_codec.decode(data))
+
+    def test_replay_history(self) -> None:
+        """
+        Tests that `score_utils.replay_history` rebuilds every intermediate score.
+        """
+        rng = random.Random(3)
+        player_nums = [rng.choice([1, 2]) for _ in range(120)]
+        data = point_history_codec.encode(player_nums)
+
+        state = ScoreState()
+        for index, player_num in enumerate(player_nums):
+            assert score_utils.replay_history(data, index) == state
+            state, _ = SCORING_ENGINE.play(state, player_num)
+        assert score_utils.replay_history(data) == state
@@ -0,0 +1,148 @@
+import random
+
+import pytest
+from sqlalchemy.orm import Session
+
+from config.config import SNAPSHOT_INTERVAL
+from exceptions import InvalidGameStateError
+from models.match import Match
+from models.match_point import MatchPoint, MatchSnapshot
+from services.match_service import MatchService
+from services.point_log_service import PointLogService
+from services.score_state import ScoreState, GameState
+
+
+class TestPointLogService:
+    """
+    Tests for the point log, snapshot replay and undo.
+    """
+
+    def test_score_at_every_index(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that the score after any number of points is rebuilt from the log.
+        """
+        rng = random.Random(7)
+        states = [ScoreState()]
+        state = ScoreState()
+        while len(states) <= SNAPSHOT_INTERVAL * 3:
+            state = MatchService.add_point(db, stored_match, state, rng.choice([1, 2]))
+            states.append(state)
+
+        assert db.query(MatchPoint).count() == len(states) - 1
+        assert db.query(MatchSnapshot).count() == 3
+        for index, expected in enumerate(states):
+            assert PointLogService.score_at(db, stored_match, index) == expected
+
+    def test_undo_last_point(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that undo restores the previous score and shortens the log.
+        """
+        before = MatchService.add_points(db, stored_match, ScoreState(), [1, 2] * SNAPSHOT_INTERVAL)
+        MatchService.add_point(db, stored_match, before, 1)
+
+        state = MatchService.undo_last_point(db, stored_match)
+
+        assert state == before
+        assert stored_match.points_played == 2 * SNAPSHOT_INTERVAL
+        assert stored_match.score == before
+
+    def test_undo_reopens_finished_match(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that undoing the winning point clears the winner.
+        """
+        MatchService.add_points(db, stored_match, ScoreState(), [1] * 48)
+        assert stored_match.winner_id == stored_match.player1_id
+
+        state = MatchService.undo_last_point(db, stored_match)
+
+        assert state.game_state is GameState.REGULAR
+        assert stored_match.winner_id is None
+
+    def test_undo_without_points(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that undo is rejected for a match without logged points.
+        """
+        with pytest.raises(InvalidGameStateError):
+            MatchService.undo_last_point(db, stored_match)
+
+    def test_finished_match_is_archived(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that the log of a finished match is compacted into the point history.
+        """
+        player_nums = [1, 2, 1, 1, 1] * 11 + [1] * 30
+        state = ScoreState()
+        for player_num in player_nums:
+            if state.game_state is GameState.FINISHED:
+                break
+            state = MatchService.add_point(db, stored_match, state, player_num)
+
+        assert db.query(MatchPoint).count() == 0
+        assert db.query(MatchSnapshot).count() == 0
+        assert stored_match.point_history is not None
+        assert PointLogService.score_at(db, stored_match, stored_match.points_played) == state
+        assert PointLogService.score_at(db, stored_match, 5) == ScoreState(player1_games=1)
+
+        previous = PointLogService.score_at(db, stored_match, stored_match.points_played - 1)
+        assert MatchService.undo_last_point(db, stored_match) == previous
+        assert stored_match.point_history is None
+        assert db.query(MatchPoint).count() == stored_match.points_played
+
+
+@pytest.fixture
+def upgraded_match(db: Session, stored_match: Match) -> Match:
+    """
+    Fixture that gives `stored_match` a score reached before the point log existed, with the seq-0
+    snapshot the migration writes for it.
+    """
+    base = ScoreState(0, 0, 3, 2, 1, 0)
+    stored_match.score = base
+    db.add(MatchSnapshot(match_id=stored_match.id, seq=0, state=base.pack()))
+    db.commit()
+    return stored_match
+
+
+class TestUpgradedMatch:
+    """
+    Tests for the point log of a match that was in progress when the log was introduced.
+    """
+
+    def test_undo_restores_score_before_upgrade(self, db: Session, upgraded_match: Match) -> None:
+        """
+        Tests that undoing the first point logged after the upgrade restores the score from before it.
+        """
+        MatchService.add_point(db, upgraded_match, upgraded_match.score, 1)
+
+        state = MatchService.undo_last_point(db, upgraded_match)
+
+        assert state == ScoreState(0, 0, 3, 2, 1, 0)
+        assert upgraded_match.score == state
+        with pytest.raises(InvalidGameStateError):
+            MatchService.undo_last_point(db, upgraded_match)
+
+    def test_finished_match_keeps_log(self, db: Session, upgraded_match: Match) -> None:
+        """
+        Tests that the log of a finished match that did not start at 0-0 is not archived, and its
+        last point can still be undone.
+        """
+        before = MatchService.add_points(db, upgraded_match, upgraded_match.score, [1] * 11)
+        state = MatchService.add_point(db, upgraded_match, before, 1)
+
+        assert state.game_state is GameState.FINISHED
+        assert upgraded_match.point_history is None
+        assert PointLogService.score_at(db, upgraded_match, upgraded_match.points_played) == state
+        assert MatchService.undo_last_point(db, upgraded_match) == before
+
+    def test_undo_is_refused_without_snapshot(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a log that does not lead to the score (no seq-0 snapshot) refuses the undo
+        instead of resetting the score to 0-0.
+        """
+        stored_match.score = ScoreState(0, 0, 3, 2, 1, 0)
+        db.commit()
+        state = MatchService.add_point(db, stored_match, stored_match.score, 1)
+
+        with pytest.raises(InvalidGameStateError):
+            MatchService.undo_last_point(db, stored_match)
+
+        db.rollback()
+        assert stored_match.score == state
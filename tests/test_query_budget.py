@@ -0,0 +1,103 @@
+import logging
+import uuid
+from contextlib import contextmanager
+from typing import Generator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from config.config import QUERY_BUDGET_PER_REQUEST
+from models.match import Match
+from services.match_count_service import MATCH_COUNTS
+from services.match_service import MatchService
+from services.ongoing_match_service import OngoingMatchService
+from utils.query_budget import count_queries
+
+
+def _add_matches(db: Session, count: int) -> None:
+    db.add_all(Match(uuid=str(uuid.uuid4()), player1_id=1, player2_id=2, winner_id=1) for _ in range(count))
+    db.commit()
+    db.expunge_all()
+
+
+class TestQueryBudget:
+    """
+    Tests for counting the SQL statements of a request.
+    """
+
+    def test_statements_are_counted(self, db: Session) -> None:
+        """
+        Tests that the statements of the block are counted, and only those.
+        """
+        db.execute(text("SELECT 1"))
+        with count_queries() as queries:
+            db.execute(text("SELECT 2"))
+            db.execute(text("SELECT 3"))
+        db.execute(text("SELECT 4"))
+
+        assert queries.count == 2
+        assert not queries.exceeded
+
+    def test_budget_exceeded_is_logged(self, db: Session, caplog: pytest.LogCaptureFixture) -> None:
+        """
+        Tests that a block over its budget is reported.
+        """
+        with caplog.at_level(logging.WARNING), count_queries(1, label="GET /test") as queries:
+            db.execute(text("SELECT 1"))
+            db.execute(text("SELECT 2"))
+
+        assert queries.exceeded
+        assert "GET /test executed 2 SQL statements" in caplog.text
+
+    def test_scoreboard_is_one_query(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that the scoreboard loads the match, the players and the winner in one query.
+        """
+        stored_match.winner_id = stored_match.player1_id
+        match_uuid = stored_match.uuid
+        db.commit()
+        db.expunge_all()
+
+        with count_queries() as queries:
+            match = MatchService.get_scoreboard(db, match_uuid)
+            names = (match.player1.name, match.player2.name, match.winner.name)
+
+        assert names == ("Roger", "Rafael", "Roger")
+        assert queries.count == 1
+
+    def test_ongoing_match_is_loaded_with_one_query(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that loading a match into the registry for its score page executes one statement.
+        """
+        @contextmanager
+        def get_db() -> Generator[Session, None, None]:
+            yield db
+
+        match_uuid = stored_match.uuid
+        db.expunge_all()
+        with count_queries() as queries:
+            entry = OngoingMatchService(get_db).get(match_uuid, read_only=True)
+
+        assert (entry.player1_name, entry.player2_name) == ("Roger", "Rafael")
+        assert queries.count == 1
+
+    def test_listing_queries_do_not_grow_with_page_size(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a page of completed matches with the player names executes the same statements
+        for one match as for a full page, within the request budget.
+        """
+        def load_page() -> int:
+            with count_queries() as queries:
+                matches, _, _ = MatchService.get_completed_matches(db, page=1, per_page=10)
+                [(match.player1.name, match.player2.name, match.winner.name) for match in matches]
+            MATCH_COUNTS.clear()
+            db.expunge_all()
+            return queries.count
+
+        _add_matches(db, 1)
+        one_match = load_page()
+        _add_matches(db, 9)
+        full_page = load_page()
+
+        assert full_page == one_match <= QUERY_BUDGET_PER_REQUEST
@@ -1,6 +1,5 @@
 import pytest
 
-from models.match import Match
 from services.strategies.regular_state_strategy import RegularStateStrategy
 from tests.conftest import setup_score
 
@@ -42,7 +41,6 @@ class TestRegularStateStrategy:
     )
     def test_add_point(
             self,
-            match: Match,
             initial_score: dict[str, dict[str, int]],
             player_key: str,
             expected_state: str,
@@ -56,7 +54,6 @@ class TestRegularStateStrategy:
         """
         Tests the `add_point` method of the `RegularStateStrategy` class.
 
-        :param match: A `Match` object (fixture).
         :param initial_score: A dictionary representing the initial score of the match.
         :param player_key: The key representing the player who scored a point ('player1' or 'player2').
         :param expected_state: The expected game state after adding the point (e.g., 'deuce', 'regular').
@@ -68,20 +65,14 @@ class TestRegularStateStrategy:
         :param expected_sets_player2: The expected number of sets for player 2 after adding the point.
         """
         strategy = RegularStateStrategy()
-        score = setup_score(match, initial_score)
+        state = setup_score(initial_score)
 
-        strategy.add_point(
-            match,
-            score,
-            player_key=player_key,
-            opponent_key="player2" if player_key == "player1" else "player1",
-            player_num=1 if player_key == "player1" else 2
-        )
+        state = strategy.add_point(state, player_num=1 if player_key == "player1" else 2)
 
-        assert match.current_game_state == expected_state
-        assert score["player1"]["points"] == expected_points_player1
-        assert score["player2"]["points"] == expected_points_player2
-        assert score["player1"]["games"] == expected_games_player1
-        assert score["player2"]["games"] == expected_games_player2
-        assert score["player1"]["sets"] == expected_sets_player1
-        assert score["player2"]["sets"] == expected_sets_player2
+        assert state.game_state == expected_state
+        assert state.player1_points == expected_points_player1
+        assert state.player2_points == expected_points_player2
+        assert state.player1_games == expected_games_player1
+        assert state.player2_games == expected_games_player2
+        assert state.player1_sets == expected_sets_player1
+        assert state.player2_sets == expected_sets_player2
@@ -0,0 +1,113 @@
+from typing import Generator
+
+import pytest
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import sessionmaker, Session
+
+from database.replicas import ReplicaRouter
+from tests.conftest import FakeClock
+
+
+@pytest.fixture
+def primary() -> Generator[sessionmaker[Session], None, None]:
+    """
+    Fixture that provides the session factory of an in-memory SQLite primary.
+    """
+    engine = create_engine("sqlite://")
+    yield sessionmaker(autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def replicas() -> Generator[list[Engine], None, None]:
+    """
+    Fixture that provides three reachable in-memory SQLite replicas.
+    """
+    engines = [create_engine("sqlite://") for _ in range(3)]
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+def _unreachable() -> Engine:
+    return create_engine("sqlite:////nonexistent/directory/replica.db")
+
+
+class TestReplicaRouter:
+    """
+    Tests for the routing of read-only sessions to replicas.
+    """
+
+    def test_round_robin(self, primary: sessionmaker[Session], replicas: list[Engine]) -> None:
+        """
+        Tests that consecutive sessions are spread over the replicas in turn.
+        """
+        router = ReplicaRouter(primary, replicas)
+
+        binds = []
+        for _ in range(6):
+            db = router.connect()
+            binds.append(db.bind)
+            db.close()
+
+        assert binds == replicas + replicas
+
+    def test_no_replicas_uses_primary(self, primary: sessionmaker[Session]) -> None:
+        """
+        Tests that without replicas the sessions are opened on the primary.
+        """
+        db = ReplicaRouter(primary).connect()
+
+        assert db.bind is primary.kw["bind"]
+        db.close()
+
+    def test_unreachable_replica_is_ejected(
+            self,
+            primary: sessionmaker[Session],
+            replicas: list[Engine],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that an unreachable replica is skipped and left out until its retry time.
+        """
+        down = _unreachable()
+        router = ReplicaRouter(primary, [down, *replicas[:2]], retry_after=30, clock=clock)
+
+        db = router.connect()
+        assert db.bind is replicas[0]
+        db.close()
+        assert set(router.healthy()) == set(replicas[:2])
+
+        clock.now = 30
+        assert down in router.healthy()
+        down.dispose()
+
+    def test_all_replicas_down_uses_primary(self, primary: sessionmaker[Session], clock: FakeClock) -> None:
+        """
+        Tests that the primary is used when no replica can be reached.
+        """
+        down = [_unreachable(), _unreachable()]
+        router = ReplicaRouter(primary, down, clock=clock)
+
+        db = router.connect()
+
+        assert db.bind is primary.kw["bind"]
+        assert router.healthy() == []
+        db.close()
+        for engine in down:
+            engine.dispose()
+
+    def test_eject_ignores_primary(
+            self,
+            primary: sessionmaker[Session],
+            replicas: list[Engine],
+            clock: FakeClock
+    ) -> None:
+        """
+        Tests that a failing primary session does not change the replicas in use.
+        """
+        router = ReplicaRouter(primary, replicas, clock=clock)
+
+        router.eject(primary.kw["bind"])
+
+        assert len(router.healthy()) == 3
@@ -0,0 +1,31 @@
+import pytest
+
+from utils.request_utils import etag_matches
+
+
+class TestEtagMatches:
+    """
+    Tests for the If-None-Match comparison.
+    """
+
+    @pytest.mark.parametrize(
+        "if_none_match, expected",
+        [
+            ('"1-8"', True),
+            ('W/"1-8"', True),
+            ('"1-0", "1-8"', True),
+            ('*', True),
+            ('"1-0"', False),
+            ('"1-80"', False),
+            ('1-8', False),
+        ],
+        ids=["Same", "Weak", "List", "Any", "Other", "Prefix", "Unquoted"]
+    )
+    def test_etag_matches(self, if_none_match: str, expected: bool) -> None:
+        """
+        Tests matching the header against the tag "1-8".
+
+        :param if_none_match: The value of the If-None-Match header.
+        :param expected: Whether the header matches.
+        """
+        assert etag_matches(if_none_match, '"1-8"') is expected
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from exceptions import InvalidScoreError
+from models.match import Match
+from services.score_state import ScoreState, GameState
+
+
+class TestScoreState:
+    """
+    Tests for the conversion of `ScoreState` to and from the stored forms.
+    """
+
+    def test_match_columns_round_trip(self, db: Session, stored_match: Match) -> None:
+        """
+        Tests that a state survives storage in the score columns of a match.
+        """
+        state = ScoreState(5, 4, 6, 6, 1, 0, GameState.TIE_BREAK)
+
+        stored_match.score = state
+        db.commit()
+        db.expire_all()
+
+        assert stored_match.score == state
+        assert db.query(Match.id).filter(Match.player1_games == 6, Match.current_game_state == "tie_break").count() == 1
+
+    def test_player_accessors(self) -> None:
+        """
+        Tests the player-relative accessors.
+        """
+        state = ScoreState(1, 2, 3, 4, 0, 1, GameState.REGULAR)
+
+        assert (state.points(1), state.games(1), state.sets(1)) == (1, 3, 0)
+        assert (state.points(2), state.games(2), state.sets(2)) == (2, 4, 1)
+
+    @pytest.mark.parametrize(
+        "state",
+        [
+            ScoreState(),
+            ScoreState(4, 3, 5, 2, 1, 0, GameState.ADVANTAGE_1),
+            ScoreState(23, 22, 6, 6, 2, 2, GameState.TIE_BREAK),
+            ScoreState(0, 0, 0, 0, 0, 2, GameState.FINISHED),
+        ],
+        ids=["Initial", "Advantage", "LongTieBreak", "Finished"]
+    )
+    def test_pack_round_trip(self, state: ScoreState) -> None:
+        """
+        Tests that a state survives packing into an integer and back.
+
+        :param state: The state to pack.
+        """
+        assert ScoreState.unpack(state.pack()) == state
+
+    def test_pack_overflow(self) -> None:
+        """
+        Tests that a counter too large for its bit field is rejected.
+        """
+        with pytest.raises(ValueError):
+            ScoreState(player1_sets=8).pack()
+
+    def test_unpack_unknown_game_state(self) -> None:
+        """
+        Tests that a packed value with an unknown game state code is reported as corrupted.
+        """
+        with pytest.raises(InvalidScoreError):
+            ScoreState.unpack(len(GameState))
@@ -0,0 +1,210 @@
+import random
+
+import pytest
+
+from exceptions import InvalidGameStateError, MatchFormatError
+from services.match_rules import MATCH_FORMATS, get_rules
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import (
+    SCORING_ENGINE,
+    GAME_WON,
+    SET_WON,
+    MATCH_WON,
+    play_reference_point,
+    get_engine
+)
+from tests.conftest import setup_score
+
+
+class TestScoringEngine:
+    """
+    Tests for the `ScoringEngine` transition table, checked against the reference strategies.
+    """
+
+    @pytest.mark.parametrize("seed", range(50))
+    def test_matches_reference(self, seed: int) -> None:
+        """
+        Plays a random match with both implementations and compares them point by point.
+
+        :param seed: Seed of the random point sequence.
+        """
+        rng = random.Random(seed)
+        # Skewed probabilities produce both lopsided sets and long deuces and tie-breaks
+        p1_wins = rng.choice([0.5, 0.5, 0.6, 0.4])
+        reference_state = state = ScoreState()
+
+        while reference_state.game_state is not GameState.FINISHED:
+            player_num = 1 if rng.random() < p1_wins else 2
+            reference_state = play_reference_point(reference_state, player_num)
+            state, flags = SCORING_ENGINE.play(state, player_num)
+
+            assert state == reference_state
+            assert bool(flags & MATCH_WON) == (state.game_state is GameState.FINISHED)
+
+    @pytest.mark.parametrize(
+        "initial_score, game_state, player_num, expected_flags",
+        [
+            # Normal point
+            ({"player1": {"points": 1}, "player2": {"points": 0}}, "regular", 1, 0),
+            # Game won (4-1)
+            ({"player1": {"points": 3}, "player2": {"points": 1}}, "regular", 1, GAME_WON),
+            # Set won 6-4
+            ({"player1": {"points": 3, "games": 5}, "player2": {"games": 4}}, "regular", 1, GAME_WON | SET_WON),
+            # Match won in a tie-break
+            (
+                    {"player1": {"points": 6, "games": 6, "sets": 1}, "player2": {"points": 5, "games": 6}},
+                    "tie_break", 1, GAME_WON | SET_WON | MATCH_WON
+            ),
+        ],
+        ids=["Point", "Game", "Set", "Match"]
+    )
+    def test_flags(
+            self,
+            initial_score: dict[str, dict[str, int]],
+            game_state: str,
+            player_num: int,
+            expected_flags: int
+    ) -> None:
+        """
+        Tests the flags returned for a point.
+
+        :param initial_score: A dictionary representing the initial score of the match.
+        :param game_state: The game state before the point.
+        :param player_num: The player who scored the point.
+        :param expected_flags: The expected GAME_WON / SET_WON / MATCH_WON combination.
+        """
+        _, flags = SCORING_ENGINE.play(setup_score(initial_score, game_state), player_num)
+
+        assert flags & (GAME_WON | SET_WON | MATCH_WON) == expected_flags
+
+    def test_long_tie_break_keeps_raw_points(self) -> None:
+        """
+        Tests that points above the table range are carried back into the score.
+        """
+        state = setup_score({"player1": {"games": 6, "points": 11}, "player2": {"games": 6, "points": 12}}, 'tie_break')
+
+        state, _ = SCORING_ENGINE.play(state, 1)
+
+        assert state.game_state == 'tie_break'
+        assert state.player1_points == 12
+        assert state.player2_points == 12
+
+    def test_finished_match_rejects_points(self) -> None:
+        """
+        Tests that a finished match does not accept points.
+        """
+        state = setup_score({"player1": {"sets": 2}}, 'finished')
+
+        with pytest.raises(InvalidGameStateError):
+            SCORING_ENGINE.play(state, 1)
+
+
+class TestMatchFormats:
+    """
+    Tests for the scoring engines compiled from the match formats.
+    """
+
+    @pytest.mark.parametrize("match_format", sorted(MATCH_FORMATS))
+    @pytest.mark.parametrize("seed", range(10))
+    def test_matches_reference(self, match_format: str, seed: int) -> None:
+        """
+        Plays a random match of a format with both implementations and compares them point by point.
+
+        :param match_format: The name of the match format.
+        :param seed: Seed of the random point sequence.
+        """
+        rng = random.Random(seed)
+        rules = get_rules(match_format)
+        engine = get_engine(match_format)
+        reference_state = state = ScoreState()
+
+        while reference_state.game_state is not GameState.FINISHED:
+            player_num = 1 if rng.random() < 0.5 else 2
+            reference_state = play_reference_point(reference_state, player_num, rules)
+            state, _ = engine.play(state, player_num)
+
+            assert state == reference_state
+        assert max(state.player1_sets, state.player2_sets) == rules.sets_to_win
+
+    @pytest.mark.parametrize(
+        "match_format, initial_score, game_state, expected_score, expected_game_state",
+        [
+            # No-ad: the point at deuce decides the game
+            (
+                    "no_ad", {"player1": {"points": 3}, "player2": {"points": 3}}, "deuce",
+                    {"player1": {"games": 1}}, "regular"
+            ),
+            # Short sets: a tie-break at 4-4
+            (
+                    "short_sets", {"player1": {"points": 3, "games": 3}, "player2": {"games": 4}}, "regular",
+                    {"player1": {"games": 4}, "player2": {"games": 4}}, "tie_break"
+            ),
+            # Short sets: a set is won 4-2
+            (
+                    "short_sets", {"player1": {"points": 3, "games": 3}, "player2": {"games": 2}}, "regular",
+                    {"player1": {"sets": 1}}, "regular"
+            ),
+            # Match tie-break: it starts right after the second set levels the match
+            (
+                    "match_tie_break",
+                    {"player1": {"points": 3, "games": 5, "sets": 0}, "player2": {"games": 3, "sets": 1}}, "regular",
+                    {"player1": {"sets": 1}, "player2": {"sets": 1}}, "tie_break"
+            ),
+            # Match tie-break: 7 points do not win it
+            (
+                    "match_tie_break",
+                    {"player1": {"points": 6, "sets": 1}, "player2": {"points": 2, "sets": 1}}, "tie_break",
+                    {"player1": {"points": 7, "sets": 1}, "player2": {"points": 2, "sets": 1}}, "tie_break"
+            ),
+            # Match tie-break: 10 points win the match
+            (
+                    "match_tie_break",
+                    {"player1": {"points": 9, "sets": 1}, "player2": {"points": 7, "sets": 1}}, "tie_break",
+                    {"player1": {"sets": 2}, "player2": {"sets": 1}}, "finished"
+            ),
+            # Best of 5: two sets do not win the match
+            (
+                    "best_of_5", {"player1": {"points": 3, "games": 5, "sets": 1}, "player2": {"games": 0}}, "regular",
+                    {"player1": {"sets": 2}}, "regular"
+            ),
+        ],
+        ids=[
+            "NoAdDecidingPoint", "ShortSetTieBreak", "ShortSetWon",
+            "MatchTieBreakStarts", "MatchTieBreakContinues", "MatchTieBreakWon", "BestOfFiveContinues"
+        ]
+    )
+    def test_format_rules(
+            self,
+            match_format: str,
+            initial_score: dict[str, dict[str, int]],
+            game_state: str,
+            expected_score: dict[str, dict[str, int]],
+            expected_game_state: str
+    ) -> None:
+        """
+        Tests a point won by player 1 under the rules of a format.
+
+        :param match_format: The name of the match format.
+        :param initial_score: A dictionary representing the initial score of the match.
+        :param game_state: The game state before the point.
+        :param expected_score: The expected score after the point.
+        :param expected_game_state: The expected game state after the point.
+        """
+        state, _ = get_engine(match_format).play(setup_score(initial_score, game_state), 1)
+
+        assert state == setup_score(expected_score, expected_game_state)
+
+    def test_engines_are_compiled_once(self) -> None:
+        """
+        Tests that every format is compiled into a single shared engine.
+        """
+        assert get_engine("standard") is SCORING_ENGINE
+        assert get_engine("no_ad") is get_engine("no_ad")
+        assert get_engine("no_ad").rules is MATCH_FORMATS["no_ad"]
+
+    def test_unknown_format(self) -> None:
+        """
+        Tests that an unknown format is rejected.
+        """
+        with pytest.raises(MatchFormatError):
+            get_engine("best_of_7")
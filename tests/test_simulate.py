@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+import simulate  # noqa: E402
+from services import win_probability  # noqa: E402
+from services.score_state import ScoreState  # noqa: E402
+
+
+class TestSimulate:
+    """
+    Tests for the vectorized match simulator.
+    """
+
+    def test_win_rate_matches_exact_probability(self) -> None:
+        """
+        Tests that the simulated win rate agrees with the exact model.
+        """
+        result = simulate.simulate(20_000, 0.53, seed=11)
+
+        expected = win_probability.compute_match_win_probability(ScoreState(), 0.53)
+        assert result.matches == 20_000
+        assert result.player1_wins / result.matches == pytest.approx(expected, abs=0.02)
+        assert sum(result.set_scores.values()) == result.matches
+
+    def test_shards_are_reproducible(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a sharded run is reproducible from its seed.
+        """
+        monkeypatch.setattr(simulate, "SHARD_SIZE", 3_000)
+
+        first = simulate.simulate(10_000, 0.5, seed=5)
+        second = simulate.simulate(10_000, 0.5, seed=5)
+
+        assert first == second
+        assert first.set_scores.keys() <= {(2, 0), (2, 1), (0, 2), (1, 2)}
+
+    def test_process_pool_matches_single_process(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that shards run by worker processes add up to the same result as a run in this process.
+        """
+        monkeypatch.setattr(simulate, "SHARD_SIZE", 1_000)
+
+        sharded = simulate.simulate(3_000, 0.55, workers=2, seed=3)
+
+        assert sharded == simulate.simulate(3_000, 0.55, seed=3)
+        assert sharded.matches == 3_000
+
+    @pytest.mark.parametrize(
+        "argv",
+        [["--matches", "0"], ["--matches", "-5"], ["--workers", "0"], ["--p", "1.5"], ["--p", "-0.1"]],
+        ids=["NoMatches", "NegativeMatches", "NoWorkers", "PAboveOne", "NegativeP"]
+    )
+    def test_invalid_arguments(self, argv: list[str]) -> None:
+        """
+        Tests that the command line rejects values the simulation cannot run with.
+
+        :param argv: The command line arguments.
+        """
+        with pytest.raises(SystemExit):
+            simulate.main(argv)
@@ -0,0 +1,147 @@
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import pytest
+from jinja2 import DictLoader, FileSystemBytecodeCache
+
+from services.match_count_service import MatchCount
+from services.score_state import ScoreState
+from views.completed_matches_view import CompletedMatchesView
+from views.environment import create_environment
+from views.home_view import HomeView
+from views.match_view import MatchView
+from views.precompile import precompile
+from views.template_name import TemplateName
+
+CONTEXTS: dict[TemplateName, dict[str, Any]] = {
+    TemplateName.HOME_PAGE: {},
+    TemplateName.NEW_MATCH_FORM: {"errors": {}, "match_formats": []},
+    TemplateName.MATCH_SCORE: {
+        "uuid": "1", "player1": "Roger", "player2": "Rafael", "score": ScoreState(1, 2, 3, 4, 1, 0),
+        "player1_win_chance": 0.5, "finished": False
+    },
+    TemplateName.FINAL_SCORE: {"uuid": "1", "player1": "Roger", "player2": "Rafael", "winner": "Roger"},
+    TemplateName.ERROR_PAGE: {"error_title": "Error", "error_message": "Message"},
+}
+
+
+class TestTemplateEnvironment:
+    """
+    Tests for the shared Jinja2 environment and the precompiled templates.
+    """
+
+    def test_views_share_environment(self) -> None:
+        """
+        Tests that all views render with the same environment, so templates are compiled once per process.
+        """
+        assert MatchView().env is HomeView().env is CompletedMatchesView().env
+
+    @pytest.mark.parametrize("template_name", list(CONTEXTS), ids=lambda name: name.name)
+    def test_precompiled_templates_render_like_sources(self, tmp_path: Path, template_name: TemplateName) -> None:
+        """
+        Tests that a template loaded from its precompiled module renders the same page as its source.
+
+        :param template_name: The template.
+        """
+        names = precompile(str(tmp_path))
+        precompiled = create_environment(cache_dir="", modules_dir=str(tmp_path))
+        compiled = create_environment(cache_dir="", modules_dir=None)
+
+        template = precompiled.get_template(template_name.value)
+        context = CONTEXTS[template_name]
+
+        assert {name.value for name in TemplateName} <= set(names)
+        assert template.filename is not None and template.filename.startswith(str(tmp_path))
+        assert template.render(**context) == compiled.get_template(template_name.value).render(**context)
+
+    def test_bytecode_cache(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that compiled templates are written to the cache directory and used by a new environment.
+        """
+        cache_dir = tmp_path / "cache"
+        first = create_environment(cache_dir=str(cache_dir), modules_dir=None)
+        first.get_template(TemplateName.HOME_PAGE.value).render()
+        assert os.listdir(cache_dir)
+
+        env = create_environment(cache_dir=str(cache_dir), modules_dir=None)
+
+        def compile_again(*args: Any) -> None:
+            raise AssertionError("The template was compiled again")
+
+        monkeypatch.setattr(env.bytecode_cache, "dump_bytecode", compile_again)
+        assert env.get_template(TemplateName.HOME_PAGE.value).render()
+
+    def test_bytecode_cache_settings(self) -> None:
+        """
+        Tests that without a configured directory the cache uses Jinja's per-user directory,
+        and that an empty directory disables the cache.
+        """
+        default = create_environment(cache_dir=None, modules_dir=None)
+        assert isinstance(default.bytecode_cache, FileSystemBytecodeCache)
+        assert default.bytecode_cache.directory == FileSystemBytecodeCache().directory
+
+        assert create_environment(cache_dir="", modules_dir=None).bytecode_cache is None
+
+
+def _listing_context(matches: Iterable[dict[str, str]]) -> dict[str, Any]:
+    return {
+        "matches": matches,
+        "total": MatchCount(1000, exact=True),
+        "current_page": 1,
+        "total_pages": 1,
+        "page_urls": [],
+        "next_url": None,
+        "prev_url": None,
+        "player_name": None,
+    }
+
+
+def _rows(count: int) -> Iterator[dict[str, str]]:
+    for i in range(count):
+        yield {"player1": f"Player {i}", "player2": "Rafael", "winner": "Rafael"}
+
+
+class TestStreaming:
+    """
+    Tests for rendering pages in chunks.
+    """
+
+    def test_stream_matches_render(self) -> None:
+        """
+        Tests that the chunks of a page add up to the rendered page and are collected up to the chunk size.
+        """
+        view = CompletedMatchesView()
+        rendered = view.render_template(TemplateName.COMPLETED_MATCHES, _listing_context(list(_rows(1000))))
+
+        chunks = list(view.stream_template(TemplateName.COMPLETED_MATCHES, _listing_context(_rows(1000)), 4096))
+
+        assert b''.join(chunks) == rendered.encode('utf-8')
+        assert len(chunks) > 1
+        assert all(len(chunk.decode('utf-8')) >= 4096 for chunk in chunks[:-1])
+
+    def test_first_chunk_before_page_is_rendered(self) -> None:
+        """
+        Tests that the first chunk is produced before the rest of the page is rendered.
+        """
+        def failing_rows() -> Iterator[dict[str, str]]:
+            yield from _rows(1000)
+            raise RuntimeError("the end of the page was rendered")
+
+        chunks = CompletedMatchesView().stream_template(
+            TemplateName.COMPLETED_MATCHES, _listing_context(failing_rows()), 1024
+        )
+
+        assert next(chunks)
+        with pytest.raises(RuntimeError):
+            list(chunks)
+
+    def test_missing_template(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Tests that a missing template yields the error message before the response starts.
+        """
+        view = HomeView()
+        monkeypatch.setattr(view, "env", create_environment(cache_dir="", modules_dir=None))
+        view.env.loader = DictLoader({})
+
+        assert list(view.stream_template(TemplateName.HOME_PAGE)) == [b"Error rendering template"]
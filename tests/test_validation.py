@@ -0,0 +1,44 @@
+import pytest
+
+from services.validation import Validation
+
+
+class TestValidation:
+    """
+    Tests for the validation of the new match form.
+    """
+
+    @pytest.mark.parametrize("player1_name, player2_name", [
+        ("Roger", "roger"),
+        ("Roger  Federer", "roger federer"),
+        ("Straße", "STRASSE"),
+    ])
+    def test_same_player_twice(self, player1_name: str, player2_name: str) -> None:
+        """
+        Tests that names differing only in case or whitespace are reported as duplicates.
+
+        :param player1_name: The name of the first player.
+        :param player2_name: Another spelling of the same name.
+        """
+        assert "duplicate" in Validation.player_names(player1_name, player2_name)
+
+    def test_different_players(self) -> None:
+        """
+        Tests that two different valid names pass.
+        """
+        assert Validation.player_names("Roger Federer", "Rafael Nadal") == {}
+
+    @pytest.mark.parametrize(
+        "page, total_matches, expected",
+        [(0, 10, 1), (2, 10, 2), (3, 10, 2), (4, 11, 3), (5, 0, 1)],
+        ids=["BelowFirst", "Last", "PastFullLast", "PastPartialLast", "NoMatches"]
+    )
+    def test_correct_page(self, page: int, total_matches: int, expected: int) -> None:
+        """
+        Tests that a page number is clamped to the pages holding matches, 5 per page.
+
+        :param page: The requested page number.
+        :param total_matches: The number of matches.
+        :param expected: The corrected page number.
+        """
+        assert Validation.correct_page(page, total_matches, 5) == expected
@@ -0,0 +1,92 @@
+import pytest
+
+from services import win_probability
+from services.score_state import ScoreState, GameState
+from services.scoring_engine import SCORING_ENGINE, get_engine
+
+
+def _mirror(state: ScoreState) -> ScoreState:
+    if state.game_state is GameState.ADVANTAGE_1:
+        game_state = GameState.ADVANTAGE_2
+    elif state.game_state is GameState.ADVANTAGE_2:
+        game_state = GameState.ADVANTAGE_1
+    else:
+        game_state = state.game_state
+    return ScoreState(
+        state.player2_points, state.player1_points,
+        state.player2_games, state.player1_games,
+        state.player2_sets, state.player1_sets,
+        game_state
+    )
+
+
+class TestWinProbability:
+    """
+    Tests for the match win probability model.
+    """
+
+    @pytest.mark.parametrize(
+        "match_format, p",
+        [
+            ("standard", 0.3),
+            ("standard", 0.5),
+            ("standard", 0.62),
+            ("best_of_5", 0.55),
+            ("no_ad", 0.55),
+            ("match_tie_break", 0.55),
+            ("short_sets", 0.55),
+            ("doubles", 0.45),
+        ]
+    )
+    def test_matches_value_iteration(self, match_format: str, p: float) -> None:
+        """
+        Tests the DP against value iteration over the scoring engine transition table of a format.
+
+        :param match_format: The name of the match format.
+        :param p: The probability that player 1 wins a point.
+        """
+        engine = get_engine(match_format)
+        values = [
+            (1.0 if state.player1_sets > state.player2_sets else 0.0)
+            if state.game_state is GameState.FINISHED else 0.5
+            for state in engine.states
+        ]
+        transitions = [
+            (state_id, engine.score_point(state_id, 1)[0], engine.score_point(state_id, 2)[0])
+            for state_id, state in enumerate(engine.states)
+            if state.game_state is not GameState.FINISHED
+        ]
+        delta = 1.0
+        while delta > 1e-12:
+            delta = 0.0
+            # States are numbered breadth-first, so sweeping backwards converges quickly
+            for state_id, win, loss in reversed(transitions):
+                value = p * values[win] + (1 - p) * values[loss]
+                delta = max(delta, abs(value - values[state_id]))
+                values[state_id] = value
+
+        for state_id, state in enumerate(engine.states):
+            assert win_probability.compute_match_win_probability(state, p, engine.rules) == pytest.approx(
+                values[state_id], abs=1e-9
+            )
+
+    def test_symmetry(self) -> None:
+        """
+        Tests that swapping the players and p gives the complementary probability.
+        """
+        for state in SCORING_ENGINE.states[::7]:
+            assert (
+                    win_probability.match_win_probability(state, 0.58) +
+                    win_probability.match_win_probability(_mirror(state), 0.42)
+            ) == pytest.approx(1.0)
+
+    def test_lookup_uses_grid(self) -> None:
+        """
+        Tests that lookups round p to the grid and handle long deuces.
+        """
+        state = ScoreState(9, 9, 2, 3, 1, 0, GameState.DEUCE)
+
+        assert win_probability.match_win_probability(state, 0.551) == pytest.approx(
+            win_probability.compute_match_win_probability(state, 0.55)
+        )
+        assert win_probability.match_win_probability(ScoreState(), 0.5) == pytest.approx(0.5)